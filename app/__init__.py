@@ -1,6 +1,8 @@
 # app/__init__.py
-from flask import Flask, send_from_directory
+from flask import Flask, send_from_directory, request, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from flask_migrate import Migrate
 import os
 from dotenv import load_dotenv
 
@@ -10,12 +12,28 @@ load_dotenv(os.path.join(BASE_DIR, ".env"))
 
 from config import Config
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    按请求类型选择连接池：GET/HEAD 请求中的查询走只读连接池 read，
+    其余情况（导入脚本、写操作、flush）走默认的写连接池
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and has_request_context()
+                and request.method in ('GET', 'HEAD') and 'read' in self._db.engines):
+            return self._db.engines['read']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+migrate = Migrate()
 
 def create_app():
     app = Flask(__name__, static_folder="../frontend/dist")
     app.config.from_object(Config)
     db.init_app(app)
+    migrate.init_app(app, db)
 
     # 注册蓝图
     from app.routes.main import main_bp, root_bp
@@ -33,6 +51,10 @@ def create_app():
     app.register_blueprint(team_bp)
     app.register_blueprint(ai_bp)
 
+    # 读接口按数据版本返回 ETag/Last-Modified，版本未变时直接 304
+    from app.services import data_version
+    data_version.init_app(app, {'main', 'player', 'match', 'team', 'hero'})
+
     # 静态文件处理
     @app.route('/<path:filename>')
     def static_files(filename):
@@ -0,0 +1,70 @@
+# 爬虫运行状态相关的模型，记录断点和异常的比赛 ID，不再改写 config.py
+
+from datetime import datetime
+from app import db
+
+
+class CrawlState(db.Model):
+    __tablename__ = 'crawl_state'
+
+    name = db.Column(db.String(50), primary_key=True)  # 爬取任务名，默认 default
+    last_match_id = db.Column(db.Integer, nullable=False)  # 高水位：已确认处理完的最大有数据比赛ID
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now)
+
+    def __repr__(self):
+        return f"<CrawlState {self.name}:{self.last_match_id}>"
+
+
+class CrawlRecord(db.Model):
+    __tablename__ = 'crawl_records'
+
+    match_id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), nullable=False, index=True)  # skipped 跳过 / empty 无数据 / error 出错
+    error = db.Column(db.String(255), nullable=True)  # 跳过原因或错误信息
+    attempts = db.Column(db.Integer, nullable=False, default=1)  # 累计尝试次数
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now)
+
+    def __repr__(self):
+        return f"<CrawlRecord {self.match_id} {self.status}>"
+
+
+class CrawlRange(db.Model):
+    __tablename__ = 'crawl_ranges'
+
+    id = db.Column(db.Integer, primary_key=True)
+    start_id = db.Column(db.Integer, nullable=False, unique=True)  # 区间起始比赛ID（含）
+    end_id = db.Column(db.Integer, nullable=False)  # 区间结束比赛ID（含）
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)  # pending 待领取 / running 处理中 / done 已完成
+    owner = db.Column(db.String(100), nullable=True)  # 当前持有租约的 worker
+    lease_expires_at = db.Column(db.DateTime, nullable=True, index=True)  # 租约到期时间，过期后其他 worker 可以接手
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # 被领取的次数
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now)
+
+    def __repr__(self):
+        return f"<CrawlRange {self.start_id}-{self.end_id} {self.status}>"
+
+
+class MatchSource(db.Model):
+    __tablename__ = 'match_sources'
+
+    match_id = db.Column(db.Integer, primary_key=True)
+    upstream_updated_at = db.Column(db.DateTime, nullable=True)  # 上游 JSON 中的 updated_at
+    etag = db.Column(db.String(255), nullable=True)  # 上次响应的 ETag
+    last_modified = db.Column(db.String(100), nullable=True)  # 上次响应的 Last-Modified
+    checked_at = db.Column(db.DateTime, nullable=True, index=True)  # 上次检查上游的时间
+    changed_at = db.Column(db.DateTime, nullable=True)  # 上次因上游变化而重写的时间
+
+    def __repr__(self):
+        return f"<MatchSource {self.match_id}>"
+
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+
+    name = db.Column(db.String(50), primary_key=True)  # 固定为 default
+    epoch = db.Column(db.BigInteger, nullable=False, default=0)  # 每次提交导入数据或刷新首页快照时加 1
+    max_match_id = db.Column(db.Integer, nullable=False, default=0)  # 已导入的最大比赛ID
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.now)  # 最近一次变更时间
+
+    def __repr__(self):
+        return f"<DataVersion {self.max_match_id}-{self.epoch}>"
@@ -0,0 +1,33 @@
+# 维度表：战队、选手、英雄名称各存一份，明细表通过整数ID引用
+
+from app import db
+
+
+class DimTeam(db.Model):
+    __tablename__ = 'dim_teams'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)  # 战队名
+
+    def __repr__(self):
+        return f"<DimTeam {self.name}>"
+
+
+class DimPlayer(db.Model):
+    __tablename__ = 'dim_players'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)  # 选手名
+
+    def __repr__(self):
+        return f"<DimPlayer {self.name}>"
+
+
+class DimHero(db.Model):
+    __tablename__ = 'dim_heroes'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False, unique=True)  # 英雄名
+
+    def __repr__(self):
+        return f"<DimHero {self.name}>"
@@ -4,6 +4,12 @@ from app import db
 
 class Match(db.Model):
     __tablename__ = 'matches'
+    __table_args__ = (
+        db.Index('ix_matches_date', 'date'),  # 比赛列表、最近比赛按日期排序/筛选
+        db.Index('ix_matches_game_time', 'game_time'),  # 最快/最长比赛
+        db.Index('ix_matches_red_team_id', 'red_team_id'),
+        db.Index('ix_matches_blue_team_id', 'blue_team_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)  # 在SQLAlchemy中 主键默认就是id 绷不住了
     match_id = db.Column(db.Integer, unique=True)
@@ -13,6 +19,9 @@ class Match(db.Model):
     blue_team_name = db.Column(db.String(100), nullable=False)  # 蓝方队伍名
     win_team_name = db.Column(db.String(100), nullable=False)
     mvp = db.Column(db.String(100), nullable=True) # mvp选手
+    red_team_id = db.Column(db.Integer, nullable=True)  # 红方 dim_teams.id
+    blue_team_id = db.Column(db.Integer, nullable=True)  # 蓝方 dim_teams.id
+    win_team_id = db.Column(db.Integer, nullable=True)  # 胜方 dim_teams.id
 
     def save(self):
         db.session.add(self)
@@ -3,9 +3,17 @@
 from app import db
 class Player(db.Model):
     __tablename__ = 'players'
+    __table_args__ = (
+        db.Index('ix_players_name_date', 'name', 'date'),  # 选手详情、选手列表取最近一场
+        db.Index('ix_players_match_id', 'match_id'),  # 比赛详情
+        db.Index('ix_players_kills', 'kills'),  # 单场击杀排行
+        db.Index('ix_players_player_id_date', 'player_id', 'date'),
+        db.Index('ix_players_team_id', 'team_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, nullable=True)  # 比赛日期
+    season = db.Column(db.SmallInteger, nullable=False, default=0, server_default='0')  # 赛季（年份），MySQL 下的分区键
     name = db.Column(db.String(100), nullable=True)  # 选手名
     pic = db.Column(db.String(255), nullable=True)  # 选手图片URL
     hero = db.Column(db.String(255), nullable=True)  # 英雄名
@@ -14,7 +22,7 @@ class Player(db.Model):
     kills = db.Column(db.Integer, nullable=True)  # 击杀数
     deaths = db.Column(db.Integer, nullable=True)  # 死亡数
     assists = db.Column(db.Integer, nullable=True)  # 助攻数
-    part = db.Column(db.String(20), nullable=True)  # 参团率
+    part = db.Column(db.Numeric(5, 2, asdecimal=False), nullable=True)  # 参团率（百分数，如 65.20）
     atk = db.Column(db.Integer, nullable=True)  # 总输出
     atk_p = db.Column(db.Integer, nullable=True)  # 输出占比
     atk_m = db.Column(db.Integer, nullable=True)  # 分均输出
@@ -27,13 +35,16 @@ class Player(db.Model):
     wp_m = db.Column(db.Integer, nullable=True)  # 分均插眼（待确认）
     hits = db.Column(db.Integer, nullable=True)  # 补刀数
     mvp = db.Column(db.Integer, nullable=True)  # 是否MVP（1/0）
-    beiguo = db.Column(db.String(100), nullable=True)  # 是否背锅（1/0）
+    beiguo = db.Column(db.SmallInteger, nullable=True)  # 是否背锅（1/0）
     team_name = db.Column(db.String(100), nullable=True)  # 战队名称
     position = db.Column(db.String(100), nullable=True)  # 选手位置（上单/打野等）
     game_time = db.Column(db.Integer, nullable=True)  # 比赛时间（秒）
-    result = db.Column(db.String(10), nullable=True)  # 比赛结果（胜/负）
+    result = db.Column(db.SmallInteger, nullable=True)  # 比赛结果（1 胜 0 负）
     #match_id = db.Column(db.Integer, db.ForeignKey('matches.match_id'))  # 定义外键约束
     match_id = db.Column(db.Integer)
+    player_id = db.Column(db.Integer, nullable=True)  # dim_players.id
+    team_id = db.Column(db.Integer, nullable=True)  # dim_teams.id
+    hero_id = db.Column(db.Integer, nullable=True)  # dim_heroes.id
 
     def save(self):
         db.session.add(self)
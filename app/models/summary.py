@@ -0,0 +1,60 @@
+# 汇总表模型：导入比赛时增量维护，接口直接读取，不再每次对 players/teams 全表 GROUP BY
+
+from app import db
+
+
+class PlayerSummary(db.Model):
+    __tablename__ = 'player_summary'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False, unique=True)  # 选手名
+    appearances = db.Column(db.Integer, nullable=False, default=0, index=True)  # 出场次数
+    wins = db.Column(db.Integer, nullable=False, default=0)  # 胜场
+    kills = db.Column(db.Integer, nullable=False, default=0)  # 击杀总数
+    deaths = db.Column(db.Integer, nullable=False, default=0)  # 死亡总数
+    assists = db.Column(db.Integer, nullable=False, default=0)  # 助攻总数
+    latest_date = db.Column(db.DateTime, nullable=True)  # 最近一场比赛日期
+    latest_team = db.Column(db.String(100), nullable=True, index=True)  # 最近一场比赛所在战队
+    latest_position = db.Column(db.String(100), nullable=True)  # 最近一场比赛的位置
+    latest_pic = db.Column(db.String(255), nullable=True)  # 最近一场比赛的头像
+
+    def __repr__(self):
+        return f"<PlayerSummary {self.name}>"
+
+
+class TeamSummary(db.Model):
+    __tablename__ = 'team_summary'
+
+    id = db.Column(db.Integer, primary_key=True)
+    team_name = db.Column(db.String(100), nullable=False, unique=True)  # 战队名
+    appearances = db.Column(db.Integer, nullable=False, default=0, index=True)  # 比赛场数
+    wins = db.Column(db.Integer, nullable=False, default=0)  # 胜场
+    kills = db.Column(db.Integer, nullable=False, default=0)  # 总击杀
+    deaths = db.Column(db.Integer, nullable=False, default=0)  # 总死亡
+    assists = db.Column(db.Integer, nullable=False, default=0)  # 总助攻
+    latest_date = db.Column(db.DateTime, nullable=True)  # 最近一场比赛日期
+
+    def __repr__(self):
+        return f"<TeamSummary {self.team_name}>"
+
+
+class DashboardSnapshot(db.Model):
+    __tablename__ = 'dashboard_snapshots'
+
+    name = db.Column(db.String(50), primary_key=True)  # 快照名，首页为 home
+    payload = db.Column(db.Text, nullable=False)  # JSON 格式的首页数据
+    updated_at = db.Column(db.DateTime, nullable=False)  # 计算时间
+
+    def __repr__(self):
+        return f"<DashboardSnapshot {self.name} {self.updated_at}>"
+
+
+class GlobalCounter(db.Model):
+    __tablename__ = 'global_counters'
+
+    name = db.Column(db.String(50), primary_key=True)  # matches / players / teams
+    value = db.Column(db.BigInteger, nullable=False, default=0)  # 当前计数
+    reconciled_at = db.Column(db.DateTime, nullable=True)  # 最近一次与明细表核对的时间
+
+    def __repr__(self):
+        return f"<GlobalCounter {self.name}={self.value}>"
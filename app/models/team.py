@@ -4,9 +4,15 @@ from app import db
 
 class Team(db.Model):
     __tablename__ = 'teams'
+    __table_args__ = (
+        db.Index('ix_teams_team_name_date', 'team_name', 'date'),  # 战队详情按时间倒序、战队统计
+        db.Index('ix_teams_match_id', 'match_id'),  # 比赛详情
+        db.Index('ix_teams_team_id_date', 'team_id', 'date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.DateTime, nullable=True)  # 比赛日期
+    season = db.Column(db.SmallInteger, nullable=False, default=0, server_default='0')  # 赛季（年份），MySQL 下的分区键
     team_name = db.Column(db.String(100), nullable=True)  # 队伍名
     team_flag = db.Column(db.String(100), nullable=True)  # 队伍旗帜
     result = db.Column(db.Integer, nullable=True)  # 获胜情况 0 失败，1 胜利
@@ -15,7 +21,7 @@ class Team(db.Model):
     death = db.Column(db.Integer, nullable=True)  # 总死亡
     assist = db.Column(db.Integer, nullable=True)  # 总助攻
     attack = db.Column(db.Integer, nullable=True)  # 总输出
-    money = db.Column(db.Float, nullable=True)  # 总经济
+    money = db.Column(db.Integer, nullable=True)  # 总经济
     tower = db.Column(db.Integer, nullable=True)  # 战队推塔
     small_dargon  = db.Column(db.Integer, nullable=True)  # 战队小龙
     big_dargon = db.Column(db.Integer, nullable=True)  # 战队大龙
@@ -38,6 +44,13 @@ class Team(db.Model):
     player_c_id = db.Column(db.String(100), nullable=True)  # 中单
     player_d_id = db.Column(db.String(100), nullable=True)  # ADC
     player_e_id = db.Column(db.String(100), nullable=True)  # 辅助
+    team_id = db.Column(db.Integer, nullable=True)  # dim_teams.id
+    # 五个位置选手对应的 dim_players.id（上面的 player_x_id 实际存的是选手名）
+    player_a_key = db.Column(db.Integer, nullable=True)
+    player_b_key = db.Column(db.Integer, nullable=True)
+    player_c_key = db.Column(db.Integer, nullable=True)
+    player_d_key = db.Column(db.Integer, nullable=True)
+    player_e_key = db.Column(db.Integer, nullable=True)
 
     def save(self):
         db.session.add(self)
@@ -1,9 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify
 from app import db
 from app.models.match import Match
-from app.models.player import Player
-from app.models.team import Team
-from sqlalchemy import func, desc, case, asc
+from app.services import dashboard
+from app.services import name_index
+from app.services import data_version
+from sqlalchemy import desc
 import openai
 import os
 from dotenv import load_dotenv
@@ -16,6 +17,11 @@ openai.api_key = os.getenv('DEEPSEEK_API_KEY')
 from . import main_bp
 from . import root_bp
 
+def _error(e):
+    # 出错时仍返回 200，由前端按 status 判断；这类响应不能带上数据版本被缓存
+    data_version.uncacheable()
+    return jsonify({'status': 'error', 'msg': str(e)})
+
 @root_bp.route('/')
 def home():
     return "请通过 Nginx 访问前端页面"
@@ -33,120 +39,79 @@ def recent_matches():
         } for m in recent]
         return jsonify({'matches': matches_data, 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
+
+# 首页看板：一次返回首页全部数据，读取导入结束后算好的快照
+@main_bp.route('/dashboard')
+def dashboard_snapshot():
+    try:
+        return jsonify({**dashboard.load_dashboard(), 'status': 'success'})
+    except Exception as e:
+        return _error(e)
 
 @main_bp.route('/stats')
 def stats():
     try:
-        match_count = db.session.query(Match).count()
-        # 修改职业选手数量统计逻辑，使用类似战队数量的去重统计方式
-        player_count = db.session.query(func.count(func.distinct(Player.name))).scalar()
-        # 修正战队数量统计逻辑，使用正确的模型字段
-        team_count = db.session.query(func.count(func.distinct(Team.team_name))).scalar()
-        
-        return jsonify({
-            'stats': {
-                'matches': match_count,
-                'players': player_count,
-                'teams': team_count
-            },
-            'status': 'success'
-        })
+        return jsonify({'stats': dashboard.global_stats(), 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
 
 @main_bp.route('/top-players')
 def top_players():
     try:
         # 获取参赛场次最多的选手TOP3
-        top_players = db.session.query(
-            Player.name,
-            func.count(Player.match_id).label('matches_count')
-        ).group_by(Player.name).order_by(desc('matches_count')).limit(3).all()
-        
-        players_data = [{
-            'name': player.name,
-            'matches_count': player.matches_count
-        } for player in top_players]
-        
-        return jsonify({'players': players_data, 'status': 'success'})
+        return jsonify({'players': dashboard.top_players(), 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
 
 @main_bp.route('/top-teams')
 def top_teams():
     try:
         # 获取胜率最高的战队TOP3（排除少于50场数据的战队）
-        team_stats = db.session.query(
-            Team.team_name,
-            func.count(Team.id).label('total_matches'),
-            func.sum(case((Team.result == 1, 1), else_=0)).label('wins')
-        ).group_by(Team.team_name).having(func.count(Team.id) >= 50).all()
-        
-        teams_with_win_rate = []
-        for team in team_stats:
-            win_rate = (team.wins / team.total_matches) * 100
-            teams_with_win_rate.append({
-                'team_name': team.team_name,
-                'win_rate': round(win_rate, 2)
-            })
-        
-        # 按胜率排序并取前3名
-        top_teams = sorted(teams_with_win_rate, key=lambda x: x['win_rate'], reverse=True)[:3]
-        
-        return jsonify({'teams': top_teams, 'status': 'success'})
+        return jsonify({'teams': dashboard.top_teams(), 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
 
 @main_bp.route('/fastest-matches')
 def fastest_matches():
     try:
         # 获取结束最快的战斗TOP3
-        fastest = db.session.query(Match).filter(Match.game_time.isnot(None)).order_by(asc(Match.game_time)).limit(3).all()
-        
-        matches_data = [{
-            'id': match.id,
-            'red_team_name': match.red_team_name,
-            'blue_team_name': match.blue_team_name,
-            'game_time': match.game_time
-        } for match in fastest]
-        
-        return jsonify({'matches': matches_data, 'status': 'success'})
+        return jsonify({'matches': dashboard.fastest_matches(), 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
 
 # 添加最长比赛时间的TOP3
 @main_bp.route('/longest-matches')
 def longest_matches():
     try:
         # 获取结束最慢的战斗TOP3
-        longest = db.session.query(Match).filter(Match.game_time.isnot(None)).order_by(desc(Match.game_time)).limit(3).all()
-        
-        matches_data = [{
-            'id': match.id,
-            'red_team_name': match.red_team_name,
-            'blue_team_name': match.blue_team_name,
-            'game_time': match.game_time
-        } for match in longest]
-        
-        return jsonify({'matches': matches_data, 'status': 'success'})
+        return jsonify({'matches': dashboard.longest_matches(), 'status': 'success'})
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
 
 # 添加单场击杀最多的三名选手
 @main_bp.route('/top-kills')
 def top_kills():
     try:
         # 获取单场击杀数最高的TOP3选手
-        top_killers = db.session.query(Player).filter(Player.kills.isnot(None)).order_by(desc(Player.kills)).limit(3).all()
-        
-        players_data = [{
-            'name': player.name,
-            'hero': player.hero,
-            'kills': player.kills,
-            'team_name': player.team_name
-        } for player in top_killers]
-        
-        return jsonify({'players': players_data, 'status': 'success'})
+        return jsonify({'players': dashboard.top_kills(), 'status': 'success'})
+    except Exception as e:
+        return _error(e)
+
+# 选手/战队名称联想，供搜索框输入时调用
+@main_bp.route('/search/suggest')
+def search_suggest():
+    try:
+        q = request.args.get('q', '', type=str).strip()
+        kind = request.args.get('type', 'all', type=str)
+        limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+        if not q:
+            return jsonify({'players': [], 'teams': [], 'status': 'success'})
+
+        return jsonify({
+            'players': name_index.players.suggest(q, limit) if kind in ('all', 'player') else [],
+            'teams': name_index.teams.suggest(q, limit) if kind in ('all', 'team') else [],
+            'status': 'success'
+        })
     except Exception as e:
-        return jsonify({'status': 'error', 'msg': str(e)})
+        return _error(e)
@@ -1,11 +1,24 @@
 from flask import Blueprint, render_template, request, jsonify
+from datetime import datetime, timedelta
 from app.models.match import Match
 from app.models.player import Player
 from app.models.team import Team
-from datetime import datetime
+from app.services.partitions import month_range
+from app.services.pagination import keyset_paginate, count_key
+from app.services import name_index
+from app.services.data_version import cache_immutable
+from config import SEARCH_MAX_IDS, REFRESH_DAYS, MATCH_IMMUTABLE_MAX_AGE
 
 match_bp = Blueprint("match", __name__, url_prefix='/match')
 
+def _team_condition(term):
+    """战队名模糊匹配：先用名称索引找出战队ID，再走红/蓝方ID索引；命中的战队过多时退回 LIKE"""
+    team_ids = list(name_index.teams.search(term))
+    if len(team_ids) > SEARCH_MAX_IDS:
+        return Match.red_team_name.ilike(f'%{term}%') | Match.blue_team_name.ilike(f'%{term}%')
+    return Match.red_team_id.in_(team_ids) | Match.blue_team_id.in_(team_ids)
+
+
 # 主体比赛页面，可以筛选某日期内确定战队交手情况
 @match_bp.route('/api/list', methods=['GET'])
 def get_matches():
@@ -14,44 +27,33 @@ def get_matches():
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
     page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')  # 上一页返回的 next_cursor，有游标时不再使用 OFFSET
+    with_count = request.args.get('count', '1') != '0'  # count=0 时不统计总数
 
     query = Match.query # SQLAlchemy 模型类，对应数据库的matches表
 
     # 如果提供了战队1名称
     if team_name1:
-        query = query.filter(
-            (Match.red_team_name.ilike(f'%{team_name1}%')) | (Match.blue_team_name.ilike(f'%{team_name1}%'))
-        )
+        query = query.filter(_team_condition(team_name1))
 
     # 如果提供了战队2名称
     if team_name2:
-        query = query.filter(
-            (Match.red_team_name.ilike(f'%{team_name2}%')) | (Match.blue_team_name.ilike(f'%{team_name2}%'))
-        )
-
-    # ✅ 处理开始时间（YYYY-MM）格式
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m")
-            query = query.filter(Match.date >= start_date)
-        except ValueError:
-            pass  # 可以打印日志或返回错误提示
-
-    # ✅ 处理结束时间（加上一个月的开头）
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, "%Y-%m")
-            # 设置为下个月的1号，以包含完整的月份
-            if end_date.month == 12:
-                end_date = end_date.replace(year=end_date.year + 1, month=1)
-            else:
-                end_date = end_date.replace(month=end_date.month + 1)
-            query = query.filter(Match.date < end_date)
-        except ValueError:
-            pass
-
-    query = query.order_by(Match.date.desc())
-    matches = query.paginate(page=page, per_page=20, error_out=False)
+        query = query.filter(_team_condition(team_name2))
+
+    # 处理起止月份（YYYY-MM），结束月份包含整月
+    start_date, end_date = month_range(start_date_str, end_date_str)
+    if start_date:
+        query = query.filter(Match.date >= start_date)
+    if end_date:
+        query = query.filter(Match.date < end_date)
+
+    # 按 (date, id) 降序做游标分页，ix_matches_date 索引本身就包含主键
+    matches = keyset_paginate(
+        query, [(Match.date, 'date', True), (Match.id, 'id', True)], per_page=20, cursor=cursor, page=page,
+        count_key=count_key('matches', team_name1=team_name1, team_name2=team_name2,
+                            start_date=start_date_str, end_date=end_date_str),
+        with_count=with_count
+    )
 
     if not matches.items:
         return jsonify({'error': '没有找到符合条件的比赛数据'}), 404
@@ -75,14 +77,7 @@ def get_matches():
 
     return jsonify({
         'matches': matches_data,
-        'pagination': {
-            'page': matches.page,
-            'pages': matches.pages,
-            'has_prev': matches.has_prev,
-            'has_next': matches.has_next,
-            'prev_num': matches.prev_num,
-            'next_num': matches.next_num
-        }
+        'pagination': matches.to_dict()
     })
 
 
@@ -174,9 +169,13 @@ def get_match(match_id):
         'elder': blue_team.elder
     } if blue_team else None
 
-    return jsonify({
+    response = jsonify({
         'match': match_data,
         'players': players_data,
         'red_team': red_team_data,
         'blue_team': blue_team_data
     })
+    # 超出刷新窗口的比赛不会再被上游修正，允许浏览器长期缓存
+    if match.date and match.date < datetime.now() - timedelta(days=REFRESH_DAYS):
+        cache_immutable(response, MATCH_IMMUTABLE_MAX_AGE)
+    return response
@@ -1,10 +1,13 @@
 from flask import Blueprint, render_template, request, jsonify
 from app.models.player import Player
-from app.models.match import Match
-from app.models.team import Team
-from sqlalchemy import func
-from sqlalchemy.orm import aliased
+from app.models.dimension import DimPlayer
+from app.models.summary import PlayerSummary
+from app.services.partitions import month_range, date_range
+from app.services.pagination import keyset_paginate, count_key
+from app.services import name_index
 from app import db
+from sqlalchemy import func, case, extract
+from config import PLAYER_HISTORY_PAGE_SIZE, PLAYER_HISTORY_MAX_PAGE_SIZE
 
 player_bp = Blueprint("player", __name__, url_prefix='/player')
 
@@ -16,53 +19,39 @@ def get_players():
     position = request.args.get('position')    # 筛选条件：分路
     player_name = request.args.get('player_name')  # 筛选条件：选手名称
     page = request.args.get('page', 1, type=int)  # 分页，默认为第1页
+    cursor = request.args.get('cursor')  # 上一页返回的 next_cursor
+    with_count = request.args.get('count', '1') != '0'  # count=0 时不统计总数
 
-    # 子查询：计算每个选手的出场次数和最近比赛时间
-    player_stats_subquery = (
-        db.session.query(
-            Player.name.label("name"),
-            func.count(Player.name).label("appearance_count"),
-            func.max(Player.date).label("latest_date")
-        )
-        .group_by(Player.name)
-        .subquery()
-    )
-
-    # 主查询：获取选手名、头像、最近战队和分路，以及出场次数
-    PlayerAlias = aliased(Player)
+    # 直接读取导入时维护的选手汇总表（最近一场的战队、分路、头像和出场次数），每页只需一次索引扫描
     query = db.session.query(
-        PlayerAlias.name,
-        PlayerAlias.pic,
-        PlayerAlias.team_name,
-        PlayerAlias.position,
-        player_stats_subquery.c.latest_date,  # 添加最新比赛时间
-        player_stats_subquery.c.appearance_count  # 添加出场次数
-    ).join(
-        player_stats_subquery,
-        (PlayerAlias.name == player_stats_subquery.c.name) &
-        (PlayerAlias.date == player_stats_subquery.c.latest_date)
-    )
-
-    # 根据战队名进行筛选
+        PlayerSummary.id,
+        PlayerSummary.name,
+        PlayerSummary.latest_pic.label('pic'),
+        PlayerSummary.latest_team.label('team_name'),
+        PlayerSummary.latest_position.label('position'),
+        PlayerSummary.latest_date,
+        PlayerSummary.appearances.label('appearance_count')
+    ).filter(PlayerSummary.appearances > 0)  # 比赛被删除后可能留下出场为 0 的旧汇总行
+
+    # 根据战队名进行筛选：名称索引先找出匹配的战队，再按索引列精确匹配
     if team_name:
-        query = query.filter(PlayerAlias.team_name.ilike(f'%{team_name}%'))
+        query = query.filter(name_index.name_filter(name_index.teams, PlayerSummary.latest_team, team_name))
 
     # 根据分路进行筛选
     if position:
-        query = query.filter(PlayerAlias.position.ilike(f'%{position}%'))
+        query = query.filter(PlayerSummary.latest_position.ilike(f'%{position}%'))
         
     # 根据选手名称进行筛选
     if player_name:
-        query = query.filter(PlayerAlias.name.ilike(f'%{player_name}%'))
-
-    # 去重，避免重复的选手
-    query = query.distinct()
-
-    # 按照出场次数降序排列，优先展示出场次数多的选手
-    query = query.order_by(player_stats_subquery.c.appearance_count.desc())
-
-    # 分页
-    players = query.paginate(page=page, per_page=24, error_out=False)
+        query = query.filter(name_index.name_filter(name_index.players, PlayerSummary.name, player_name))
+
+    # 按照出场次数降序排列，优先展示出场次数多的选手；按 (出场次数, id) 做游标分页
+    players = keyset_paginate(
+        query, [(PlayerSummary.appearances, 'appearance_count', True), (PlayerSummary.id, 'id', True)],
+        per_page=24, cursor=cursor, page=page,
+        count_key=count_key('players', team_name=team_name, position=position, player_name=player_name),
+        with_count=with_count
+    )
 
     # 构造返回数据
     players_data = []
@@ -78,59 +67,11 @@ def get_players():
 
     return jsonify({
         'players': players_data,
-        'pagination': {
-            'page': players.page,
-            'pages': players.pages,
-            'has_prev': players.has_prev,
-            'has_next': players.has_next,
-            'prev_num': players.prev_num,
-            'next_num': players.next_num
-        }
+        'pagination': players.to_dict()
     })
 
-@player_bp.route('/api/<string:name>', methods=['GET'])
-def get_player_matches(name):
-    from urllib.parse import unquote
-    name = unquote(name)
-
-    # 查询该选手所有比赛记录
-    players = Player.query.filter_by(name=name).all()
-    if not players:
-        return jsonify({'error': '该玩家未收录'}), 404
-
-    # 提取所有比赛ID
-    match_ids = list(set(p.match_id for p in players))
-
-    # 查询所有比赛和战队数据
-    matches = Match.query.filter(Match.match_id.in_(match_ids)).order_by(Match.date.desc()).all()
-    teams = Team.query.filter(Team.match_id.in_(match_ids)).all()
-
-    # 构造比赛列表
-    matches_data = [{
-        'match_id': m.match_id,
-        'date': m.date.strftime('%Y-%m-%d') if m.date else None,
-        'game_time': m.game_time,
-        'red_team_name': m.red_team_name,
-        'blue_team_name': m.blue_team_name,
-        'win_team_name': m.win_team_name,
-        'mvp': m.mvp
-    } for m in matches]
-
-    # 构造战队列表
-    teams_data = [{
-        'match_id': t.match_id,
-        'team_name': t.team_name,
-        'team_flag': t.team_flag,
-        'result': t.result,
-        'kill': t.kill,
-        'death': t.death,
-        'assist': t.assist,
-        'money': t.money,
-        'tower': t.tower
-    } for t in teams]
-
-    # 构造选手比赛数据列表
-    players_data = [{
+def _history_row(p):
+    return {
         'date': p.date.strftime('%Y-%m-%d') if p.date else None,
         'hero': p.hero,
         'hero_lv': p.hero_lv,
@@ -151,37 +92,129 @@ def get_player_matches(name):
         'position': p.position,
         'pic': p.pic,
         'match_id': p.match_id
-    } for p in players]
+    }
 
-    total_matches = len(players_data)
-    if total_matches == 0:
-        return jsonify({'error': '该玩家暂无比赛数据'}), 404
 
-    # 计算胜率（result字段为 '1' 表示胜利）
-    win_count = sum(1 for p in players_data if p['result'] == '1')
-    win_rate = round(win_count / total_matches * 100, 1)
+def _history_page(conditions, per_page, cursor=None):
+    """比赛记录按 (日期, id) 倒序游标分页"""
+    return keyset_paginate(
+        Player.query.filter(*conditions),
+        [(Player.date, 'date', True), (Player.id, 'id', True)],
+        per_page=per_page, cursor=cursor, with_count=False
+    )
+
+
+CAREER_FIELDS = ('total', 'wins', 'kills', 'deaths', 'assists', 'money', 'atk_m', 'def_m')
+
+
+def _career_stats(conditions):
+    """
+    用一条分组查询读一遍选手的比赛记录，按 (年, 月, 位置, 英雄) 分组后在这里合并出
+    生涯合计、按出场次数排序的位置、英雄池大小和按季度的场均 KDA（单场 KDA 为 (击杀+助攻)/max(1, 死亡)）
+    """
+    kda = (func.coalesce(Player.kills, 0) + func.coalesce(Player.assists, 0)) * 1.0 / case(
+        (Player.deaths > 1, Player.deaths), else_=1
+    )
+    rows = db.session.query(
+        extract('year', Player.date).label('year'),
+        extract('month', Player.date).label('month'),
+        Player.position,
+        Player.hero_id,
+        func.count(Player.id).label('total'),
+        func.sum(case((Player.result == 1, 1), else_=0)).label('wins'),
+        func.sum(func.coalesce(Player.kills, 0)).label('kills'),
+        func.sum(func.coalesce(Player.deaths, 0)).label('deaths'),
+        func.sum(func.coalesce(Player.assists, 0)).label('assists'),
+        func.sum(func.coalesce(Player.money, 0)).label('money'),
+        func.sum(func.coalesce(Player.atk_m, 0)).label('atk_m'),
+        func.sum(func.coalesce(Player.def_m, 0)).label('def_m'),
+        func.sum(kda).label('kda')
+    ).filter(*conditions).group_by('year', 'month', Player.position, Player.hero_id)
+
+    totals = dict.fromkeys(CAREER_FIELDS, 0)
+    positions, heroes, quarters = {}, set(), {}
+    for row in rows:
+        for field in CAREER_FIELDS:
+            totals[field] += getattr(row, field) or 0
+        if row.position:
+            positions[row.position] = positions.get(row.position, 0) + row.total
+        if row.hero_id is not None:
+            heroes.add(row.hero_id)
+        if row.year is not None:
+            key = f"{int(row.year)} Q{(int(row.month) - 1) // 3 + 1}"
+            quarter = quarters.setdefault(key, [0.0, 0])
+            quarter[0] += float(row.kda or 0)
+            quarter[1] += row.total
+
+    return {
+        'totals': totals,
+        'positions': sorted(positions, key=lambda position: (-positions[position], position)),
+        'hero_pool': len(heroes),
+        'kda_trend': [{'label': key, 'kda': round(quarters[key][0] / quarters[key][1], 2)} for key in sorted(quarters)]
+    }
+
+
+@player_bp.route('/api/<string:name>', methods=['GET'])
+def get_player_matches(name):
+    from urllib.parse import unquote
+    name = unquote(name)
+    cursor = request.args.get('cursor')  # 上一页比赛记录返回的 next_cursor
+    per_page = min(max(request.args.get('per_page', PLAYER_HISTORY_PAGE_SIZE, type=int), 1), PLAYER_HISTORY_MAX_PAGE_SIZE)
+
+    # 先把选手名解析为维度ID，再按整数ID查询该选手的比赛记录
+    dim_player = DimPlayer.query.filter_by(name=name).first()
+    if not dim_player:
+        return jsonify({'error': '该玩家未收录'}), 404
+    # 可选的起止月份（YYYY-MM），带上赛季条件后只扫描相关分区
+    start, end = month_range(request.args.get('start_date'), request.args.get('end_date'))
+    conditions = [Player.player_id == dim_player.id, *date_range(Player, start, end)]
+
+    # 翻页请求只返回下一页比赛记录，生涯数据沿用第一页的结果；
+    # 游标不携带页码，这里只返回下一页的游标，不返回 page/has_prev 等字段
+    if cursor:
+        history = _history_page(conditions, per_page, cursor)
+        return jsonify({
+            'players': [_history_row(p) for p in history.items],
+            'pagination': {'per_page': per_page, 'has_next': history.has_next, 'next_cursor': history.next_cursor}
+        })
 
-    # 计算KDA均值，防止除零
-    avg_kills = round(sum(p['kills'] for p in players_data) / total_matches, 1)
-    avg_deaths = round(sum(p['deaths'] for p in players_data) / total_matches, 1)
-    avg_assists = round(sum(p['assists'] for p in players_data) / total_matches, 1)
+    # 位置、英雄池、KDA 趋势和经济/输出/承伤合计由一条分组查询算出；不限日期时出场、胜场和 KDA 合计
+    # 直接取导入时维护的选手汇总表，与选手列表的数字一致
+    career = _career_stats(conditions)
+    totals = career['totals']
+    summary = None
+    if not start and not end:
+        summary = PlayerSummary.query.filter(PlayerSummary.name == name).first()
+    if summary is not None and summary.appearances > 0:
+        totals.update({'total': summary.appearances, 'wins': summary.wins, 'kills': summary.kills,
+                       'deaths': summary.deaths, 'assists': summary.assists})
+
+    total_matches = totals['total']
+    if total_matches == 0:
+        return jsonify({'error': '该玩家暂无比赛数据'}), 404
 
-    # 计算经济均值和攻击防御相关均值
-    avg_money = round(sum(p['money'] for p in players_data if p['money']) / total_matches, 1)
-    avg_atk_m = round(sum(p['atk_m'] for p in players_data if p['atk_m']) / total_matches, 1)
-    avg_def_m = round(sum(p['def_m'] for p in players_data if p['def_m']) / total_matches, 1)
+    def average(value):
+        return round(float(value or 0) / total_matches, 1)
 
-    # 统计不同英雄数量（去重）
-    hero_pool = len(set(p['hero'] for p in players_data if p['hero']))
+    win_rate = round((totals['wins'] or 0) / total_matches * 100, 1)
+    avg_kills, avg_deaths, avg_assists = average(totals['kills']), average(totals['deaths']), average(totals['assists'])
+    avg_money, avg_atk_m, avg_def_m = average(totals['money']), average(totals['atk_m']), average(totals['def_m'])
+    hero_pool = career['hero_pool']
 
     # 选手位置取最常见位置
-    from collections import Counter
-    positions = [p['position'] for p in players_data if p['position']]
-    position_counter = Counter(positions)
-    main_position = position_counter.most_common(1)[0][0] if positions else '未知'
+    main_position = career['positions'][0] if career['positions'] else '未知'
 
-    # 选手头像，取最近比赛的
-    pic = next((p['pic'] for p in sorted(players_data, key=lambda x: x['date'], reverse=True) if p['pic']), '')
+    # 选手头像取最近一场的：不限日期时直接读汇总表，否则取区间内最近一条带头像的记录
+    pic = summary.latest_pic if summary is not None else None
+    if not pic:
+        pic = db.session.query(Player.pic).filter(
+            *conditions, Player.pic.isnot(None), Player.pic != ''
+        ).order_by(Player.date.desc()).limit(1).scalar()
+
+    history = _history_page(conditions, per_page)
+    pagination = history.to_dict()
+    pagination['total'] = total_matches
+    pagination['pages'] = max(1, -(-total_matches // per_page))
 
     # 生成选手简介
     bio = (
@@ -193,20 +226,21 @@ def get_player_matches(name):
 
     return jsonify({
         'name': name,
-        'pic': pic,
+        'pic': pic or '',
         'main_position': main_position,
-        'players': players_data,
-        'matches': matches_data,
-        'teams': teams_data,
+        'players': [_history_row(p) for p in history.items],
+        'pagination': pagination,
         'stats': {
             'totalMatches': total_matches,
+            'wins': int(totals['wins'] or 0),
             'winRate': win_rate,
             'avgKDA': f"{avg_kills}/{avg_deaths}/{avg_assists}",
             'avgMoney': avg_money,
             'avgAtkM': avg_atk_m,
             'avgDefM': avg_def_m,
             'heroPool': hero_pool,
-            'positions': list(position_counter.keys())
+            'positions': career['positions'],
+            'kdaTrend': career['kda_trend']
         },
         'bio': bio
     })
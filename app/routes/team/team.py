@@ -1,9 +1,9 @@
 from flask import Blueprint, render_template, request, jsonify
-from app.models.player import Player
-from app.models.match import Match
-from app.models.team import Team
-from sqlalchemy import func
-from sqlalchemy.orm import aliased
+from app.models.summary import TeamSummary
+from app.models.dimension import DimTeam
+from app.services.pagination import keyset_paginate, count_key
+from app.services import name_index
+from app.services import rosters
 from app import db
 
 
@@ -15,65 +15,35 @@ def distinct_teams():
     try:
         page = request.args.get('page', 1, type=int)
         team_name = request.args.get('team_name', '', type=str).strip()
+        cursor = request.args.get('cursor')  # 上一页返回的 next_cursor
+        with_count = request.args.get('count', '1') != '0'  # count=0 时不统计总数
 
-        # 计算每个战队的比赛场数
-        team_match_counts = db.session.query(
-            Team.team_name,
-            func.count(Team.team_name).label('match_count')
-        ).filter(Team.team_name.isnot(None))
-        
-        if team_name:
-            team_match_counts = team_match_counts.filter(Team.team_name.ilike(f'%{team_name}%'))
-        
-        team_match_counts = team_match_counts.group_by(Team.team_name).subquery()
-        
-        # 查询不重复的战队名，并按比赛场数排序
+        # 直接读取战队汇总表，按比赛场数排序
         query = db.session.query(
-            team_match_counts.c.team_name,
-            team_match_counts.c.match_count
-        ).order_by(team_match_counts.c.match_count.desc())
-        
-        # 分页
-        pagination = query.paginate(page=page, per_page=20, error_out=False)
-        
-        # 获取所有队伍名称
-        team_names = [team.team_name for team in pagination.items]
-        
-        # 为所有队伍名称查询最新的记录
-        latest_teams = db.session.query(Team.team_name, func.max(Team.date).label('max_date')).\
-            filter(Team.team_name.in_(team_names)).\
-            group_by(Team.team_name).subquery()
-        
-        # 获取每个队伍最新记录的详细信息
-        team_objects = db.session.query(Team.id, Team.team_name).\
-            join(latest_teams, 
-                 (Team.team_name == latest_teams.c.team_name) & 
-                 (Team.date == latest_teams.c.max_date)).all()
-        
-        # 创建映射字典
-        team_dict = {team.team_name: team.id for team in team_objects}
+            TeamSummary.id, TeamSummary.team_name, TeamSummary.appearances, TeamSummary.latest_date
+        ).filter(TeamSummary.appearances > 0)
+
+        if team_name:
+            # 名称索引先找出匹配的战队，再按唯一索引精确匹配
+            query = query.filter(name_index.name_filter(name_index.teams, TeamSummary.team_name, team_name))
+
+        # 按 (比赛场数, id) 降序做游标分页，总数在进程内缓存，翻页时不再重复统计
+        pagination = keyset_paginate(
+            query, [(TeamSummary.appearances, 'appearances', True), (TeamSummary.id, 'id', True)],
+            per_page=20, cursor=cursor, page=page,
+            count_key=count_key('teams', team_name=team_name), with_count=with_count
+        )
 
-        # 创建team_name到match_count的映射
-        match_count_dict = {item.team_name: item.match_count for item in pagination.items}
-        
-        teams_data = []
-        for team_name in team_names:
-            teams_data.append({
-                'id': team_dict.get(team_name),
-                'team_name': team_name,
-                'match_count': match_count_dict.get(team_name, 0)
-            })
+        teams_data = [{
+            'id': team.id,
+            'team_name': team.team_name,
+            'match_count': team.appearances,
+            'latest_date': team.latest_date.strftime('%Y-%m-%d') if team.latest_date else None
+        } for team in pagination.items]
 
         return jsonify({
             'teams': teams_data,
-            'pagination': {
-                'page': pagination.page,
-                'pages': pagination.pages,
-                'has_prev': pagination.has_prev,
-                'has_next': pagination.has_next,
-                'prev_num': pagination.prev_num,
-                'next_num': pagination.next_num
-            }
+            'pagination': pagination.to_dict()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -86,38 +56,23 @@ def team_detail(team_name):
         from urllib.parse import unquote
         team_name = unquote(team_name)
 
-        team_records = Team.query.filter(Team.team_name == team_name).order_by(Team.date.desc()).all()
-        if not team_records:
+        # 场次和胜场直接读汇总表，同一条查询带出维度ID；阵容走缓存，不再读取战队的全部比赛记录
+        team = db.session.query(
+            TeamSummary.appearances, TeamSummary.wins, DimTeam.id.label('team_id')
+        ).outerjoin(DimTeam, DimTeam.name == TeamSummary.team_name).filter(
+            TeamSummary.team_name == team_name
+        ).first()
+        if not team or not team.appearances:
             return jsonify({'error': '战队不存在'}), 404
 
-        matches_count = len(team_records)
-        wins = sum(1 for record in team_records if record.result == 1)
-        win_rate = round((wins / matches_count) * 100, 2) if matches_count > 0 else 0
-
-        # 取最近一场比赛的选手信息
-        latest_team = team_records[0]
-        position_map = {
-            'player_a_id': '上单',
-            'player_b_id': '打野',
-            'player_c_id': '中单',
-            'player_d_id': '射手',
-            'player_e_id': '辅助'
-        }
-
-        players = []
-        for field, pos in position_map.items():
-            player_name = getattr(latest_team, field)
-            if player_name:
-                players.append({
-                    'player_name': player_name,
-                    'position': pos
-                })
+        matches_count = team.appearances
+        win_rate = round((team.wins / matches_count) * 100, 2)
 
         team_info = {
             'team_name': team_name,
             'matches_count': matches_count,
             'win_rate': win_rate,
-            'players': players
+            'players': rosters.current_roster(team.team_id) if team.team_id else []
         }
         return jsonify(team_info)
     except Exception as e:
@@ -197,6 +197,7 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
         1. players表 (存储选手数据):
            - id: INT (主键)
            - date: DATETIME (比赛日期)
+           - season: SMALLINT (比赛年份，分区键；按日期筛选时同时加上 season 条件更快)
            - name: VARCHAR (选手名)
            - pic: VARCHAR (选手图片URL)
            - hero: VARCHAR (英雄名)
@@ -205,7 +206,7 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
            - kills: INT (击杀数)
            - deaths: INT (死亡数)
            - assists: INT (助攻数)
-           - part: VARCHAR (参团率)
+           - part: DECIMAL(5,2) (参团率，百分数，如 65.5 表示 65.5%)
            - atk: INT (总输出)
            - atk_p: INT (输出占比)
            - atk_m: INT (分均输出)
@@ -218,11 +219,11 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
            - wp_m: INT (分均插眼)
            - hits: INT (补刀数)
            - mvp: INT (是否MVP，1/0)
-           - beiguo: VARCHAR (是否背锅，1/0)
+           - beiguo: SMALLINT (是否背锅，1/0)
            - team_name: VARCHAR (所属队伍名)
            - position: VARCHAR (选手位置，abcde分别对应上单打野中单射手辅助)
            - game_time: INT (比赛时间，秒)
-           - result: VARCHAR (比赛结果，result字段为 '1' 表示胜利)
+           - result: SMALLINT (比赛结果，1=胜利，0=失败)
            - match_id: INT (比赛ID, 关联matches表)
 
         2. matches表 (存储比赛数据):
@@ -237,6 +238,7 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
         3. teams 表（存储队伍数据）:
            - id: INT (主键)
            - date: DATETIME (比赛日期)
+           - season: SMALLINT (比赛年份，分区键)
            - team_name: VARCHAR(100) (队伍名)
            - team_flag: VARCHAR(100) (队伍旗帜)
            - result: INT (比赛结果，0=失败，1=胜利)
@@ -245,7 +247,7 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
            - death: INT (总死亡数)
            - assist: INT (总助攻数)
            - attack: INT (总输出)
-           - money: FLOAT (总经济)
+           - money: INT (总经济)
            - tower: INT (推塔数)
            - small_dargon: INT (击杀小龙数)
            - big_dargon: INT (击杀大龙数)
@@ -396,7 +398,8 @@ def run_ai_query(user_prompt: str, request_id: str = None, user_name: str = "未
 
         try:
             logger.info(f"[请求ID: {request_id}] 正在执行SQL查询...")
-            with db.engine.connect().execution_options(timeout=SQL_TIMEOUT) as connection:
+            # 使用独立的 ai 连接池，慢查询不会占用接口的连接
+            with db.engines['ai'].connect().execution_options(timeout=SQL_TIMEOUT) as connection:
                 query_result = connection.execute(text(sql_query))
                 column_names = query_result.keys() if hasattr(query_result, 'keys') else []
                 result = query_result.fetchall()
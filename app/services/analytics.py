@@ -0,0 +1,202 @@
+# 列式分析快照：导入结束后把 matches/players/teams 导出为按赛季分区的 Parquet，
+# 排行榜、全局统计等聚合接口用 DuckDB 直接在快照上计算，不再对 MySQL 做全表 GROUP BY
+#
+# 需要可选依赖 duckdb 和 pyarrow，并在 .env 中设置 ANALYTICS_DIR；未满足时接口照常查询数据库。
+
+import os
+import shutil
+import decimal
+import threading
+from datetime import datetime
+
+try:
+    import duckdb
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+except ImportError:
+    duckdb = None
+    pa = None
+
+from sqlalchemy import select
+
+from app import db
+from app.models.match import Match
+from app.models.player import Player
+from app.models.team import Team
+from app.services.partitions import season_of
+from config import ANALYTICS_DIR, ANALYTICS_KEEP_SNAPSHOTS
+
+TABLES = {'matches': Match, 'players': Player, 'teams': Team}
+
+# 导出时每次从数据库读取的行数
+EXPORT_CHUNK = 100000
+
+# 指向当前快照目录的文件，导出完成后原子替换
+CURRENT_FILE = 'CURRENT'
+
+
+def analytics_enabled(analytics_dir=None):
+    return duckdb is not None and bool(analytics_dir or ANALYTICS_DIR)
+
+
+def _arrow_type(column):
+    python_type = column.type.python_type
+    if python_type is int:
+        return pa.int64()
+    if python_type in (float, decimal.Decimal):
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp('s')
+    return pa.string()
+
+
+def _schema(model, with_season):
+    fields = [pa.field(column.name, _arrow_type(column)) for column in model.__table__.columns]
+    if with_season:
+        fields.append(pa.field('season', pa.int64()))
+    return pa.schema(fields)
+
+
+def export_engine():
+    """导出使用的连接池：不限制单条查询执行时间的 export，未配置时用默认的写连接池"""
+    return db.engines.get('export', db.engine)
+
+
+def _batches(model, schema, with_season):
+    """按块流式读取整张表并转换为 Arrow RecordBatch"""
+    columns = [column.name for column in model.__table__.columns]
+    date_index = columns.index('date')
+    with export_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_CHUNK).execute(
+            select(model.__table__)
+        )
+        for rows in result.partitions():
+            data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+            if with_season:
+                data['season'] = [season_of(row[date_index]) for row in rows]
+            yield pa.RecordBatch.from_pydict(data, schema=schema)
+
+
+def export_snapshot(analytics_dir=None):
+    """
+    导出一份新的快照，返回快照目录
+
+    每张表写到 {analytics_dir}/snapshot_{时间}/{表名}/season=xxxx/*.parquet，全部写完后才更新 CURRENT，
+    查询方始终看到完整的快照；只保留最近 ANALYTICS_KEEP_SNAPSHOTS 份。
+    """
+    analytics_dir = analytics_dir or ANALYTICS_DIR
+    snapshot = os.path.join(analytics_dir, datetime.now().strftime('snapshot_%Y%m%d%H%M%S'))
+    for name, model in TABLES.items():
+        # matches 没有 season 列，导出时按比赛日期补上，三张表使用同样的分区方式
+        with_season = 'season' not in model.__table__.columns
+        schema = _schema(model, with_season)
+        pa_dataset.write_dataset(
+            _batches(model, schema, with_season), os.path.join(snapshot, name), schema=schema,
+            format='parquet', partitioning=['season'], partitioning_flavor='hive',
+            existing_data_behavior='overwrite_or_ignore'
+        )
+
+    tmp_path = os.path.join(analytics_dir, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(os.path.basename(snapshot))
+    os.replace(tmp_path, os.path.join(analytics_dir, CURRENT_FILE))
+
+    snapshots = sorted(entry for entry in os.listdir(analytics_dir) if entry.startswith('snapshot_'))
+    for old in snapshots[:-max(1, ANALYTICS_KEEP_SNAPSHOTS)]:
+        shutil.rmtree(os.path.join(analytics_dir, old), ignore_errors=True)
+    return snapshot
+
+
+def current_snapshot(analytics_dir=None):
+    """返回当前快照目录，还没有导出过时返回 None"""
+    analytics_dir = analytics_dir or ANALYTICS_DIR
+    try:
+        with open(os.path.join(analytics_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            snapshot = os.path.join(analytics_dir, f.read().strip())
+    except OSError:
+        return None
+    return snapshot if os.path.isdir(snapshot) else None
+
+
+class AnalyticsStore:
+    """
+    在当前快照上执行只读 SQL
+
+    DuckDB 连接按快照复用，三张表注册为视图；每次查询使用独立的 cursor，可在多线程中使用。
+    CURRENT 变化后自动切换到新快照。
+    """
+
+    def __init__(self, analytics_dir=None):
+        self.analytics_dir = analytics_dir
+        self._snapshot = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        snapshot = current_snapshot(self.analytics_dir)
+        if snapshot is None:
+            return None
+        with self._lock:
+            if snapshot != self._snapshot:
+                conn = duckdb.connect()
+                for name in TABLES:
+                    pattern = os.path.join(snapshot, name, '**', '*.parquet').replace("'", "''")
+                    conn.execute(
+                        f"CREATE VIEW {name} AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true)"
+                    )
+                # 旧连接不主动关闭，其他线程可能还在用它的 cursor
+                self._snapshot, self._conn = snapshot, conn
+            return self._conn.cursor()
+
+    def query(self, sql, params=None):
+        """执行查询并返回 [dict]，没有可用快照或查询失败时返回 None"""
+        try:
+            cursor = self._connection()
+            if cursor is None:
+                return None
+            try:
+                cursor.execute(sql, params or [])
+                columns = [column[0] for column in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        except duckdb.Error as e:
+            # 快照损坏或为空时退回查询数据库
+            print(f"分析快照查询失败，改为查询数据库。错误信息: {e}")
+            return None
+
+
+_store = AnalyticsStore()
+
+
+def top_players(limit=3):
+    """出场次数最多的选手"""
+    if not analytics_enabled():
+        return None
+    return _store.query(
+        "SELECT name, COUNT(*) AS matches_count FROM players WHERE name IS NOT NULL "
+        "GROUP BY name ORDER BY matches_count DESC LIMIT ?", [limit]
+    )
+
+
+def top_teams(min_matches=50, limit=3):
+    """胜率最高的战队，场次少于 min_matches 的不参与排名"""
+    if not analytics_enabled():
+        return None
+    return _store.query(
+        "SELECT team_name, SUM(CASE WHEN result = 1 THEN 1 ELSE 0 END) * 100.0 / COUNT(*) AS win_rate "
+        "FROM teams WHERE team_name IS NOT NULL GROUP BY team_name HAVING COUNT(*) >= ? "
+        "ORDER BY win_rate DESC LIMIT ?", [min_matches, limit]
+    )
+
+
+def global_stats():
+    """比赛场数、选手数、战队数"""
+    if not analytics_enabled():
+        return None
+    rows = _store.query(
+        "SELECT (SELECT COUNT(*) FROM matches) AS matches, "
+        "(SELECT COUNT(DISTINCT name) FROM players) AS players, "
+        "(SELECT COUNT(DISTINCT team_name) FROM teams) AS teams"
+    )
+    return rows[0] if rows else None
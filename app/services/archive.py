@@ -0,0 +1,72 @@
+# 原始比赛数据的本地压缩归档，重新导入时可以直接从磁盘回放，不必重新爬取
+#
+# 目录结构：{ARCHIVE_DIR}/{match_id // 1000}/{match_id}_{updated_at}.json.gz
+# 同一场比赛上游更新后会多出一个文件，回放时只取 updated_at 最新的一份
+
+import os
+import gzip
+import tempfile
+
+from config import SPIDER_ARCHIVE_DIR
+
+
+def archive_enabled():
+    return bool(SPIDER_ARCHIVE_DIR)
+
+
+def payload_path(match_id, updated_at, archive_dir=None):
+    archive_dir = archive_dir or SPIDER_ARCHIVE_DIR
+    return os.path.join(archive_dir, str(match_id // 1000), f'{match_id}_{updated_at or 0}.json.gz')
+
+
+def save_payload(match_id, updated_at, content, archive_dir=None):
+    """保存原始响应字节，已存在相同版本时直接跳过"""
+    path = payload_path(match_id, updated_at, archive_dir)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # 先写临时文件再改名，避免中断时留下不完整的压缩包
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=6))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+def load_payload(path):
+    with open(path, 'rb') as f:
+        return gzip.decompress(f.read())
+
+
+def iter_archive(start_id=None, end_id=None, archive_dir=None):
+    """按 match_id 升序产出 (match_id, updated_at, content)，每场比赛只取最新版本"""
+    archive_dir = archive_dir or SPIDER_ARCHIVE_DIR
+    if not archive_dir or not os.path.isdir(archive_dir):
+        return
+
+    buckets = sorted(int(name) for name in os.listdir(archive_dir) if name.isdigit())
+    for bucket in buckets:
+        if start_id is not None and (bucket + 1) * 1000 <= start_id:
+            continue
+        if end_id is not None and bucket * 1000 > end_id:
+            break
+
+        latest = {}  # match_id -> (updated_at, filename)
+        for filename in os.listdir(os.path.join(archive_dir, str(bucket))):
+            if not filename.endswith('.json.gz'):
+                continue
+            match_id, _, updated_at = filename[:-len('.json.gz')].partition('_')
+            match_id = int(match_id)
+            if (start_id is not None and match_id < start_id) or (end_id is not None and match_id > end_id):
+                continue
+            if match_id not in latest or updated_at > latest[match_id][0]:
+                latest[match_id] = (updated_at, filename)
+
+        for match_id in sorted(latest):
+            updated_at, filename = latest[match_id]
+            yield match_id, updated_at, load_payload(os.path.join(archive_dir, str(bucket), filename))
@@ -0,0 +1,115 @@
+# 爬取断点存储：批量记录高水位和异常比赛 ID，崩溃后可以从上次确认的位置继续
+
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.crawl import CrawlState, CrawlRecord
+from app.services.crawler import STATUS_OK, STATUS_EMPTY, STATUS_SKIPPED, STATUS_ERROR
+
+
+class CheckpointStore:
+    """
+    爬取断点
+
+    record() 只写内存，由调用方在比赛数据提交之后调用 flush() 落库，
+    should_flush() 表示已累计 flush_size 个 ID。
+    高水位只会前进不会后退，多个导入进程同时运行时互不覆盖。
+    """
+
+    def __init__(self, name='default', flush_size=50):
+        self.name = name
+        self.flush_size = flush_size
+        self._records = {}  # match_id -> (status, error)
+        self._high_water = None
+
+    def resume_id(self, default_start):
+        """返回本次应当开始爬取的比赛 ID"""
+        state = db.session.get(CrawlState, self.name)
+        if state is None:
+            return default_start
+        return state.last_match_id + 1
+
+    def failed_ids(self):
+        """之前抓取出错、需要重试的比赛 ID"""
+        rows = db.session.query(CrawlRecord.match_id).filter(CrawlRecord.status == STATUS_ERROR)
+        return sorted(row.match_id for row in rows)
+
+    def negative_ids(self, start_id, empty_ttl_days=7, skipped_ttl_days=90):
+        """
+        负缓存：近期确认过无数据或非LOL的比赛ID，本次爬取直接跳过
+
+        空ID只缓存高水位以下的（已知范围内的空洞），高水位之后的空ID可能很快就有数据，每次都要重新抓取。
+        """
+        state = db.session.get(CrawlState, self.name)
+        now = datetime.now()
+        query = db.session.query(CrawlRecord.match_id).filter(
+            CrawlRecord.match_id >= start_id,
+            (
+                (CrawlRecord.status == STATUS_SKIPPED) &
+                (CrawlRecord.updated_at >= now - timedelta(days=skipped_ttl_days))
+            ) | (
+                (CrawlRecord.status == STATUS_EMPTY) &
+                (CrawlRecord.updated_at >= now - timedelta(days=empty_ttl_days)) &
+                (CrawlRecord.match_id < (state.last_match_id if state else start_id))
+            )
+        )
+        return {row.match_id for row in query}
+
+    def record(self, match_id, status, error=None):
+        self._records[match_id] = (status, error[:255] if error else None)
+        # 只有确实拿到数据的 ID 才推进高水位，尾部的空 ID 下次还会再探测
+        if status in (STATUS_OK, STATUS_SKIPPED):
+            self._high_water = max(self._high_water or match_id, match_id)
+
+    def should_flush(self):
+        return len(self._records) >= self.flush_size
+
+    def flush(self):
+        if not self._records and self._high_water is None:
+            return
+        try:
+            self._write()
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程同时插入了相同的记录，回滚后逐条合并
+            db.session.rollback()
+            self._write(merge=True)
+            db.session.commit()
+        self._records = {}
+        self._high_water = None
+
+    def _write(self, merge=False):
+        now = datetime.now()
+        ids = list(self._records)
+        existing = {}
+        if ids and not merge:
+            existing = {r.match_id: r for r in CrawlRecord.query.filter(CrawlRecord.match_id.in_(ids))}
+
+        # 之前出错、现在成功的 ID 不再需要记录
+        ok_ids = [match_id for match_id, (status, _) in self._records.items() if status == STATUS_OK]
+        if ok_ids:
+            CrawlRecord.query.filter(CrawlRecord.match_id.in_(ok_ids)).delete(synchronize_session=False)
+
+        for match_id, (status, error) in self._records.items():
+            if status == STATUS_OK:
+                continue
+            if merge:
+                db.session.merge(CrawlRecord(match_id=match_id, status=status, error=error, updated_at=now))
+            elif match_id in existing:
+                record = existing[match_id]
+                record.status = status
+                record.error = error
+                record.attempts = (record.attempts or 0) + 1
+                record.updated_at = now
+            else:
+                db.session.add(CrawlRecord(match_id=match_id, status=status, error=error, updated_at=now))
+
+        if self._high_water is not None:
+            # 条件更新保证高水位只增不减
+            updated = CrawlState.query.filter(
+                CrawlState.name == self.name,
+                CrawlState.last_match_id < self._high_water
+            ).update({'last_match_id': self._high_water, 'updated_at': now}, synchronize_session=False)
+            if not updated and db.session.get(CrawlState, self.name) is None:
+                db.session.add(CrawlState(name=self.name, last_match_id=self._high_water, updated_at=now))
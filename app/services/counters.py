@@ -0,0 +1,74 @@
+# 全局计数：比赛场数、不同选手数、不同战队数
+#
+# 导入时与比赛数据在同一事务内增减：比赛数按写入/删除的行数，选手数和战队数按汇总表中出场次数从 0 变为正数
+# （或反过来）的名称数，因此 /api/stats 只需按主键读三行。计数行由 reconcile_counters() 初始化，
+# 之后定期执行它与明细表核对并修正偏差；还没有初始化时读取方返回 None，由调用方退回实时统计。
+
+from datetime import datetime
+
+from sqlalchemy import func, update
+
+from app import db
+from app.models.match import Match
+from app.models.player import Player
+from app.models.team import Team
+from app.models.summary import GlobalCounter
+
+COUNTER_NAMES = ('matches', 'players', 'teams')
+
+
+def bump_counters(**deltas):
+    """在当前事务中累加计数，未初始化的计数不处理"""
+    for name, delta in deltas.items():
+        if delta:
+            db.session.execute(
+                update(GlobalCounter).where(GlobalCounter.name == name).values(value=GlobalCounter.value + delta)
+            )
+
+
+def read_counters():
+    """返回 {'matches', 'players', 'teams'}，有任一计数未初始化时返回 None"""
+    values = dict(db.session.query(GlobalCounter.name, GlobalCounter.value).filter(
+        GlobalCounter.name.in_(COUNTER_NAMES)
+    ))
+    if len(values) < len(COUNTER_NAMES):
+        return None
+    return {name: int(values[name]) for name in COUNTER_NAMES}
+
+
+def count_exact():
+    """在明细表上实时统计（全表扫描，只在核对时使用）"""
+    return {
+        'matches': db.session.query(func.count(Match.id)).scalar() or 0,
+        'players': db.session.query(func.count(func.distinct(Player.name))).filter(
+            Player.name.isnot(None), Player.name != ''
+        ).scalar() or 0,
+        'teams': db.session.query(func.count(func.distinct(Team.team_name))).filter(
+            Team.team_name.isnot(None), Team.team_name != ''
+        ).scalar() or 0
+    }
+
+
+def reconcile_counters():
+    """
+    与明细表核对并写入正确的计数，返回 {名称: (原值, 正确值)}，原值为 None 表示新初始化
+
+    先锁住计数行再统计，正在提交的导入事务会等核对结束，统计结果与写入的计数不会互相覆盖。
+    """
+    existing = {
+        row.name: row for row in GlobalCounter.query.filter(GlobalCounter.name.in_(COUNTER_NAMES)).with_for_update()
+    }
+    now = datetime.now()
+    changes = {}
+    for name, value in count_exact().items():
+        row = existing.get(name)
+        if row is None:
+            db.session.add(GlobalCounter(name=name, value=value, reconciled_at=now))
+            changes[name] = (None, value)
+            continue
+        if row.value != value:
+            changes[name] = (row.value, value)
+        row.value = value
+        row.reconciled_at = now
+    db.session.commit()
+    return changes
@@ -0,0 +1,171 @@
+# 并发爬取引擎，供 scripts/import_data.py 使用
+# 多个线程共享一个连接池抓取比赛，按 ID 顺序把结果交给写库逻辑
+
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+
+from app.services.spider import (
+    fetch_match_response, parse_match_data, probe_match, get_session, SkipMatch, NOT_MODIFIED
+)
+from app.services.metrics import FETCH_SECONDS, PARSE_SECONDS, RESULTS_TOTAL
+
+# 单场比赛的抓取结果
+# status: ok 抓取成功 / empty 比赛不存在 / skipped 非LOL比赛等无需入库 / error 网络或解析错误
+#         not_modified 条件请求时上游未变化
+# validators: 响应中的 ETag/Last-Modified，用于下次条件请求
+# reason: status 为 error 时的原因分类（见下面的 REASON_*）
+CrawlResult = namedtuple('CrawlResult', ['match_id', 'status', 'data', 'error', 'validators', 'reason'],
+                         defaults=[None, None])
+
+STATUS_OK = 'ok'
+STATUS_EMPTY = 'empty'
+STATUS_SKIPPED = 'skipped'
+STATUS_ERROR = 'error'
+STATUS_NOT_MODIFIED = 'not_modified'
+
+# 出错原因，作为指标的 reason 标签，取值只有这几种
+REASON_TIMEOUT = 'timeout'  # 连接或读取超时
+REASON_CONNECTION = 'connection'  # 连接失败、连接中断等其他网络错误
+REASON_HTTP_5XX = 'http_5xx'
+REASON_HTTP_4XX = 'http_4xx'  # 404 表示比赛不存在，不算错误
+REASON_PARSE = 'parse'  # JSON 解码失败或字段不符合预期
+REASON_DB = 'db'  # 写库失败（由 MatchWriter 记录）
+
+
+def error_reason(exc):
+    """抓取、解析时抛出的异常归类为 REASON_*，网络以外的异常都算解析错误"""
+    if isinstance(exc, (requests.Timeout, urllib3.exceptions.TimeoutError)):
+        return REASON_TIMEOUT
+    if isinstance(exc, requests.HTTPError):
+        status = getattr(exc.response, 'status_code', None) or 0
+        return REASON_HTTP_5XX if status >= 500 else REASON_HTTP_4XX
+    # 流式解析时直接读取 urllib3 的响应流，异常不会被 requests 包装
+    if isinstance(exc, (requests.RequestException, urllib3.exceptions.HTTPError)):
+        return REASON_CONNECTION
+    return REASON_PARSE
+
+
+class RateLimiter:
+    """限制对同一主机的请求速率，多个线程共享一个实例"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def crawl_one(match_id, session=None, limiter=None, base_url=None, validators=None):
+    """抓取并解析单场比赛，所有异常都转换成 CrawlResult 返回；传入 validators 时发送条件请求"""
+    if limiter:
+        limiter.wait()
+    result = _crawl_one(match_id, session, base_url, validators or {})
+    if result.status == STATUS_ERROR:
+        RESULTS_TOTAL.inc(status=result.status, reason=result.reason)
+    else:
+        RESULTS_TOTAL.inc(status=result.status)
+    return result
+
+
+def _crawl_one(match_id, session, base_url, validators):
+    try:
+        with FETCH_SECONDS.time():
+            raw_data, new_validators = fetch_match_response(
+                match_id, session=session, base_url=base_url,
+                etag=validators.get('etag'), last_modified=validators.get('last_modified')
+            )
+        if raw_data is None:
+            return CrawlResult(match_id, STATUS_EMPTY, None, None)
+        if raw_data is NOT_MODIFIED:
+            return CrawlResult(match_id, STATUS_NOT_MODIFIED, None, None, new_validators)
+        with PARSE_SECONDS.time():
+            data = parse_match_data(raw_data, match_id)
+        if data is None:
+            return CrawlResult(match_id, STATUS_EMPTY, None, None)
+        return CrawlResult(match_id, STATUS_OK, data, None, new_validators)
+    except SkipMatch as e:
+        return CrawlResult(match_id, STATUS_SKIPPED, None, str(e))
+    except Exception as e:
+        return CrawlResult(match_id, STATUS_ERROR, None, str(e), reason=error_reason(e))
+
+
+def crawl_matches(match_ids, workers=8, rate_limit=0, session=None, base_url=None, validators=None):
+    """
+    并发抓取 match_ids 中的比赛，按传入顺序逐个产出 CrawlResult
+
+    match_ids 可以是无限迭代器，调用方停止迭代时会取消尚未开始的请求。
+    同时在途的请求数限制为 workers 的 4 倍，避免结果在内存里无限堆积。
+    validators 为 {match_id: {'etag': ..., 'last_modified': ...}}，有记录的比赛会发送条件请求。
+    """
+    validators = validators or {}
+    workers = max(1, workers)
+    session = session or get_session(pool_size=workers)
+    limiter = RateLimiter(rate_limit)
+    window = workers * 4
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for match_id in match_ids:
+            pending.append(executor.submit(crawl_one, match_id, session, limiter, base_url, validators.get(match_id)))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def find_frontier(start_id, window=10, rate_limit=0, session=None, base_url=None):
+    """
+    探测比赛 ID 的当前上界（最后一个存在的 ID 之后的位置）
+
+    先从 start_id 开始按 1、2、4、8... 的步长向后探测，找到第一个不存在的位置后再二分收敛。
+    比赛 ID 之间本来就有空洞，所以每个探测点会连续检查 window 个 ID，任意一个存在即视为存活。
+    返回值已经包含末尾的 window 余量；比 window 长的空洞可能让探测提前收敛，调用方应至少爬到这个 ID，
+    之后再按连续未找到的次数停止。start_id 附近探测不到数据时返回 None。
+    """
+    session = session or get_session()
+    limiter = RateLimiter(rate_limit)
+
+    def alive(match_id):
+        for offset in range(window):
+            limiter.wait()
+            try:
+                if probe_match(match_id + offset, session=session, base_url=base_url):
+                    return True
+            except Exception:
+                continue
+        return False
+
+    if not alive(start_id):
+        return None
+
+    low, step = start_id, 1
+    while alive(low + step):
+        low += step
+        step *= 2
+    high = low + step
+
+    # low 存活、high 不存活，二分缩小到 window 以内
+    while high - low > window:
+        middle = (low + high) // 2
+        if alive(middle):
+            low = middle
+        else:
+            high = middle
+    return high + window
@@ -0,0 +1,128 @@
+# 首页看板：参赛最多的选手、胜率最高的战队、最快/最慢比赛、单场击杀最多和全局统计
+#
+# 导入结束后由 save_snapshot() 一次算好，以 JSON 存进 dashboard_snapshots 表，/api/dashboard 只按主键读取一行；
+# 还没有快照时退回实时计算。单项接口（/api/top-players 等）也复用这里的查询。
+
+import json
+from datetime import datetime
+
+from sqlalchemy import func, desc, asc
+
+from app import db
+from app.models.match import Match
+from app.models.player import Player
+from app.models.team import Team
+from app.models.summary import PlayerSummary, TeamSummary, DashboardSnapshot
+from app.services import analytics
+from app.services.counters import read_counters
+from app.services.data_version import bump_data_version
+
+SNAPSHOT_NAME = 'home'
+TOP_N = 3
+MIN_TEAM_MATCHES = 50  # 胜率排行至少需要的比赛场数
+
+
+def top_players(limit=TOP_N):
+    """参赛场次最多的选手，优先在分析快照上计算，否则直接读取汇总表"""
+    rows = analytics.top_players(limit)
+    if rows is None:
+        rows = [row._asdict() for row in db.session.query(
+            PlayerSummary.name,
+            PlayerSummary.appearances.label('matches_count')
+        ).order_by(desc(PlayerSummary.appearances)).limit(limit)]
+    return [{'name': row['name'], 'matches_count': int(row['matches_count'])} for row in rows]
+
+
+def top_teams(limit=TOP_N, min_matches=MIN_TEAM_MATCHES):
+    """胜率最高的战队（排除场次不足的），优先在分析快照上计算，否则在数据库中完成排序"""
+    rows = analytics.top_teams(min_matches=min_matches, limit=limit)
+    if rows is None:
+        win_rate = (TeamSummary.wins * 100.0 / TeamSummary.appearances).label('win_rate')
+        rows = [row._asdict() for row in db.session.query(TeamSummary.team_name, win_rate).filter(
+            TeamSummary.appearances >= min_matches
+        ).order_by(desc(win_rate)).limit(limit)]
+    return [{'team_name': row['team_name'], 'win_rate': round(float(row['win_rate']), 2)} for row in rows]
+
+
+def _matches_by_game_time(order, limit):
+    matches = db.session.query(Match).filter(Match.game_time.isnot(None)).order_by(order(Match.game_time)).limit(limit)
+    return [{
+        'id': match.id,
+        'red_team_name': match.red_team_name,
+        'blue_team_name': match.blue_team_name,
+        'game_time': match.game_time
+    } for match in matches]
+
+
+def fastest_matches(limit=TOP_N):
+    return _matches_by_game_time(asc, limit)
+
+
+def longest_matches(limit=TOP_N):
+    return _matches_by_game_time(desc, limit)
+
+
+def top_kills(limit=TOP_N):
+    """单场击杀数最高的选手"""
+    players = db.session.query(Player).filter(Player.kills.isnot(None)).order_by(desc(Player.kills)).limit(limit)
+    return [{
+        'name': player.name,
+        'hero': player.hero,
+        'kills': player.kills,
+        'team_name': player.team_name
+    } for player in players]
+
+
+def global_stats():
+    """比赛场数、选手数、战队数：优先读取导入时维护的全局计数，未初始化时在分析快照或数据库上统计"""
+    counters = read_counters()
+    if counters is not None:
+        return counters
+    snapshot_stats = analytics.global_stats()
+    if snapshot_stats is not None:
+        return {key: int(snapshot_stats[key]) for key in ('matches', 'players', 'teams')}
+    return {
+        'matches': db.session.query(Match).count(),
+        'players': db.session.query(func.count(func.distinct(Player.name))).scalar(),
+        'teams': db.session.query(func.count(func.distinct(Team.team_name))).scalar()
+    }
+
+
+def compute_dashboard():
+    return {
+        'players': top_players(),
+        'teams': top_teams(),
+        'fastest_matches': fastest_matches(),
+        'longest_matches': longest_matches(),
+        'top_kills': top_kills(),
+        'stats': global_stats()
+    }
+
+
+def save_snapshot():
+    """重新计算首页数据，与已保存的快照不同时才写入并推进数据版本，返回是否写入了新快照"""
+    data = compute_dashboard()
+    snapshot = db.session.get(DashboardSnapshot, SNAPSHOT_NAME)
+    if snapshot is not None:
+        stored = json.loads(snapshot.payload)
+        stored.pop('updated_at', None)
+        if stored == data:
+            # 内容没变（例如刷新时上游没有更新），保留原快照，客户端缓存的 ETag 继续有效
+            db.session.rollback()
+            return False
+
+    now = datetime.now()
+    data['updated_at'] = now.strftime('%Y-%m-%d %H:%M:%S')
+    db.session.merge(DashboardSnapshot(name=SNAPSHOT_NAME, payload=json.dumps(data, ensure_ascii=False), updated_at=now))
+    # 首页数据晚于比赛数据更新，再推进一次版本，让已缓存的首页重新获取
+    bump_data_version()
+    db.session.commit()
+    return True
+
+
+def load_dashboard():
+    """读取最近一次快照，还没有快照时实时计算（不写库，GET 请求走只读连接）"""
+    snapshot = db.session.get(DashboardSnapshot, SNAPSHOT_NAME)
+    if snapshot is not None:
+        return json.loads(snapshot.payload)
+    return compute_dashboard()
@@ -0,0 +1,128 @@
+# 数据版本与条件 GET：数据只在导入脚本提交时变化，读接口按全局数据版本生成 ETag/Last-Modified
+#
+# 导入进程每次提交比赛数据（或刷新首页快照）时在同一事务里把 data_version 的 epoch 加 1；
+# Web 进程每 DATA_VERSION_TTL 秒最多读一次版本，请求带的 If-None-Match / If-Modified-Since 与之相同时
+# 直接返回 304，不再执行查询和序列化。版本变化时清空各模块的进程内缓存，避免新 ETag 配上旧数据。
+
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+from flask import request, g
+from sqlalchemy import update, case
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models.crawl import DataVersion
+from config import DATA_VERSION_TTL
+
+VERSION_NAME = 'default'
+
+_current = None  # (ETag, Last-Modified)
+_checked_at = None
+_lock = threading.Lock()
+_listeners = []
+
+
+def ensure_data_version():
+    """导入脚本启动时调用，保证版本行存在，之后 bump 只需 UPDATE"""
+    if db.session.get(DataVersion, VERSION_NAME) is None:
+        db.session.add(DataVersion(name=VERSION_NAME, epoch=0, max_match_id=0, updated_at=datetime.now()))
+        db.session.commit()
+
+
+def bump_data_version(max_match_id=0):
+    """在当前事务中推进数据版本，随事务一起提交"""
+    db.session.execute(update(DataVersion).where(DataVersion.name == VERSION_NAME).values(
+        epoch=DataVersion.epoch + 1,
+        max_match_id=case(
+            (DataVersion.max_match_id < max_match_id, max_match_id), else_=DataVersion.max_match_id
+        ),
+        updated_at=datetime.now()
+    ))
+
+
+def on_change(listener):
+    """注册数据版本变化时的回调，用于清空进程内缓存"""
+    _listeners.append(listener)
+    return listener
+
+
+def current_version():
+    """返回 (ETag, Last-Modified)，版本表还没有数据时返回 None"""
+    global _current, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < DATA_VERSION_TTL:
+        return _current
+    with _lock:
+        if _checked_at is not None and now - _checked_at < DATA_VERSION_TTL:
+            return _current
+        try:
+            row = db.session.get(DataVersion, VERSION_NAME)
+        except SQLAlchemyError:
+            # 导入脚本还没有建表时不启用条件 GET
+            db.session.rollback()
+            row = None
+        # updated_at 按本地时间保存，Last-Modified 需要 UTC
+        version = (
+            f"{row.max_match_id}-{row.epoch}", row.updated_at.replace(microsecond=0).astimezone(timezone.utc)
+        ) if row else None
+        if version != _current:
+            for listener in _listeners:
+                listener()
+        _current, _checked_at = version, now
+        return version
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    return since is not None and since >= last_modified
+
+
+def init_app(app, blueprints):
+    """为指定蓝图的 GET/HEAD 请求启用基于数据版本的条件 GET"""
+
+    @app.before_request
+    def check_not_modified():
+        if request.method not in ('GET', 'HEAD') or request.blueprint not in blueprints:
+            return None
+        version = current_version()
+        if version is None:
+            return None
+        g.data_version = version
+        if _not_modified(*version):
+            response = app.response_class(status=304)
+            _tag(response, version)
+            return response
+        return None
+
+    @app.after_request
+    def add_version_headers(response):
+        version = g.pop('data_version', None)
+        if version is None or response.status_code != 200 or response.headers.get('ETag'):
+            return response
+        _tag(response, version)
+        return response
+
+
+def uncacheable():
+    """当前请求的响应不带数据版本，例如 main 蓝图出错时仍返回 200（status 为 error）的响应"""
+    g.pop('data_version', None)
+
+
+def _tag(response, version):
+    etag, last_modified = version
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    if 'Cache-Control' not in response.headers:
+        # 浏览器可以缓存，但每次使用前都要带 ETag 回来确认
+        response.headers['Cache-Control'] = 'no-cache'
+
+
+def cache_immutable(response, max_age):
+    """内容不会再变化的响应（如超出刷新窗口的历史比赛），让浏览器长期缓存且不再确认"""
+    response.headers['Cache-Control'] = f'public, max-age={max_age}, immutable'
+    response.expires = datetime.now(timezone.utc) + timedelta(seconds=max_age)
+    return response
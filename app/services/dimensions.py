@@ -0,0 +1,88 @@
+# 维度ID缓存：导入时把战队/选手/英雄名称解析为整数ID，未知名称批量插入维度表
+
+from app import db
+from app.models.dimension import DimTeam, DimPlayer, DimHero
+from app.services.upsert import insert_ignoring_duplicates
+
+DIMENSIONS = {'team': DimTeam, 'player': DimPlayer, 'hero': DimHero}
+
+# 明细字典中的名称字段 -> (维度, 写入的ID字段)
+MATCH_FIELDS = (
+    ('red_team_name', 'team', 'red_team_id'),
+    ('blue_team_name', 'team', 'blue_team_id'),
+    ('win_team_name', 'team', 'win_team_id'),
+)
+TEAM_FIELDS = (
+    ('team_name', 'team', 'team_id'),
+    ('player_a_id', 'player', 'player_a_key'),
+    ('player_b_id', 'player', 'player_b_key'),
+    ('player_c_id', 'player', 'player_c_key'),
+    ('player_d_id', 'player', 'player_d_key'),
+    ('player_e_id', 'player', 'player_e_key'),
+)
+PLAYER_FIELDS = (
+    ('name', 'player', 'player_id'),
+    ('team_name', 'team', 'team_id'),
+    ('hero', 'hero', 'hero_id'),
+)
+
+
+class UnresolvedDimension(Exception):
+    """插入后仍然查不到维度ID的名称，这批比赛不能写入"""
+
+
+class DimensionCache:
+    """
+    名称 -> ID 的内存缓存，启动时一次性加载全部维度
+
+    新名称在当前事务里插入，事务回滚时调用 rollback() 丢弃这些尚未提交的ID。
+    """
+
+    def __init__(self):
+        self._ids = {
+            kind: {row.name: row.id for row in db.session.query(model.id, model.name)}
+            for kind, model in DIMENSIONS.items()
+        }
+        self._pending = {kind: set() for kind in DIMENSIONS}
+
+    def get(self, kind, name):
+        return self._ids[kind].get(name) if name else None
+
+    def resolve(self, kind, names):
+        """确保 names 中的名称都有ID"""
+        cache = self._ids[kind]
+        missing = {name for name in names if name and name not in cache}
+        if not missing:
+            return
+        model = DIMENSIONS[kind]
+        insert_ignoring_duplicates(model, [{'name': name} for name in sorted(missing)])
+        for row in db.session.query(model.id, model.name).filter(model.name.in_(missing)):
+            cache[row.name] = row.id
+        for name in missing - cache.keys():
+            # 数据库排序规则不区分大小写时，名称可能以另一种大小写形式存在
+            row = db.session.query(model.id).filter(model.name == name).first()
+            if row:
+                cache[name] = row.id
+        # 先记为待提交，抛出异常后外层回滚时 rollback() 能一并丢弃这些ID
+        self._pending[kind] |= missing
+        unresolved = missing - cache.keys()
+        if unresolved:
+            raise UnresolvedDimension(f"{kind} 名称无法解析为维度ID: {', '.join(sorted(unresolved))}")
+
+    def assign(self, match_rows, team_rows, player_rows):
+        """为一批明细字典填上维度ID"""
+        for rows, fields in ((match_rows, MATCH_FIELDS), (team_rows, TEAM_FIELDS), (player_rows, PLAYER_FIELDS)):
+            for name_field, kind, _ in fields:
+                self.resolve(kind, {row.get(name_field) for row in rows})
+            for row in rows:
+                for name_field, kind, id_field in fields:
+                    row[id_field] = self.get(kind, row.get(name_field))
+
+    def commit(self):
+        self._pending = {kind: set() for kind in DIMENSIONS}
+
+    def rollback(self):
+        for kind, names in self._pending.items():
+            for name in names:
+                self._ids[kind].pop(name, None)
+        self.commit()
@@ -0,0 +1,167 @@
+# 批量写库：一次性加载已有的比赛ID，攒够一批比赛后在同一个事务里多行插入
+
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.match import Match
+from app.models.player import Player
+from app.models.team import Team
+from app.models.crawl import MatchSource
+from app.services.crawler import STATUS_OK, STATUS_ERROR, REASON_DB
+from app.services.summary import apply_match_summaries, match_names
+from app.services.dimensions import DimensionCache
+from app.services.partitions import season_of
+from app.services.data_version import bump_data_version
+from app.services.metrics import WRITE_SECONDS, MATCHES_WRITTEN_TOTAL, RESULTS_TOTAL
+
+
+def load_known_ids():
+    """读取数据库中已有的全部 match_id"""
+    return {row.match_id for row in db.session.query(Match.match_id)}
+
+
+def match_exists(match_id):
+    """比赛是否已经写入 matches 表"""
+    return db.session.query(Match.match_id).filter(Match.match_id == match_id).first() is not None
+
+
+class MatchWriter:
+    """
+    批量导入比赛数据
+
+    add() 只做内存去重和缓存，flush() 时把 Match/Team/Player 三张表各用一条多行 INSERT
+    写入，选手/战队汇总表、全局计数和数据版本也在同一个事务里更新后一起提交。
+    提交成功后才把结果交给断点，保证高水位不会越过未落库的比赛。
+    replace=True 时不跳过已有比赛，而是在同一事务里先删除旧数据再写入（用于回放归档）。
+    战队/选手/英雄名称在写入前通过 DimensionCache 解析为维度表的整数ID。
+    """
+
+    def __init__(self, batch_size=50, checkpoint=None, replace=False):
+        self.batch_size = max(1, batch_size)
+        self.checkpoint = checkpoint
+        self.replace = replace
+        self.known_ids = set() if replace else load_known_ids()
+        self.dims = DimensionCache()
+        self._batch = []  # [(match_id, data, validators)]
+
+    def add(self, match_id, data, validators=None):
+        """缓存一场比赛，已存在时返回 False；validators 为响应的 ETag/Last-Modified"""
+        if not self.replace and match_id in self.known_ids:
+            print(f"比赛 ID {match_id} 已存在，跳过")
+            self._record(match_id, STATUS_OK)
+            return False
+        self.known_ids.add(match_id)
+        self._batch.append((match_id, data, validators))
+        return True
+
+    def full(self):
+        return len(self._batch) >= self.batch_size
+
+    def flush(self):
+        """写入当前批次并提交，然后保存断点"""
+        batch, self._batch = self._batch, []
+        if batch:
+            try:
+                with WRITE_SECONDS.time():
+                    self._insert(batch)
+                    db.session.commit()
+                self.dims.commit()
+                MATCHES_WRITTEN_TOTAL.inc(len(batch))
+                for match_id, _, _ in batch:
+                    self._record(match_id, STATUS_OK)
+                print(f"批量导入成功，共 {len(batch)} 场比赛，比赛 ID: {batch[0][0]} - {batch[-1][0]}")
+            except Exception as e:
+                db.session.rollback()
+                self.dims.rollback()
+                print(f"批量导入失败，改为逐场导入。错误信息: {e}")
+                self._insert_one_by_one(batch)
+        if self.checkpoint:
+            self.checkpoint.flush()
+
+    def _insert_one_by_one(self, batch):
+        # 逐场重试，把出错的比赛隔离出来，其余比赛照常入库
+        for match_id, data, validators in batch:
+            try:
+                with WRITE_SECONDS.time():
+                    self._insert([(match_id, data, validators)])
+                    db.session.commit()
+                self.dims.commit()
+                MATCHES_WRITTEN_TOTAL.inc()
+                self._record(match_id, STATUS_OK)
+            except IntegrityError as e:
+                db.session.rollback()
+                self.dims.rollback()
+                if match_exists(match_id):
+                    # 其他导入进程已经写入了这场比赛
+                    print(f"比赛 ID {match_id} 已存在，跳过")
+                    self._record(match_id, STATUS_OK)
+                    continue
+                # 冲突来自其他表，这场比赛并没有写入，断点不能越过它
+                self.known_ids.discard(match_id)
+                print(f"导入比赛 ID {match_id} 时发生唯一键冲突，已跳过。错误信息: {e}")
+                RESULTS_TOTAL.inc(status=STATUS_ERROR, reason=REASON_DB)
+                self._record(match_id, STATUS_ERROR, str(e))
+            except Exception as e:
+                db.session.rollback()
+                self.dims.rollback()
+                self.known_ids.discard(match_id)
+                print(f"导入比赛 ID {match_id} 时发生错误，已跳过。错误信息: {e}")
+                RESULTS_TOTAL.inc(status=STATUS_ERROR, reason=REASON_DB)
+                self._record(match_id, STATUS_ERROR, str(e))
+
+    def _insert(self, batch):
+        match_ids = [match_id for match_id, _, _ in batch]
+        removed = 0  # 删除的旧比赛行数，用于计算比赛总数的净增量
+        replaced = set()  # 库中已有、这次被重写的比赛
+        old_players, old_teams = set(), set()  # 被重写的比赛原来涉及的选手/战队
+        if self.replace:
+            replaced = {row.match_id for row in db.session.query(Match.match_id).filter(Match.match_id.in_(match_ids))}
+        if replaced:
+            old_players, old_teams = match_names(replaced)
+            for model in (Player, Team):
+                db.session.query(model).filter(model.match_id.in_(replaced)).delete(synchronize_session=False)
+            removed = db.session.query(Match).filter(Match.match_id.in_(replaced)).delete(synchronize_session=False)
+        db.session.query(MatchSource).filter(MatchSource.match_id.in_(match_ids)).delete(synchronize_session=False)
+
+        now = datetime.now()
+        match_rows, team_rows, player_rows, source_rows = [], [], [], []
+        for match_id, data, validators in batch:
+            match_rows.extend(data['matches'])
+            # 记录上游版本，刷新时据此判断比赛是否有变化
+            validators = validators or {}
+            source_rows.append({
+                'match_id': match_id,
+                'upstream_updated_at': data['matches'][0].get('date'),
+                'etag': validators.get('etag'),
+                'last_modified': validators.get('last_modified'),
+                'checked_at': now,
+                'changed_at': now
+            })
+            for team_data in data['teams']:
+                team_data['match_id'] = match_id  # 使用 match_id 而非 id
+                team_data['season'] = season_of(team_data.get('date'))
+                team_rows.append(team_data)
+            for player_data in data['players']:
+                player_data['match_id'] = match_id  # 使用 match_id 而非 id
+                player_data['season'] = season_of(player_data.get('date'))
+                player_rows.append(player_data)
+
+        self.dims.assign(match_rows, team_rows, player_rows)
+        # 传入字典列表时 SQLAlchemy 会生成多行 INSERT，每张表一次往返
+        db.session.execute(insert(Match), match_rows)
+        db.session.execute(insert(Team), team_rows)
+        db.session.execute(insert(Player), player_rows)
+        db.session.execute(insert(MatchSource), source_rows)
+        # 只有被重写的比赛涉及的选手/战队需要按明细表重新计算，新比赛照常增量累加
+        apply_match_summaries(
+            team_rows, player_rows, matches=len(match_rows) - removed,
+            rewritten_players=old_players | {row.get('name') for row in player_rows if row['match_id'] in replaced},
+            rewritten_teams=old_teams | {row.get('team_name') for row in team_rows if row['match_id'] in replaced}
+        )
+        bump_data_version(max(match_ids))
+
+    def _record(self, match_id, status, error=None):
+        if self.checkpoint:
+            self.checkpoint.record(match_id, status, error)
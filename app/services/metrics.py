@@ -0,0 +1,224 @@
+# 爬虫和导入过程的进程内指标：计数器和直方图，可导出为 Prometheus 文本格式或定期输出 JSON 摘要
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 默认的耗时分桶（秒），覆盖从本地解析到慢速网络请求的范围
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _label_str(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in sorted(labels)) + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}  # 标签元组 -> 计数
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def total(self):
+        return sum(self.values().values())
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.values().items()):
+            lines.append(f'{self.name}{_label_str(labels)} {value}')
+        return lines
+
+    def summary(self):
+        return {','.join(f'{k}={v}' for k, v in labels) or 'total': value
+                for labels, value in self.values().items()}
+
+
+class Histogram:
+    """分桶直方图，另外保留最近的样本用于计算 p50/p99"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS, sample_size=2048):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._samples = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            self._samples.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self):
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {count}')
+        lines.append(f'{self.name}_sum {total}')
+        lines.append(f'{self.name}_count {count}')
+        return lines
+
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self._count, self._sum
+        if not samples:
+            return {'count': 0}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 2)
+
+        return {'count': count, 'avg_ms': round(total / count * 1000, 2),
+                'p50_ms': pct(50), 'p95_ms': pct(95), 'p99_ms': pct(99)}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        return self._register(name, lambda: Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(name, lambda: Histogram(name, help_text, buckets))
+
+    def _register(self, name, factory):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = factory()
+            return self._metrics[name]
+
+    def render_prometheus(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        return {name: metric.summary() for name, metric in self._metrics.items()}
+
+
+REGISTRY = Registry()
+
+# 爬虫和导入各阶段的指标
+FETCH_SECONDS = REGISTRY.histogram('crawler_fetch_seconds', '单场比赛抓取耗时')
+PARSE_SECONDS = REGISTRY.histogram('crawler_parse_seconds', '单场比赛解析耗时')
+WRITE_SECONDS = REGISTRY.histogram('importer_write_seconds', '每批比赛写库耗时')
+# status=error 时带 reason 标签（timeout/connection/http_5xx/http_4xx/parse/db）；
+# 写库失败的比赛抓取时已记为 ok，写库失败后另记一次 status=error,reason=db
+RESULTS_TOTAL = REGISTRY.counter('crawler_results_total', '按结果（出错时按原因）分类的比赛ID数量')
+MATCHES_WRITTEN_TOTAL = REGISTRY.counter('importer_matches_written_total', '成功写入数据库的比赛数')
+
+
+def start_http_server(port, registry=REGISTRY):
+    """在后台线程启动 /metrics 接口，供 Prometheus 抓取"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = registry.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _ids_processed():
+    # 写库失败的比赛在抓取时已经计过一次，不重复计入处理的ID数
+    db_errors = RESULTS_TOTAL.values().get((('reason', 'db'), ('status', 'error')), 0)
+    return RESULTS_TOTAL.total() - db_errors
+
+
+class PeriodicReporter:
+    """每隔 interval 秒把指标摘要追加到 JSON Lines 文件，并打印当前吞吐量"""
+
+    def __init__(self, interval=30, path=None, registry=REGISTRY):
+        self.interval = interval
+        self.path = path
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._last_time = time.monotonic()
+        self._last_written = MATCHES_WRITTEN_TOTAL.total()
+        self._last_results = _ids_processed()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.report()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.report()
+
+    def report(self):
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-9)
+        written, results = MATCHES_WRITTEN_TOTAL.total(), _ids_processed()
+        entry = {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'matches_per_sec': round((written - self._last_written) / elapsed, 2),
+            'ids_per_sec': round((results - self._last_results) / elapsed, 2),
+            'metrics': self.registry.summary()
+        }
+        self._last_time, self._last_written, self._last_results = now, written, results
+
+        print(f"[metrics] 入库 {entry['matches_per_sec']} 场/秒，处理 {entry['ids_per_sec']} ID/秒，"
+              f"抓取 {entry['metrics']['crawler_fetch_seconds']}")
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        return entry
@@ -0,0 +1,109 @@
+# 选手/战队名称的内存检索索引：三元组（trigram）倒排表 + 前缀优先的联想排序
+#
+# 名称来自 dim_players / dim_teams 维度表，导入进程写入新名称后，Web 进程在数据版本变化时（或最多隔
+# SEARCH_INDEX_REFRESH 秒）重新读取全部名称和热度（出场次数，取自汇总表，用于联想结果排序），
+# 与已加载的ID对比后只为新名称建三元组。并行导入时维度ID不按顺序提交，不能只加载比已知最大ID更大的记录。
+
+import time
+import threading
+
+from sqlalchemy import func
+
+from app import db
+from app.models.dimension import DimPlayer, DimTeam
+from app.models.summary import PlayerSummary, TeamSummary
+from app.services.data_version import on_change
+from config import SEARCH_INDEX_REFRESH, SEARCH_MAX_IDS
+
+GRAM_SIZE = 3
+
+
+def _grams(text):
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+class NameIndex:
+    """
+    大小写不敏感的子串检索，语义与 ilike('%term%') 相同
+
+    查询长度不少于 3 时先用三元组倒排表求交集缩小候选，再逐个确认子串；更短的查询直接扫描全部名称，
+    名称只有几千个，在内存中也很快。
+    """
+
+    def __init__(self, dim_model, summary_model, summary_key):
+        self.dim_model = dim_model
+        self.summary_model = summary_model
+        self.summary_key = summary_key
+        self._names = {}  # id -> 名称
+        self._lower = {}  # id -> 小写名称
+        self._weights = {}  # id -> 出场次数
+        self._grams = {}  # 三元组 -> {id}
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """重新读取全部名称和热度，加入还没有索引的名称，距上次检查不足 SEARCH_INDEX_REFRESH 秒时跳过"""
+        now = time.monotonic()
+        if not force and self._checked_at is not None and now - self._checked_at < SEARCH_INDEX_REFRESH:
+            return
+        with self._lock:
+            self._checked_at = now
+            rows = db.session.query(
+                self.dim_model.id, self.dim_model.name, func.coalesce(self.summary_model.appearances, 0)
+            ).outerjoin(
+                self.summary_model, self.summary_key == self.dim_model.name
+            ).all()
+            self._weights = {dim_id: weight for dim_id, _, weight in rows}
+            for dim_id, name, _ in rows:
+                if dim_id not in self._names:
+                    self._add(dim_id, name)
+
+    def _add(self, dim_id, name):
+        lower = name.lower()
+        self._names[dim_id] = name
+        self._lower[dim_id] = lower
+        for gram in _grams(lower):
+            self._grams.setdefault(gram, set()).add(dim_id)
+
+    def search(self, term):
+        """返回名称包含 term 的 {id: 名称}"""
+        term = (term or '').strip().lower()
+        if not term:
+            return {}
+        self.refresh()
+        with self._lock:
+            if len(term) >= GRAM_SIZE:
+                postings = sorted((self._grams.get(gram, set()) for gram in _grams(term)), key=len)
+                candidates = set.intersection(*postings) if postings[0] else set()
+            else:
+                candidates = self._lower.keys()
+            return {dim_id: self._names[dim_id] for dim_id in candidates if term in self._lower[dim_id]}
+
+    def suggest(self, term, limit=10):
+        """联想：前缀匹配优先，其次按出场次数和名称排序"""
+        term = (term or '').strip().lower()
+        matches = self.search(term)
+        ranked = sorted(
+            matches.items(),
+            key=lambda item: (not self._lower[item[0]].startswith(term), -self._weights.get(item[0], 0), item[1])
+        )
+        return [name for _, name in ranked[:limit]]
+
+
+def name_filter(index, column, term):
+    """把 column ilike '%term%' 换成按索引列的精确匹配，命中的名称过多时仍用 LIKE"""
+    names = list(index.search(term).values())
+    if len(names) > SEARCH_MAX_IDS:
+        return column.ilike(f'%{term}%')
+    return column.in_(names)
+
+
+players = NameIndex(DimPlayer, PlayerSummary, PlayerSummary.name)
+teams = NameIndex(DimTeam, TeamSummary, TeamSummary.team_name)
+
+
+@on_change
+def _expire():
+    # 数据版本变化后下一次检索立即加载新名称和最新热度
+    players._checked_at = None
+    teams._checked_at = None
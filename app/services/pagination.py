@@ -0,0 +1,168 @@
+# 游标分页：按排序键定位下一页，翻页代价与页码无关；总数可选，并在进程内缓存一段时间
+#
+# 返回的 pagination 保留原来 paginate() 的字段（page/pages/has_prev/has_next/prev_num/next_num），
+# 另外带上 next_cursor。请求带 cursor 时按游标取下一页，否则按 page 退回 OFFSET 方式（用于跳页）。
+
+import json
+import time
+import base64
+import threading
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+from app.services.data_version import on_change
+from config import PAGINATION_COUNT_TTL
+
+_count_cache = {}  # count_key -> (过期时间, 总数)
+_count_lock = threading.Lock()
+COUNT_CACHE_SIZE = 1000  # 缓存的筛选组合上限，超过后整体清空
+
+
+def encode_cursor(values):
+    """把排序键编码为不透明的游标字符串"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """解码游标，格式不对时返回 None（当作第一页处理）"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+        return [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+            for value, (column, _, _) in zip(values, columns)
+        ]
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+
+def _after(order, values):
+    """
+    构造“排在游标之后”的条件
+
+    NULL 在 MySQL/SQLite 中都视为最小值：降序时排在最后，升序时排在最前。
+    """
+    conditions = []
+    for i, ((column, _, descending), value) in enumerate(zip(order, values)):
+        equal_before = [
+            prev_column.is_(None) if prev_value is None else prev_column == prev_value
+            for (prev_column, _, _), prev_value in zip(order[:i], values[:i])
+        ]
+        if value is None:
+            # 降序时 NULL 之后没有更小的值；升序时 NULL 之后是所有非 NULL 值
+            if descending:
+                continue
+            beyond = column.isnot(None)
+        elif descending:
+            beyond = or_(column < value, column.is_(None))
+        else:
+            beyond = column > value
+        conditions.append(and_(*equal_before, beyond))
+    return or_(*conditions) if conditions else None
+
+
+def _nullable(column):
+    return getattr(getattr(column, 'expression', column), 'nullable', True)
+
+
+def _seek_bound(order, values):
+    """
+    首列的范围条件（降序 <=、升序 >=），与 _after 同时使用
+
+    _after 是多个条件的 OR，数据库无法据此定位索引位置，只能从头按索引读到游标处；
+    加上首列的范围条件后可以直接从游标位置开始读。首列为 NULL 时返回 None。
+    """
+    column, _, descending = order[0]
+    if values[0] is None:
+        return None
+    return column <= values[0] if descending else column >= values[0]
+
+
+@on_change
+def _clear_counts():
+    with _count_lock:
+        _count_cache.clear()
+
+
+def _cached_count(query, count_key):
+    now = time.monotonic()
+    with _count_lock:
+        cached = _count_cache.get(count_key)
+        if cached and cached[0] > now:
+            return cached[1]
+    total = query.order_by(None).count()
+    with _count_lock:
+        if len(_count_cache) >= COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[count_key] = (now + PAGINATION_COUNT_TTL, total)
+    return total
+
+
+class KeysetPage:
+    def __init__(self, items, page, per_page, has_next, next_cursor, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = page > 1
+        self.next_cursor = next_cursor
+        self.total = total
+        self.pages = None if total is None else max(1, -(-total // per_page))
+        self.prev_num = page - 1 if self.has_prev else None
+        self.next_num = page + 1 if has_next else None
+
+    def to_dict(self):
+        return {
+            'page': self.page,
+            'pages': self.pages,
+            'total': self.total,
+            'has_prev': self.has_prev,
+            'has_next': self.has_next,
+            'prev_num': self.prev_num,
+            'next_num': self.next_num,
+            'next_cursor': self.next_cursor
+        }
+
+
+def keyset_paginate(query, order, per_page, cursor=None, page=1, count_key=None, with_count=True):
+    """
+    分页查询
+
+    order 为 [(列, 结果行中的属性名, 是否降序)]，最后一列必须唯一（如主键），保证顺序稳定。
+    count_key 相同的请求共享缓存的总数；with_count=False 时不统计总数，pages 为 None。
+    """
+    page = max(1, page or 1)
+    total = None
+    if with_count:
+        total = _cached_count(query, count_key) if count_key else query.order_by(None).count()
+
+    values = decode_cursor(cursor, order) if cursor else None
+    ordered = query.order_by(*[column.desc() if descending else column.asc() for column, _, descending in order])
+    if values is not None:
+        condition = _after(order, values)
+        bound = _seek_bound(order, values)
+        if condition is None:
+            rows = ordered.limit(per_page + 1).all()
+        elif bound is None:
+            rows = ordered.filter(condition).limit(per_page + 1).all()
+        else:
+            rows = ordered.filter(bound, condition).limit(per_page + 1).all()
+            column, _, descending = order[0]
+            if descending and _nullable(column) and len(rows) <= per_page:
+                # 降序时首列为 NULL 的行排在最后，不满足范围条件，非 NULL 的行取完后再单独补上
+                rows += ordered.filter(column.is_(None)).limit(per_page + 1 - len(rows)).all()
+    else:
+        rows = ordered.offset((page - 1) * per_page).limit(per_page + 1).all()
+
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+    next_cursor = encode_cursor([getattr(items[-1], attr) for _, attr, _ in order]) if has_next else None
+    return KeysetPage(items, page, per_page, has_next, next_cursor, total)
+
+
+def count_key(name, **filters):
+    """由接口名和筛选条件组成总数缓存的键"""
+    return (name,) + tuple(sorted((key, value) for key, value in filters.items() if value))
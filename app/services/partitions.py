@@ -0,0 +1,96 @@
+# players/teams 按赛季（比赛年份）分区：分区维护和可裁剪分区的查询条件
+#
+# 分区键是 season 列（比赛日期的年份，日期未知时为 0），分区本身由迁移创建，仅在 MySQL 上生效；
+# 其他数据库上 season 只是普通列，这里的函数都能照常使用。
+
+from datetime import datetime
+from sqlalchemy import text
+
+from app import db
+
+PARTITIONED_TABLES = ('players', 'teams')
+
+# 兜底分区，新赛季的分区从它拆分出来
+MAX_PARTITION = 'pmax'
+
+
+def season_of(date):
+    """比赛日期对应的赛季（年份），日期未知时归入 0"""
+    return date.year if date else 0
+
+
+def partition_name(season):
+    return f'p{season}'
+
+
+def existing_partitions(table):
+    """返回表当前的分区名集合，未分区或非 MySQL 时为空集合"""
+    if db.engine.dialect.name != 'mysql':
+        return set()
+    rows = db.session.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL"
+    ), {'table': table})
+    return {row[0] for row in rows}
+
+
+def ensure_partitions(years_ahead=1):
+    """
+    提前为当前及之后 years_ahead 个赛季建好分区
+
+    新分区从空的 pmax 拆分，只涉及未来日期的数据，基本不需要搬动已有行。
+    返回新建的 [(表名, 分区名)]。
+    """
+    created = []
+    current = datetime.now().year
+    for table in PARTITIONED_TABLES:
+        partitions = existing_partitions(table)
+        if MAX_PARTITION not in partitions:
+            continue
+        for season in range(current, current + years_ahead + 1):
+            name = partition_name(season)
+            if name in partitions:
+                continue
+            db.session.execute(text(
+                f"ALTER TABLE {table} REORGANIZE PARTITION {MAX_PARTITION} INTO ("
+                f"PARTITION {name} VALUES LESS THAN ({season + 1}), "
+                f"PARTITION {MAX_PARTITION} VALUES LESS THAN MAXVALUE)"
+            ))
+            partitions.add(name)
+            created.append((table, name))
+    return created
+
+
+def month_range(start_str=None, end_str=None):
+    """把 YYYY-MM 格式的起止月份转为 [start, end) 日期区间，格式不对的一端视为不限"""
+    start = end = None
+    if start_str:
+        try:
+            start = datetime.strptime(start_str, "%Y-%m")
+        except ValueError:
+            pass
+    if end_str:
+        try:
+            end = datetime.strptime(end_str, "%Y-%m")
+            # 设置为下个月的1号，以包含完整的月份
+            if end.month == 12:
+                end = end.replace(year=end.year + 1, month=1)
+            else:
+                end = end.replace(month=end.month + 1)
+        except ValueError:
+            pass
+    return start, end
+
+
+def date_range(model, start=None, end=None):
+    """
+    按日期范围筛选的条件列表，start 含、end 不含
+
+    除了日期条件外同时带上 season 条件，MySQL 据此只扫描相关赛季的分区。
+    """
+    conditions = []
+    if start is not None:
+        conditions += [model.date >= start, model.season >= start.year]
+    if end is not None:
+        conditions += [model.date < end, model.season <= end.year]
+    return conditions
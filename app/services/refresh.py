@@ -0,0 +1,63 @@
+# 增量刷新：定期回访最近的比赛，上游 updated_at 变化时才重写该场比赛的数据
+
+from datetime import datetime, timedelta
+from sqlalchemy import insert, update
+
+from app import db
+from app.models.match import Match
+from app.models.crawl import MatchSource
+
+
+def refresh_candidates(days=14, interval_hours=6, limit=None):
+    """
+    选出需要回访的比赛：比赛日期在最近 days 天内，且超过 interval_hours 没有检查过上游
+
+    返回 {match_id: {'updated_at': ..., 'etag': ..., 'last_modified': ...}}，
+    updated_at 优先取上次记录的上游版本，没有记录时用比赛日期（导入时即取自上游 updated_at）。
+    """
+    now = datetime.now()
+    query = db.session.query(
+        Match.match_id, Match.date, MatchSource.upstream_updated_at, MatchSource.etag, MatchSource.last_modified
+    ).outerjoin(MatchSource, MatchSource.match_id == Match.match_id).filter(
+        Match.date >= now - timedelta(days=days),
+        MatchSource.checked_at.is_(None) | (MatchSource.checked_at < now - timedelta(hours=interval_hours))
+    ).order_by(Match.match_id)
+    if limit:
+        query = query.limit(limit)
+    return {
+        row.match_id: {
+            'updated_at': row.upstream_updated_at or row.date,
+            'etag': row.etag,
+            'last_modified': row.last_modified
+        }
+        for row in query
+    }
+
+
+def mark_checked(checked, candidates):
+    """记录上游未变化的比赛本次已检查，checked 为 {match_id: validators}"""
+    if not checked:
+        return
+    now = datetime.now()
+    existing = {row.match_id for row in db.session.query(MatchSource.match_id).filter(
+        MatchSource.match_id.in_(list(checked))
+    )}
+    rows = []
+    for match_id, validators in checked.items():
+        validators = validators or {}
+        candidate = candidates.get(match_id, {})
+        rows.append({
+            'match_id': match_id,
+            'upstream_updated_at': candidate.get('updated_at'),
+            'etag': validators.get('etag') or candidate.get('etag'),
+            'last_modified': validators.get('last_modified') or candidate.get('last_modified'),
+            'checked_at': now
+        })
+    updates = [row for row in rows if row['match_id'] in existing]
+    inserts = [row for row in rows if row['match_id'] not in existing]
+    if updates:
+        # 按主键批量更新
+        db.session.execute(update(MatchSource), updates)
+    if inserts:
+        db.session.execute(insert(MatchSource), inserts)
+    db.session.commit()
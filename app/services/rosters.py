@@ -0,0 +1,73 @@
+# 战队当前阵容：取每支战队最近一场比赛的五名选手，进程内缓存 ROSTER_CACHE_TTL 秒
+#
+# 未命中缓存的战队逐个按 team_id 取 date 最大的一行（ORDER BY date DESC LIMIT 1），
+# 走 ix_teams_team_id_date 倒序扫描，只读取最新的一条记录，耗时与战队的比赛场数无关。
+
+import time
+import threading
+
+from app import db
+from app.models.team import Team
+from app.services.data_version import on_change
+from config import ROSTER_CACHE_TTL
+
+# 阵容字段 -> 位置
+POSITIONS = {
+    'player_a_id': '上单',
+    'player_b_id': '打野',
+    'player_c_id': '中单',
+    'player_d_id': '射手',
+    'player_e_id': '辅助'
+}
+
+_cache = {}  # team_id -> (过期时间, 阵容)
+_lock = threading.Lock()
+CACHE_SIZE = 5000  # 缓存的战队数上限，超过后整体清空
+
+
+@on_change
+def _clear():
+    with _lock:
+        _cache.clear()
+
+
+def _load_one(team_id):
+    row = db.session.query(*[getattr(Team, field) for field in POSITIONS]).filter(
+        Team.team_id == team_id
+    ).order_by(Team.date.desc(), Team.id.desc()).limit(1).first()
+    if row is None:
+        return []
+    return [
+        {'player_name': getattr(row, field), 'position': position}
+        for field, position in POSITIONS.items() if getattr(row, field)
+    ]
+
+
+def _load(team_ids):
+    return {team_id: _load_one(team_id) for team_id in team_ids}
+
+
+def current_rosters(team_ids):
+    """返回 {team_id: [{'player_name', 'position'}]}，没有比赛记录的战队为空列表"""
+    now = time.monotonic()
+    result, missing = {}, []
+    with _lock:
+        for team_id in set(team_ids):
+            cached = _cache.get(team_id)
+            if cached and cached[0] > now:
+                result[team_id] = cached[1]
+            else:
+                missing.append(team_id)
+    if missing:
+        loaded = _load(missing)
+        with _lock:
+            if len(_cache) + len(loaded) > CACHE_SIZE:
+                _cache.clear()
+            for team_id, roster in loaded.items():
+                _cache[team_id] = (now + ROSTER_CACHE_TTL, roster)
+        result.update(loaded)
+    return result
+
+
+def current_roster(team_id):
+    return current_rosters([team_id])[team_id]
@@ -1,150 +1,319 @@
 # 与scripts/import_data.py高度相关，结合models
 
+import io
 import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from app.models.match import Match
 from app.models.player import Player
 from datetime import datetime
+from config import PROXY, SPIDER_BASE_URL, SPIDER_TIMEOUT, SPIDER_PARSER
+from app.services.archive import archive_enabled, save_payload
 
-def get_match_data(match_id):
-    try:
-        url = f'https://img.scoregg.com/match/result/{match_id}.json?_=1660730052072'
-        res = requests.get(url)
-        res.raise_for_status()
-
-        # 这里加载json文件，其中data部分主体非常大
-        raw_data = json.loads(res.text)
-        info0 = raw_data.get('data', {}) #原始json文件中data部分
-        info = info0.get('result_list') # 主体数据
-        dragon_list = info0.get('dragon_list', {}) #部分额外数据
-
-        # 不在 result_list 的全局数据,则直接结束
-        date_str = info0.get('updated_at', None)
+# 流式解析和快速解析都是可选依赖，未安装时退回标准库 json
+try:
+    import ijson
+    # 纯 Python 后端逐个事件解析，每场比赛的 CPU 开销比 json.loads 高得多，只使用 C 后端（yajl2_c）
+    if ijson.backend != 'yajl2_c':
+        ijson = None
+except ImportError:
+    ijson = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MATCH_RESULT_PATH = '/match/result/{match_id}.json?_=1660730052072'
+
+# 条件请求时上游返回 304 的标记
+NOT_MODIFIED = object()
+
+# data 部分里真正用到的字段，其余（体积很大的部分）解析时直接丢弃
+MATCH_DATA_KEYS = ('result_list', 'dragon_list', 'updated_at', 'max_mvp', 'max_beiguo')
+
+# 全局共享的 Session，所有线程复用同一个连接池，避免每场比赛都重新建立 TCP/TLS 连接
+_session = None
+_session_lock = threading.Lock()
+
+
+class SkipMatch(Exception):
+    """比赛数据存在，但不需要入库（例如非 LOL 比赛）"""
+
+
+def get_session(pool_size=10):
+    """获取共享的 requests.Session，pool_size 决定连接池内最多保持的连接数"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session(pool_size)
+        return _session
+
+
+def create_session(pool_size=10):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if PROXY:
+        session.proxies = {'http': PROXY, 'https': PROXY}
+    return session
+
+
+def fetch_match_json(match_id, session=None, base_url=None):
+    """抓取比赛原始 JSON，比赛不存在（404）时返回 None，其余网络错误直接抛出"""
+    raw_data, _ = fetch_match_response(match_id, session=session, base_url=base_url)
+    return raw_data
+
+
+def fetch_match_response(match_id, session=None, base_url=None, etag=None, last_modified=None):
+    """
+    抓取比赛原始 JSON，返回 (raw_data, validators)
+
+    比赛不存在（404）时 raw_data 为 None；传入 etag/last_modified 且上游未变化（304）时 raw_data 为 NOT_MODIFIED。
+    validators 是响应里的 {'etag': ..., 'last_modified': ...}，下次用于条件请求。
+    """
+    session = session or get_session()
+    url = (base_url or SPIDER_BASE_URL) + MATCH_RESULT_PATH.format(match_id=match_id)
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    # 开启归档时需要完整的原始字节，不走流式解析
+    if SPIDER_PARSER == 'stream' and ijson is not None and not archive_enabled():
+        # 边下载边解析，不在内存中保留完整的响应体
+        res = session.get(url, headers=headers, timeout=SPIDER_TIMEOUT, stream=True)
         try:
-            date = datetime.strptime(date_str, "%Y%m%d%H%M%S") if date_str else None
-        except ValueError:
-            date = None
-        mvp = info0.get('max_mvp', {}).get('nickname', None)
-        beiguo = info0.get('max_beiguo', {}).get('nickname', None)
-
-        # 防止 result_list 是 None
-        if not isinstance(info, dict):
-            print(f"跳过比赛 {match_id}，info 类型异常: {type(info)}")
-            return None
+            if res.status_code == 404:
+                return None, None
+            if res.status_code == 304:
+                return NOT_MODIFIED, _validators(res)
+            res.raise_for_status()
+            res.raw.decode_content = True
+            return select_match_json(res.raw), _validators(res)
+        finally:
+            # 读完剩余内容后连接才能放回连接池复用
+            res.raw.drain_conn()
+            res.close()
+
+    res = session.get(url, headers=headers, timeout=SPIDER_TIMEOUT)
+    if res.status_code == 404:
+        return None, None
+    if res.status_code == 304:
+        return NOT_MODIFIED, _validators(res)
+    res.raise_for_status()
+
+    # 这里加载json文件，其中data部分主体非常大
+    raw_data = decode_match_json(res.content)
+    if archive_enabled():
+        save_payload(match_id, raw_data['data'].get('updated_at'), res.content)
+    return raw_data, _validators(res)
+
+
+def _validators(res):
+    return {'etag': res.headers.get('ETag'), 'last_modified': res.headers.get('Last-Modified')}
+
+
+def probe_match(match_id, session=None, base_url=None):
+    """只发送 HEAD 请求判断比赛数据文件是否存在，不下载内容"""
+    session = session or get_session()
+    url = (base_url or SPIDER_BASE_URL) + MATCH_RESULT_PATH.format(match_id=match_id)
+    res = session.head(url, timeout=SPIDER_TIMEOUT)
+    return res.status_code == 200
+
+
+def decode_match_json(content, parser=None):
+    """
+    把响应字节解析为 {'data': {...}}，data 中只保留 MATCH_DATA_KEYS
+
+    parser: orjson 快速整体解析 / json 标准库 / stream 流式提取（需要 ijson 的 C 后端），
+    默认使用 config.SPIDER_PARSER，对应依赖未安装时退回标准库。
+    """
+    parser = parser or SPIDER_PARSER
+    if parser == 'stream' and ijson is not None:
+        return select_match_json(io.BytesIO(content))
+    if parser == 'orjson' and orjson is not None:
+        raw_data = orjson.loads(content)
+    else:
+        # json.loads 可以直接接收 bytes，省去一次解码成 str 的拷贝
+        raw_data = json.loads(content)
+    data = raw_data.get('data')
+    if not isinstance(data, dict):
+        return {'data': {}}
+    return {'data': {key: data[key] for key in MATCH_DATA_KEYS if key in data}}
+
 
-        # 如果战队名包含中文，跳过比赛
-        red_team = info.get('red_name', None)
-        blue_team = info.get('blue_name', None)
-        if is_chinese(red_team or "") or is_chinese(blue_team or ""):
-            print(f"跳过比赛 {match_id}，因为战队名包含中文。")
+def select_match_json(fp):
+    """用 ijson 逐个事件读取，只为 data 下需要的字段构建对象，其余部分只扫描不构建"""
+    selected = {}
+    builder = None
+    depth = 0
+    key = None
+    for prefix, event, value in ijson.parse(fp):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+            if depth == 0:
+                selected[key] = builder.value
+                builder = None
+                if len(selected) == len(MATCH_DATA_KEYS):
+                    break  # 需要的字段都拿到了，后面的内容不再解析
+            continue
+        if prefix == 'data' and event == 'map_key' and value in MATCH_DATA_KEYS:
+            key = value
+            builder = ijson.ObjectBuilder()
+        elif prefix == 'data' and event == 'end_map':
+            break
+    return {'data': selected}
+
+
+def get_match_data(match_id, session=None, base_url=None):
+    try:
+        raw_data = fetch_match_json(match_id, session=session, base_url=base_url)
+        if raw_data is None:
             return None
-        # 游戏时间（秒）
-        duration = int(info.get('game_time_m', 0) or 0) * 60 + int(info.get('game_time_s', 0) or 0)
-        teams = ['red', 'blue']
+        return parse_match_data(raw_data, match_id)
+    except SkipMatch as e:
+        print(f"跳过比赛 {match_id}，{e}")
+        return None
+    except Exception as e:
+        print(f"[ERROR] 爬取比赛 {match_id} 时出错: {e}")
+        return None
+
+
+def parse_match_data(raw_data, match_id):
+    """把原始 JSON 解析为 matches/teams/players 三部分，不涉及任何网络请求"""
+    info0 = raw_data.get('data', {}) #原始json文件中data部分
+    info = info0.get('result_list') # 主体数据
+    dragon_list = info0.get('dragon_list', {}) #部分额外数据
+
+    # 不在 result_list 的全局数据,则直接结束
+    date_str = info0.get('updated_at', None)
+    try:
+        date = datetime.strptime(date_str, "%Y%m%d%H%M%S") if date_str else None
+    except ValueError:
+        date = None
+    mvp = info0.get('max_mvp', {}).get('nickname', None)
+    beiguo = info0.get('max_beiguo', {}).get('nickname', None)
+
+    # 防止 result_list 是 None
+    if not isinstance(info, dict):
+        print(f"跳过比赛 {match_id}，info 类型异常: {type(info)}")
+        return None
+
+    # 如果战队名包含中文，跳过比赛
+    red_team = info.get('red_name', None)
+    blue_team = info.get('blue_name', None)
+    if is_chinese(red_team or "") or is_chinese(blue_team or ""):
+        raise SkipMatch("因为战队名包含中文。")
+    # 游戏时间（秒）
+    duration = int(info.get('game_time_m', 0) or 0) * 60 + int(info.get('game_time_s', 0) or 0)
+    teams = ['red', 'blue']
 
-        # 爬取的三个主体：
+    # 爬取的三个主体：
 
-        #比赛数据 ，包括比赛ID，比赛日期，比赛时长，红蓝方队名
-        matches_data = []
+    #比赛数据 ，包括比赛ID，比赛日期，比赛时长，红蓝方队名
+    matches_data = []
 
-        match_data= {
+    match_data= {
+        'match_id': match_id,  # 比赛ID
+        'date': date,  # 比赛日期
+        'game_time':duration,
+        'red_team_name':red_team,
+        'blue_team_name': blue_team,
+        'mvp':mvp,
+        'win_team_name':red_team if info.get('red_result') == "1" else blue_team
+    }
+    matches_data.append(match_data)
+
+    # 战队数据，这里遍历红蓝方
+
+    teams_data=[]
+    for team in teams:
+        result = int(info.get(f'{team}_result', 0) or 0)
+        # 获取该队的首杀数据（注意用 team 变量，不是字符串 '{team}'）
+        team_dragon = dragon_list.get(team, {})
+        team_data = {
             'match_id': match_id,  # 比赛ID
             'date': date,  # 比赛日期
-            'game_time':duration,
-            'red_team_name':red_team,
-            'blue_team_name': blue_team,
-            'mvp':mvp,
-            'win_team_name':red_team if info.get('red_result') == "1" else blue_team
+            'team_name': info.get(f'{team}_name', None),  # 战队名
+            'team_flag': info.get(f'{team}_flag', None),  # 战队图标（若有 flag 可改字段名）
+            'result': result,  # 获胜情况
+            'kill': int(info.get(f'{team}_kill')) if info.get(f'{team}_kill') is not None else None,  # 总击杀
+            'death': int(info.get(f'{team}_die')) if info.get(f'{team}_die') is not None else None,  # 总死亡
+            'assist': int(info.get(f'{team}_asses')) if info.get(f'{team}_asses') is not None else None,  # 总助攻
+            'attack': int(info.get(f'{team}_attack')) if info.get(f'{team}_attack') is not None else None,  # 总输出
+            'money': round(convert_to_float(info.get(f'{team}_money'))) if info.get(f'{team}_money') is not None else None,# 总经济（整数）
+            'tower': info.get(f'{team}_tower', None),  # 战队推塔
+            'small_dargon': info.get(f'{team}_small_dargon', None),  # 战队小龙
+            'big_dargon': info.get(f'{team}_big_dargon', None),  # 战队大龙
+            'riftHeraldKills': info.get(f'{team}_riftHeraldKills', None),  # 战队峡谷先锋
+            'elder': info.get(f'{team}_elder', None),  # 战队远古巨龙
+            'void_grub': info.get(f'{team}_void_grub', None),  # 战队巢虫 确定
+            'firstHerald': team_dragon.get('firstHerald', None),  # 第一个峡谷先锋
+            'firstBloodKill': team_dragon.get('firstBloodKill', None),  # 一血
+            'firstTowerKill': team_dragon.get('firstTowerKill', None),  # 一塔
+            'firstDragonKill': team_dragon.get('firstDragonKill', None),  # 一龙
+            'firstBaronKill': team_dragon.get('firstBaronKill', None),  # 一巨龙
+            'first5Kill': team_dragon.get('first5Kill', None),  # 首次五杀
+            'first10Kill': team_dragon.get('first10Kill', None),  # 首次十杀
+            'game_time': duration,  # 游戏时间（秒）
+            'mvp': mvp if result == 1 else None,  # 获胜方MVP
+            'beiguo': beiguo if result == 0 else None,  # 失败方背锅
+            'player_a_id':info.get(f'{team}_star_a_name', None),
+            'player_b_id':info.get(f'{team}_star_b_name', None),
+            'player_c_id':info.get(f'{team}_star_c_name', None),
+            'player_d_id':info.get(f'{team}_star_d_name', None),
+            'player_e_id':info.get(f'{team}_star_e_name', None),
         }
-        matches_data.append(match_data)
+        teams_data.append(team_data)
 
-        # 战队数据，这里遍历红蓝方
 
-        teams_data=[]
-        for team in teams:
-            result = int(info.get(f'{team}_result', 0) or 0)
-            # 获取该队的首杀数据（注意用 team 变量，不是字符串 '{team}'）
-            team_dragon = dragon_list.get(team, {})
-            team_data = {
-                'match_id': match_id,  # 比赛ID
+    # 选手数据 这里遍历红蓝方各五个位置，十个选手的数据
+    list_positions = ['a', 'b', 'c', 'd', 'e']
+    players_data = []
+    for team in ['red', 'blue']:
+        for pos in list_positions:
+            prefix = f"{team}_star_{pos}_"
+            prefix2 = f"{team}_hero_{pos}_"
+            player_data = {
+                'name': info.get(f"{prefix}name", None),  # 选手名
+                'pic': info.get(f"{prefix}pic", None),  # 选手图片URL
                 'date': date,  # 比赛日期
-                'team_name': info.get(f'{team}_name', None),  # 战队名
-                'team_flag': info.get(f'{team}_flag', None),  # 战队图标（若有 flag 可改字段名）
-                'result': result,  # 获胜情况
-                'kill': int(info.get(f'{team}_kill')) if info.get(f'{team}_kill') is not None else None,  # 总击杀
-                'death': int(info.get(f'{team}_die')) if info.get(f'{team}_die') is not None else None,  # 总死亡
-                'assist': int(info.get(f'{team}_asses')) if info.get(f'{team}_asses') is not None else None,  # 总助攻
-                'attack': int(info.get(f'{team}_attack')) if info.get(f'{team}_attack') is not None else None,  # 总输出
-                'money': convert_to_float(info.get(f'{team}_money')) if info.get(f'{team}_money') is not None else None,# 总经济
-                'tower': info.get(f'{team}_tower', None),  # 战队推塔
-                'small_dargon': info.get(f'{team}_small_dargon', None),  # 战队小龙
-                'big_dargon': info.get(f'{team}_big_dargon', None),  # 战队大龙
-                'riftHeraldKills': info.get(f'{team}_riftHeraldKills', None),  # 战队峡谷先锋
-                'elder': info.get(f'{team}_elder', None),  # 战队远古巨龙
-                'void_grub': info.get(f'{team}_void_grub', None),  # 战队巢虫 确定
-                'firstHerald': team_dragon.get('firstHerald', None),  # 第一个峡谷先锋
-                'firstBloodKill': team_dragon.get('firstBloodKill', None),  # 一血
-                'firstTowerKill': team_dragon.get('firstTowerKill', None),  # 一塔
-                'firstDragonKill': team_dragon.get('firstDragonKill', None),  # 一龙
-                'firstBaronKill': team_dragon.get('firstBaronKill', None),  # 一巨龙
-                'first5Kill': team_dragon.get('first5Kill', None),  # 首次五杀
-                'first10Kill': team_dragon.get('first10Kill', None),  # 首次十杀
-                'game_time': duration,  # 游戏时间（秒）
-                'mvp': mvp if result == 1 else None,  # 获胜方MVP
-                'beiguo': beiguo if result == 0 else None,  # 失败方背锅
-                'player_a_id':info.get(f'{team}_star_a_name', None),
-                'player_b_id':info.get(f'{team}_star_b_name', None),
-                'player_c_id':info.get(f'{team}_star_c_name', None),
-                'player_d_id':info.get(f'{team}_star_d_name', None),
-                'player_e_id':info.get(f'{team}_star_e_name', None),
+                'hero': info.get(f"{prefix2}name", None),  # 英雄名
+                'hero_lv': info.get(f"{prefix2}lv", None),  # 英雄等级
+                'kda': info.get(f"{prefix}kda", None),  # KDA
+                'kills': info.get(f"{prefix}kills", None),  # 击杀
+                'deaths': info.get(f"{prefix}deaths", None),  # 死亡
+                'assists': info.get(f"{prefix}assists", None),  # 助攻
+                'part': convert_percent(info.get(f"{prefix}part", None)),  # 参团率（百分数）
+                'atk': info.get(f"{prefix}atk_o", None),  # 总输出
+                'atk_p': info.get(f"{prefix}atk_p", None),  # 输出占比
+                'atk_m': info.get(f"{prefix}atk_m", None),  # 分均输出
+                'def_': info.get(f"{prefix}def_o", None),  # 承伤总量
+                'def_p': info.get(f"{prefix}def_p", None),  # 承伤占比
+                'def_m': info.get(f"{prefix}def_m", None),  # 分均承伤
+                'hits': info.get(f"{prefix}hits", None),  # 补刀数
+                'adc_m': info.get(f"{prefix}adc_m", None),  # 分均补刀
+                'money': info.get(f"{prefix}money_o", None),  # 总经济
+                'money_M': info.get(f"{prefix}money_M", None),  # 分钟经济
+                'wp_m': info.get(f"{prefix}wp_m", None),  # 分均插眼（待确认）
+                'mvp': int(info.get(f"{prefix}mvp", 0)),  # 是否MVP（1/0）
+                'beiguo': convert_to_int(info.get(f"{prefix}beiguo", 0)),  # 是否背锅（1/0）
+                'team_name': info.get(f"{team}_name", None),  # 战队名
+                'position': pos,  # 位置
+                'game_time': duration,  # 游戏时间
+                'result': convert_to_int(info.get(f"{team}_result", None)),  # 胜负（1 胜 0 负）
+                'match_id': match_id  # 比赛ID
             }
-            teams_data.append(team_data)
-
-
-        # 选手数据 这里遍历红蓝方各五个位置，十个选手的数据
-        list_positions = ['a', 'b', 'c', 'd', 'e']
-        players_data = []
-        for team in ['red', 'blue']:
-            for pos in list_positions:
-                prefix = f"{team}_star_{pos}_"
-                prefix2 = f"{team}_hero_{pos}_"
-                player_data = {
-                    'name': info.get(f"{prefix}name", None),  # 选手名
-                    'pic': info.get(f"{prefix}pic", None),  # 选手图片URL
-                    'date': date,  # 比赛日期
-                    'hero': info.get(f"{prefix2}name", None),  # 英雄名
-                    'hero_lv': info.get(f"{prefix2}lv", None),  # 英雄等级
-                    'kda': info.get(f"{prefix}kda", None),  # KDA
-                    'kills': info.get(f"{prefix}kills", None),  # 击杀
-                    'deaths': info.get(f"{prefix}deaths", None),  # 死亡
-                    'assists': info.get(f"{prefix}assists", None),  # 助攻
-                    'part': info.get(f"{prefix}part", None),  # 参团率
-                    'atk': info.get(f"{prefix}atk_o", None),  # 总输出
-                    'atk_p': info.get(f"{prefix}atk_p", None),  # 输出占比
-                    'atk_m': info.get(f"{prefix}atk_m", None),  # 分均输出
-                    'def_': info.get(f"{prefix}def_o", None),  # 承伤总量
-                    'def_p': info.get(f"{prefix}def_p", None),  # 承伤占比
-                    'def_m': info.get(f"{prefix}def_m", None),  # 分均承伤
-                    'hits': info.get(f"{prefix}hits", None),  # 补刀数
-                    'adc_m': info.get(f"{prefix}adc_m", None),  # 分均补刀
-                    'money': info.get(f"{prefix}money_o", None),  # 总经济
-                    'money_M': info.get(f"{prefix}money_M", None),  # 分钟经济
-                    'wp_m': info.get(f"{prefix}wp_m", None),  # 分均插眼（待确认）
-                    'mvp': int(info.get(f"{prefix}mvp", 0)),  # 是否MVP（1/0）
-                    'beiguo': int(info.get(f"{prefix}beiguo", 0)),  # 是否背锅（1/0）
-                    'team_name': info.get(f"{team}_name", None),  # 战队名
-                    'position': pos,  # 位置
-                    'game_time': duration,  # 游戏时间
-                    'result': info.get(f"{team}_result", None),  # 胜负
-                    'match_id': match_id  # 比赛ID
-                }
-                players_data.append(player_data)
-
-        return {'matches': matches_data,'teams':teams_data, 'players': players_data}
+            players_data.append(player_data)
 
-    except Exception as e:
-        print(f"[ERROR] 爬取比赛 {match_id} 时出错: {e}")
-        return None
+    return {'matches': matches_data,'teams':teams_data, 'players': players_data}
 
 def is_chinese(string): # 因为数据中混有其他游戏，通过chinese判断可以快速筛选出lol比赛数据
     return any(u'\u4e00' <= ch <= u'\u9fff' for ch in string)
@@ -159,3 +328,21 @@ def convert_to_float(value):
             return float(value_str)
     except Exception:
         return 0
+
+
+def convert_to_int(value):
+    # 上游的 0/1 标记有时是字符串，统一转为整数，缺失时返回 None
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def convert_percent(value):
+    # 参团率形如 "65.2%" 或 "65.2"，转为百分数数值
+    if value is None:
+        return None
+    try:
+        return round(float(str(value).strip().rstrip('%')), 2)
+    except ValueError:
+        return None
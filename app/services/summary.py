@@ -0,0 +1,259 @@
+# 选手/战队汇总表的维护：导入时按批次增量更新（同时更新全局计数），另外提供全量重建和一致性检查
+
+from sqlalchemy import func, case, insert
+
+from app import db
+from app.models.player import Player
+from app.models.team import Team
+from app.models.summary import PlayerSummary, TeamSummary
+from app.services.counters import bump_counters, reconcile_counters, read_counters, count_exact
+from app.services.upsert import insert_ignoring_duplicates
+
+COUNTERS = ('appearances', 'wins', 'kills', 'deaths', 'assists')
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _new_delta():
+    delta = dict.fromkeys(COUNTERS, 0)
+    delta['latest'] = None
+    return delta
+
+
+def _player_deltas(players, sign=1):
+    deltas = {}
+    for player in players:
+        name = player.get('name')
+        if not name:
+            continue
+        delta = deltas.setdefault(name, _new_delta())
+        delta['appearances'] += sign
+        delta['wins'] += sign * (1 if _to_int(player.get('result')) == 1 else 0)
+        delta['kills'] += sign * _to_int(player.get('kills'))
+        delta['deaths'] += sign * _to_int(player.get('deaths'))
+        delta['assists'] += sign * _to_int(player.get('assists'))
+        date = player.get('date')
+        if sign > 0 and date and (delta['latest'] is None or date >= delta['latest'][0]):
+            delta['latest'] = (date, player.get('team_name'), player.get('position'), player.get('pic'))
+    return deltas
+
+
+def _team_deltas(teams, sign=1):
+    deltas = {}
+    for team in teams:
+        name = team.get('team_name')
+        if not name:
+            continue
+        delta = deltas.setdefault(name, _new_delta())
+        delta['appearances'] += sign
+        delta['wins'] += sign * (1 if _to_int(team.get('result')) == 1 else 0)
+        delta['kills'] += sign * _to_int(team.get('kill'))
+        delta['deaths'] += sign * _to_int(team.get('death'))
+        delta['assists'] += sign * _to_int(team.get('assist'))
+        date = team.get('date')
+        if sign > 0 and date and (delta['latest'] is None or date >= delta['latest'][0]):
+            delta['latest'] = (date,)
+    return deltas
+
+
+def _lock_rows(model, key_column, names):
+    """
+    补齐缺少的汇总行（出场次数为 0）后锁住这些名称的汇总行，返回 {名称: 行}
+
+    新名称先用忽略重复的插入写入，其他导入进程同时写入同一个新名称时不会因唯一键冲突让整批比赛失败；
+    之后 FOR UPDATE 锁的都是已存在的行，MySQL 上不会在不存在记录的间隙锁上互相死锁。
+    """
+    key = key_column.key
+    insert_ignoring_duplicates(model, [{key: name} for name in sorted(names)])
+    return {
+        getattr(row, key): row
+        for row in model.query.filter(key_column.in_(list(names))).with_for_update()
+    }
+
+
+def _apply(model, key_column, deltas, latest_fields):
+    """
+    把增量合并进汇总表，锁住涉及的行，避免多个导入进程同时更新同一选手/战队
+
+    返回不同名称数的变化：出场次数从 0 变为正数记 +1，反之记 -1。
+    """
+    if not deltas:
+        return 0
+    distinct_delta = 0
+    existing = _lock_rows(model, key_column, deltas)
+    for name, delta in deltas.items():
+        row = existing.get(name)
+        if row is None:
+            continue
+        before = row.appearances or 0
+        for field in COUNTERS:
+            setattr(row, field, (getattr(row, field) or 0) + delta[field])
+        distinct_delta += (row.appearances > 0) - (before > 0)
+        latest = delta['latest']
+        if latest and (row.latest_date is None or latest[0] >= row.latest_date):
+            row.latest_date = latest[0]
+            for field, value in zip(latest_fields, latest[1:]):
+                setattr(row, field, value)
+    return distinct_delta
+
+
+def match_names(match_ids):
+    """返回这些比赛涉及的 (选手名集合, 战队名集合)，重写比赛前调用"""
+    players = {name for name, in db.session.query(Player.name).filter(
+        Player.match_id.in_(match_ids), Player.name.isnot(None)
+    )}
+    teams = {name for name, in db.session.query(Team.team_name).filter(
+        Team.match_id.in_(match_ids), Team.team_name.isnot(None)
+    )}
+    return players, teams
+
+
+def _recompute(model, key_column, names, aggregated):
+    """用明细表的聚合结果覆盖这些名称的汇总行，明细中已没有记录的名称删除汇总行，返回不同名称数的变化"""
+    existing = _lock_rows(model, key_column, aggregated)
+    existing.update(
+        (getattr(row, key_column.key), row)
+        for row in model.query.filter(key_column.in_(list(names - aggregated.keys()))).with_for_update()
+    )
+    before = sum(1 for row in existing.values() if (row.appearances or 0) > 0)
+    for name in names:
+        row, values = existing.get(name), aggregated.get(name)
+        if row is None:
+            continue
+        if values is None:
+            db.session.delete(row)
+            continue
+        for field, value in values.items():
+            setattr(row, field, value)
+    return len(aggregated) - before
+
+
+def apply_match_summaries(teams, players, matches=0, rewritten_players=(), rewritten_teams=()):
+    """
+    写入一批比赛后调用，teams/players 为导入时的字典列表，matches 为比赛表净增的行数，
+    需与比赛数据在同一事务内提交
+
+    rewritten_players/rewritten_teams 为被重写的比赛（回放、刷新时库中已有的比赛）重写前后涉及的名称，
+    这些名称按明细表重新计算汇总行（最近一场等字段可能回退），其余名称只按这批数据增量累加，
+    代价与批次大小相关，与历史比赛数无关。
+    """
+    rewritten_players = {name for name in rewritten_players if name}
+    rewritten_teams = {name for name in rewritten_teams if name}
+    player_deltas = {name: delta for name, delta in _player_deltas(players).items() if name not in rewritten_players}
+    team_deltas = {name: delta for name, delta in _team_deltas(teams).items() if name not in rewritten_teams}
+
+    players_changed = _apply(PlayerSummary, PlayerSummary.name, player_deltas,
+                             ('latest_team', 'latest_position', 'latest_pic'))
+    teams_changed = _apply(TeamSummary, TeamSummary.team_name, team_deltas, ())
+    if rewritten_players:
+        players_changed += _recompute(PlayerSummary, PlayerSummary.name, rewritten_players,
+                                      aggregate_players(rewritten_players))
+    if rewritten_teams:
+        teams_changed += _recompute(TeamSummary, TeamSummary.team_name, rewritten_teams,
+                                    aggregate_teams(rewritten_teams))
+    bump_counters(matches=matches, players=players_changed, teams=teams_changed)
+
+
+def aggregate_players(names=None):
+    """从 players 明细表计算每个选手的汇总数据，names 不为空时只计算这些选手"""
+    query = db.session.query(
+        Player.name,
+        func.count(Player.id).label('appearances'),
+        func.sum(case((Player.result == 1, 1), else_=0)).label('wins'),
+        func.coalesce(func.sum(Player.kills), 0).label('kills'),
+        func.coalesce(func.sum(Player.deaths), 0).label('deaths'),
+        func.coalesce(func.sum(Player.assists), 0).label('assists'),
+        func.max(Player.date).label('latest_date'),
+        func.max(Player.season).label('latest_season')
+    ).filter(Player.name.isnot(None))
+    if names is not None:
+        query = query.filter(Player.name.in_(list(names)))
+    stats = query.group_by(Player.name).subquery()
+
+    # 取每个选手最近一场比赛的战队、位置和头像
+    rows = db.session.query(stats, Player.team_name, Player.position, Player.pic).outerjoin(
+        Player, (Player.name == stats.c.name) & (Player.season == stats.c.latest_season) &
+        (Player.date == stats.c.latest_date)
+    )
+    result = {}
+    for row in rows:
+        result[row.name] = {
+            'name': row.name,
+            **{field: int(getattr(row, field) or 0) for field in COUNTERS},
+            'latest_date': row.latest_date,
+            'latest_team': row.team_name,
+            'latest_position': row.position,
+            'latest_pic': row.pic
+        }
+    return result
+
+
+def aggregate_teams(names=None):
+    """从 teams 明细表计算每个战队的汇总数据，names 不为空时只计算这些战队"""
+    query = db.session.query(
+        Team.team_name,
+        func.count(Team.id).label('appearances'),
+        func.sum(case((Team.result == 1, 1), else_=0)).label('wins'),
+        func.coalesce(func.sum(Team.kill), 0).label('kills'),
+        func.coalesce(func.sum(Team.death), 0).label('deaths'),
+        func.coalesce(func.sum(Team.assist), 0).label('assists'),
+        func.max(Team.date).label('latest_date')
+    ).filter(Team.team_name.isnot(None))
+    if names is not None:
+        query = query.filter(Team.team_name.in_(list(names)))
+    rows = query.group_by(Team.team_name)
+    return {
+        row.team_name: {
+            'team_name': row.team_name,
+            **{field: int(getattr(row, field) or 0) for field in COUNTERS},
+            'latest_date': row.latest_date
+        }
+        for row in rows
+    }
+
+
+def rebuild_summaries(chunk_size=1000):
+    """清空汇总表并从明细表全量重建"""
+    db.session.query(PlayerSummary).delete()
+    db.session.query(TeamSummary).delete()
+    for model, rows in ((PlayerSummary, aggregate_players()), (TeamSummary, aggregate_teams())):
+        values = list(rows.values())
+        for i in range(0, len(values), chunk_size):
+            db.session.execute(insert(model), values[i:i + chunk_size])
+    db.session.commit()
+    # 汇总表重建后全局计数也按明细表重新核对
+    reconcile_counters()
+
+
+def check_summaries():
+    """对比汇总表与明细表的实时聚合结果，返回不一致的描述列表（为空表示一致）"""
+    problems = []
+    checks = (
+        ('选手', PlayerSummary, PlayerSummary.name, aggregate_players()),
+        ('战队', TeamSummary, TeamSummary.team_name, aggregate_teams()),
+    )
+    for label, model, key_column, expected in checks:
+        actual = {getattr(row, key_column.key): row for row in model.query}
+        for name in expected.keys() - actual.keys():
+            problems.append(f"{label} {name} 缺少汇总记录")
+        for name in actual.keys() - expected.keys():
+            problems.append(f"{label} {name} 的汇总记录在明细表中不存在")
+        for name in expected.keys() & actual.keys():
+            for field in COUNTERS + ('latest_date',):
+                want, got = expected[name][field], getattr(actual[name], field)
+                if want != got:
+                    problems.append(f"{label} {name} 的 {field} 不一致：明细 {want}，汇总 {got}")
+
+    counters = read_counters()
+    if counters is None:
+        problems.append("全局计数尚未初始化，请执行 --reconcile-counters")
+    else:
+        for name, want in count_exact().items():
+            if counters[name] != want:
+                problems.append(f"全局计数 {name} 不一致：明细 {want}，计数 {counters[name]}")
+    return problems
@@ -0,0 +1,35 @@
+# 多行插入时跳过唯一键已存在的行：维度表和汇总表在多个导入进程并发写入同一个新名称时共用
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+
+def insert_ignoring_duplicates(model, rows):
+    """
+    插入 rows，唯一键已存在（包括其他导入进程刚插入）的行跳过，不影响其他行
+
+    调用方应按唯一键排序 rows，多个进程按相同顺序加锁，MySQL 上不会互相死锁。
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == 'mysql':
+        pk = model.__mapper__.primary_key[0]
+        stmt = mysql.insert(model).on_duplicate_key_update({pk.name: pk})
+    elif dialect == 'postgresql':
+        stmt = postgresql.insert(model).on_conflict_do_nothing()
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(model).on_conflict_do_nothing()
+    else:
+        # 其他数据库逐行用保存点插入，冲突只回滚这一行
+        for row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(model), [row])
+            except IntegrityError:
+                pass
+        return
+    db.session.execute(stmt, rows)
@@ -0,0 +1,111 @@
+# 历史回填的分片任务队列：把比赛ID切成区间存进 crawl_ranges 表，多个进程/机器通过租约领取
+#
+# 领取和续约都是带条件的 UPDATE，依靠影响行数判断是否抢到，MySQL 和 SQLite 都适用。
+# worker 崩溃后租约自然过期，区间会被其他 worker 重新领取。
+
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.crawl import CrawlRange
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+
+
+class LeaseLost(Exception):
+    """租约已过期或被其他 worker 接手，worker 应停止处理当前区间"""
+
+
+def enqueue_ranges(start_id, end_id, range_size=1000):
+    """把 [start_id, end_id] 切成若干区间入队，已存在的区间不会重复创建，返回新建数量"""
+    existing = {row.start_id for row in db.session.query(CrawlRange.start_id).filter(
+        CrawlRange.start_id >= start_id, CrawlRange.start_id <= end_id
+    )}
+    created = 0
+    for range_start in range(start_id, end_id + 1, range_size):
+        if range_start in existing:
+            continue
+        db.session.add(CrawlRange(
+            start_id=range_start,
+            end_id=min(range_start + range_size - 1, end_id),
+            status=STATUS_PENDING
+        ))
+        created += 1
+    db.session.commit()
+    return created
+
+
+def claim_range(owner, lease_seconds=600):
+    """领取一个待处理或租约已过期的区间，没有可领取的区间时返回 None"""
+    while True:
+        now = datetime.now()
+        claimable = (CrawlRange.status == STATUS_PENDING) | (
+            (CrawlRange.status == STATUS_RUNNING) & (CrawlRange.lease_expires_at < now)
+        )
+        candidates = [row.id for row in db.session.query(CrawlRange.id).filter(claimable)
+                      .order_by(CrawlRange.start_id).limit(10)]
+        if not candidates:
+            db.session.commit()
+            return None
+
+        for range_id in candidates:
+            claimed = CrawlRange.query.filter(CrawlRange.id == range_id, claimable).update({
+                'status': STATUS_RUNNING,
+                'owner': owner,
+                'lease_expires_at': now + timedelta(seconds=lease_seconds),
+                'attempts': CrawlRange.attempts + 1,
+                'updated_at': now
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(CrawlRange, range_id, populate_existing=True)
+        # 候选区间都被其他 worker 抢走了，重新查询
+
+
+def _held_by(crawl_range, owner, now):
+    """区间仍由 owner 持有且租约未过期"""
+    return (
+        (CrawlRange.id == crawl_range.id) &
+        (CrawlRange.owner == owner) &
+        (CrawlRange.status == STATUS_RUNNING) &
+        (CrawlRange.lease_expires_at > now)
+    )
+
+
+def renew_lease(crawl_range, owner, lease_seconds=600):
+    """续约，返回是否成功；租约已过期或已被其他 worker 接手时返回 False"""
+    now = datetime.now()
+    renewed = CrawlRange.query.filter(_held_by(crawl_range, owner, now)).update(
+        {'lease_expires_at': now + timedelta(seconds=lease_seconds), 'updated_at': now},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return bool(renewed)
+
+
+def complete_range(crawl_range, owner):
+    """标记区间完成，返回是否成功；租约已失效时不修改，区间留给接手的 worker"""
+    now = datetime.now()
+    completed = CrawlRange.query.filter(_held_by(crawl_range, owner, now)).update(
+        {'status': STATUS_DONE, 'owner': None, 'lease_expires_at': None, 'updated_at': now},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return bool(completed)
+
+
+def release_range(crawl_range, owner):
+    """主动放弃区间，让其他 worker 立即可以领取"""
+    CrawlRange.query.filter(
+        CrawlRange.id == crawl_range.id,
+        CrawlRange.owner == owner
+    ).update({'status': STATUS_PENDING, 'owner': None, 'lease_expires_at': None, 'updated_at': datetime.now()},
+             synchronize_session=False)
+    db.session.commit()
+
+
+def queue_summary():
+    """各状态的区间数量"""
+    rows = db.session.query(CrawlRange.status, db.func.count(CrawlRange.id)).group_by(CrawlRange.status)
+    return {status: count for status, count in rows}
@@ -7,17 +7,96 @@ load_dotenv()
 LOG_DIR = 'logs/'
 PROXY = None
 SPIDER_DEBUG = True
-LAST_MATCH_ID = 61779  # 上次爬取到的最后一个比赛ID
+LAST_MATCH_ID = 61779  # 首次爬取的起始比赛ID，之后的断点保存在 crawl_state 表中
+
+# 爬虫并发配置
+SPIDER_BASE_URL = 'https://img.scoregg.com'  # 比赛数据所在主机，压测时可指向本地替身
+SPIDER_TIMEOUT = 10  # 单次请求超时（秒）
+SPIDER_WORKERS = 8  # 并发抓取线程数，1 等同于原来的逐个抓取
+SPIDER_RATE_LIMIT = 20  # 每秒最多发出的请求数，0 表示不限速
+SPIDER_PARSER = 'orjson'  # 比赛JSON解析方式：orjson（未安装时退回 json）/ json / stream 流式提取（需 ijson 的 C 后端）
+SPIDER_ARCHIVE_DIR = os.getenv('SPIDER_ARCHIVE_DIR')  # 原始比赛数据压缩归档目录，为空时不归档
+CHECKPOINT_FLUSH_SIZE = 50  # 断点每累计多少个比赛ID写一次库
+IMPORT_BATCH_SIZE = 50  # 每个事务批量写入的比赛场数
+FRONTIER_PROBE_WINDOW = 10  # 探测ID上界时每个探测点连续检查的ID数
+NEGATIVE_CACHE_EMPTY_DAYS = 7  # 已知范围内的空ID多少天内不再重新抓取
+NEGATIVE_CACHE_SKIPPED_DAYS = 90  # 非LOL比赛多少天内不再重新抓取
+REFRESH_DAYS = 14  # 刷新模式回访最近多少天内的比赛
+REFRESH_INTERVAL_HOURS = 6  # 同一场比赛两次检查上游的最小间隔（小时）
+METRICS_PORT = None  # 导入脚本提供 Prometheus /metrics 接口的端口，None 表示不开启
+METRICS_INTERVAL = 30  # 每隔多少秒把指标摘要写入 logs/crawler_metrics.jsonl
+ANALYTICS_DIR = os.getenv('ANALYTICS_DIR')  # Parquet 分析快照目录，为空时聚合接口直接查询数据库
+ANALYTICS_KEEP_SNAPSHOTS = 2  # 保留最近几份分析快照
+SEARCH_INDEX_REFRESH = 60  # 名称检索索引检查新名称的间隔（秒）
+SEARCH_MAX_IDS = 1000  # 名称检索命中超过这么多个时，列表筛选退回 LIKE 查询
+PAGINATION_COUNT_TTL = 60  # 列表接口总数缓存时间（秒）
+PLAYER_HISTORY_PAGE_SIZE = 20  # 选手详情每页返回的比赛记录数
+PLAYER_HISTORY_MAX_PAGE_SIZE = 100  # 选手详情 per_page 参数的上限
+ROSTER_CACHE_TTL = 300  # 战队当前阵容缓存时间（秒）
+DATA_VERSION_TTL = 5  # Web 进程重新读取数据版本的间隔（秒），决定导入后 ETag 多久更新
+MATCH_IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # 超出刷新窗口的历史比赛详情的浏览器缓存时间（秒）
+PARTITION_YEARS_AHEAD = 1  # players/teams 提前建好未来几个赛季的分区（仅 MySQL）
+
+
+# 数据库连接池：导入写库用默认连接池，只读接口用 read，AI 生成的 SQL 用独立的 ai 连接池，
+# 一条慢 AI 查询最多占满自己的池子，不会拖垮首页等接口
+DB_WRITE_POOL_SIZE = 5
+DB_READ_POOL_SIZE = 10
+DB_AI_POOL_SIZE = 2
+DB_EXPORT_POOL_SIZE = 1  # 分析快照导出专用连接池，导出整表流式读取，不设单条查询超时
+DB_POOL_RECYCLE = 1800  # 连接最长复用时间（秒），需小于 MySQL 的 wait_timeout
+DB_READ_STATEMENT_TIMEOUT = 10  # 只读接口单条查询超时（秒），0 表示不限
+DB_AI_STATEMENT_TIMEOUT = 120  # AI 查询单条超时（秒）
+DB_AI_POOL_TIMEOUT = 5  # AI 连接池已满时最多等待多少秒，超时直接报错
+
+
+def engine_options(url, pool_size, max_overflow=0, pool_timeout=30, statement_timeout=0):
+    """生成单个连接池的引擎参数，statement_timeout 通过 MySQL 的 max_execution_time 限制 SELECT 执行时间"""
+    if url.startswith('sqlite'):
+        return {'url': url}
+    options = {
+        'url': url,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': True,
+    }
+    if statement_timeout and url.startswith('mysql'):
+        options['connect_args'] = {'init_command': f'SET SESSION max_execution_time={int(statement_timeout * 1000)}'}
+    return options
 
 
 class Config:
-    # 数据库配置
-    SQLALCHEMY_DATABASE_URI = (
+    # 数据库配置，设置 DATABASE_URL 时优先使用（例如本地用 sqlite:///lol_data.db 测试）
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or (
         f"mysql+pymysql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
         f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # 默认连接池用于写库（导入脚本、迁移等）
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        key: value for key, value in engine_options(
+            SQLALCHEMY_DATABASE_URI, DB_WRITE_POOL_SIZE, max_overflow=5
+        ).items() if key != 'url'
+    }
+    # 只读连接池可以指向只读副本（DATABASE_READ_URL），AI 查询默认也走只读副本
+    SQLALCHEMY_BINDS = {
+        'read': engine_options(
+            os.getenv('DATABASE_READ_URL') or SQLALCHEMY_DATABASE_URI,
+            DB_READ_POOL_SIZE, max_overflow=10, statement_timeout=DB_READ_STATEMENT_TIMEOUT
+        ),
+        'ai': engine_options(
+            os.getenv('DATABASE_AI_URL') or os.getenv('DATABASE_READ_URL') or SQLALCHEMY_DATABASE_URI,
+            DB_AI_POOL_SIZE, pool_timeout=DB_AI_POOL_TIMEOUT, statement_timeout=DB_AI_STATEMENT_TIMEOUT
+        ),
+        # 导出分析快照时整表流式读取，耗时与数据量成正比，不能受只读连接池的执行时间限制
+        'export': engine_options(
+            os.getenv('DATABASE_READ_URL') or SQLALCHEMY_DATABASE_URI, DB_EXPORT_POOL_SIZE
+        ),
+    }
+
     # Flask密钥
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
@@ -0,0 +1,54 @@
+"""add indexes for api queries
+
+Revision ID: 9c41e7a2b5d3
+Revises: 553b91ff084d
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9c41e7a2b5d3'
+down_revision = '553b91ff084d'
+branch_labels = None
+depends_on = None
+
+# 表名 -> [(索引名, 列)]，与各路由的查询方式对应
+INDEXES = {
+    'matches': [
+        ('ix_matches_date', ['date']),  # /match/api/list、/api/recent-matches 按日期筛选排序
+        ('ix_matches_game_time', ['game_time']),  # /api/fastest-matches、/api/longest-matches
+    ],
+    'players': [
+        ('ix_players_name_date', ['name', 'date']),  # /player/api/<name>、/player/api/list 最近一场
+        ('ix_players_match_id', ['match_id']),  # /match/api/<id>
+        ('ix_players_kills', ['kills']),  # /api/top-kills
+    ],
+    'teams': [
+        ('ix_teams_team_name_date', ['team_name', 'date']),  # /team/api/<name> 按时间倒序
+        ('ix_teams_match_id', ['match_id']),  # /match/api/<id>
+    ],
+}
+
+
+def _existing_indexes(table):
+    inspector = sa.inspect(op.get_bind())
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # 新库可能已经由 db.create_all() 按模型建好了索引，这里只补充缺少的
+    for table, indexes in INDEXES.items():
+        existing = _existing_indexes(table)
+        for name, columns in indexes:
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        existing = _existing_indexes(table)
+        for name, _ in indexes:
+            if name in existing:
+                op.drop_index(name, table_name=table)
@@ -0,0 +1,37 @@
+"""index player_summary.latest_team
+
+Revision ID: a4e6b2d9c7f3
+Revises: f2c7d8e4a1b5
+Create Date: 2026-10-18 19:26:14.552081
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a4e6b2d9c7f3'
+down_revision = 'f2c7d8e4a1b5'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_player_summary_latest_team'
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    if 'player_summary' not in inspector.get_table_names():
+        return None
+    return {index['name'] for index in inspector.get_indexes('player_summary')}
+
+
+def upgrade():
+    # 选手列表按战队筛选时，名称索引给出精确战队名，这里按该列走索引
+    existing = _existing_indexes()
+    if existing is not None and INDEX_NAME not in existing:
+        op.create_index(INDEX_NAME, 'player_summary', ['latest_team'])
+
+
+def downgrade():
+    existing = _existing_indexes()
+    if existing and INDEX_NAME in existing:
+        op.drop_index(INDEX_NAME, table_name='player_summary')
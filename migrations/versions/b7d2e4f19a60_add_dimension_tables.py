@@ -0,0 +1,137 @@
+"""add team/player/hero dimension tables
+
+Revision ID: b7d2e4f19a60
+Revises: 9c41e7a2b5d3
+Create Date: 2026-10-18 14:05:47.118392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e4f19a60'
+down_revision = '9c41e7a2b5d3'
+branch_labels = None
+depends_on = None
+
+# 每次回填的主键范围，避免一条 UPDATE 长时间锁住整张大表
+BACKFILL_BATCH = 20000
+
+# 维度表 -> 名称列长度
+DIMENSIONS = {'dim_teams': 100, 'dim_players': 100, 'dim_heroes': 255}
+
+# 明细表 -> [(ID列, 名称列, 维度表)]
+KEY_COLUMNS = {
+    'matches': [
+        ('red_team_id', 'red_team_name', 'dim_teams'),
+        ('blue_team_id', 'blue_team_name', 'dim_teams'),
+        ('win_team_id', 'win_team_name', 'dim_teams'),
+    ],
+    'players': [
+        ('player_id', 'name', 'dim_players'),
+        ('team_id', 'team_name', 'dim_teams'),
+        ('hero_id', 'hero', 'dim_heroes'),
+    ],
+    'teams': [
+        ('team_id', 'team_name', 'dim_teams'),
+        ('player_a_key', 'player_a_id', 'dim_players'),
+        ('player_b_key', 'player_b_id', 'dim_players'),
+        ('player_c_key', 'player_c_id', 'dim_players'),
+        ('player_d_key', 'player_d_id', 'dim_players'),
+        ('player_e_key', 'player_e_id', 'dim_players'),
+    ],
+}
+
+INDEXES = {
+    'matches': [
+        ('ix_matches_red_team_id', ['red_team_id']),
+        ('ix_matches_blue_team_id', ['blue_team_id']),
+    ],
+    'players': [
+        ('ix_players_player_id_date', ['player_id', 'date']),
+        ('ix_players_team_id', ['team_id']),
+    ],
+    'teams': [
+        ('ix_teams_team_id_date', ['team_id', 'date']),
+    ],
+}
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _backfill_dimensions():
+    # 把明细表里出现过的名称去重写入维度表
+    bind = op.get_bind()
+    for table, columns in KEY_COLUMNS.items():
+        for _, name_column, dim_table in columns:
+            bind.execute(sa.text(
+                f"INSERT INTO {dim_table} (name) "
+                f"SELECT DISTINCT t.{name_column} FROM {table} t "
+                f"WHERE t.{name_column} IS NOT NULL AND t.{name_column} <> '' "
+                f"AND NOT EXISTS (SELECT 1 FROM {dim_table} d WHERE d.name = t.{name_column})"
+            ))
+
+
+def _backfill_keys():
+    # 按主键范围分批回填整数ID
+    bind = op.get_bind()
+    for table, columns in KEY_COLUMNS.items():
+        max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+        assignments = ', '.join(
+            f"{key_column} = (SELECT d.id FROM {dim_table} d WHERE d.name = {table}.{name_column})"
+            for key_column, name_column, dim_table in columns
+        )
+        for start in range(0, max_id + 1, BACKFILL_BATCH):
+            bind.execute(
+                sa.text(f"UPDATE {table} SET {assignments} WHERE id >= :start AND id < :end"),
+                {'start': start, 'end': start + BACKFILL_BATCH}
+            )
+
+
+def upgrade():
+    # 新库可能已经由 db.create_all() 建好了维度表和新列，这里只补充缺少的
+    existing_tables = set(_inspector().get_table_names())
+    for dim_table, length in DIMENSIONS.items():
+        if dim_table not in existing_tables:
+            op.create_table(
+                dim_table,
+                sa.Column('id', sa.Integer(), nullable=False),
+                sa.Column('name', sa.String(length=length), nullable=False),
+                sa.PrimaryKeyConstraint('id'),
+                sa.UniqueConstraint('name')
+            )
+
+    for table, columns in KEY_COLUMNS.items():
+        existing = {column['name'] for column in _inspector().get_columns(table)}
+        missing = [key_column for key_column, _, _ in columns if key_column not in existing]
+        if missing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                for key_column in missing:
+                    batch_op.add_column(sa.Column(key_column, sa.Integer(), nullable=True))
+
+    _backfill_dimensions()
+    _backfill_keys()
+
+    for table, indexes in INDEXES.items():
+        existing = {index['name'] for index in _inspector().get_indexes(table)}
+        for name, columns in indexes:
+            if name not in existing:
+                op.create_index(name, table, columns)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        existing = {index['name'] for index in _inspector().get_indexes(table)}
+        for name, _ in indexes:
+            if name in existing:
+                op.drop_index(name, table_name=table)
+
+    for table, columns in KEY_COLUMNS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for key_column, _, _ in columns:
+                batch_op.drop_column(key_column)
+
+    for dim_table in DIMENSIONS:
+        op.drop_table(dim_table)
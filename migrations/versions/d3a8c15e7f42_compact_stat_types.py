@@ -0,0 +1,102 @@
+"""store result/part/beiguo/money as numeric types
+
+Revision ID: d3a8c15e7f42
+Revises: b7d2e4f19a60
+Create Date: 2026-10-18 15:32:09.574120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8c15e7f42'
+down_revision = 'b7d2e4f19a60'
+branch_labels = None
+depends_on = None
+
+# 每批回填的行数
+BACKFILL_BATCH = 5000
+
+
+def _to_int(value):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_percent(value):
+    if value is None:
+        return None
+    try:
+        return round(float(str(value).strip().rstrip('%')), 2)
+    except ValueError:
+        return None
+
+
+def _to_money(value):
+    if value is None:
+        return None
+    return int(round(float(value)))
+
+
+# 表 -> [(列名, 旧类型, 新类型, 转换函数)]
+CONVERSIONS = {
+    'players': [
+        ('result', sa.String(length=10), sa.SmallInteger(), _to_int),
+        ('part', sa.String(length=20), sa.Numeric(5, 2), _to_percent),
+        ('beiguo', sa.String(length=100), sa.SmallInteger(), _to_int),
+    ],
+    'teams': [
+        ('money', sa.Float(), sa.Integer(), _to_money),
+    ],
+}
+
+
+def _backfill(table, columns):
+    """按主键范围分批读取旧列，在 Python 里转换后写入新列，每条 UPDATE 只涉及一批行"""
+    bind = op.get_bind()
+    names = [name for name, _, _, _ in columns]
+    select_sql = sa.text(
+        f"SELECT id, {', '.join(names)} FROM {table} WHERE id > :last_id ORDER BY id LIMIT {BACKFILL_BATCH}"
+    )
+    update_sql = sa.text(
+        f"UPDATE {table} SET {', '.join(f'{name}_new = :{name}' for name in names)} WHERE id = :id"
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(select_sql, {'last_id': last_id}).fetchall()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            values = {'id': row[0]}
+            for (name, _, _, convert), value in zip(columns, row[1:]):
+                values[name] = convert(value)
+            params.append(values)
+        bind.execute(update_sql, params)
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    # 先加影子列并分批回填，最后再替换旧列，避免一次性 ALTER 在转换失败的数据上报错
+    for table, columns in CONVERSIONS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, _, new_type, _ in columns:
+                batch_op.add_column(sa.Column(f'{name}_new', new_type, nullable=True))
+
+        _backfill(table, columns)
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, old_type, new_type, _ in columns:
+                batch_op.drop_column(name)
+                batch_op.alter_column(f'{name}_new', new_column_name=name,
+                                      existing_type=new_type, existing_nullable=True)
+
+
+def downgrade():
+    # 数值转回原来的字符串/浮点类型，数据库可以直接完成
+    for table, columns in CONVERSIONS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, old_type, new_type, _ in columns:
+                batch_op.alter_column(name, existing_type=new_type, type_=old_type, existing_nullable=True)
@@ -0,0 +1,78 @@
+"""partition players and teams by season
+
+Revision ID: e5f1a9b3c6d8
+Revises: d3a8c15e7f42
+Create Date: 2026-10-18 16:48:25.309617
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e5f1a9b3c6d8'
+down_revision = 'd3a8c15e7f42'
+branch_labels = None
+depends_on = None
+
+TABLES = ('players', 'teams')
+
+# 每批回填 season 的主键范围
+BACKFILL_BATCH = 20000
+
+# 提前建好的未来赛季数，之后由 app.services.partitions.ensure_partitions 继续补充
+YEARS_AHEAD = 1
+
+
+def _year_expr(bind):
+    if bind.dialect.name == 'sqlite':
+        return "CAST(strftime('%Y', date) AS INTEGER)"
+    return "YEAR(date)"
+
+
+def _backfill_season(bind, table):
+    max_id = bind.execute(sa.text(f"SELECT MAX(id) FROM {table}")).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_BATCH):
+        bind.execute(
+            sa.text(f"UPDATE {table} SET season = {_year_expr(bind)} "
+                    f"WHERE id >= :start AND id < :end AND date IS NOT NULL"),
+            {'start': start, 'end': start + BACKFILL_BATCH}
+        )
+
+
+def _partition_clause(bind, table):
+    # p0 存放日期未知的行，之后每个赛季一个分区，pmax 兜底
+    first = bind.execute(sa.text(f"SELECT MIN(season) FROM {table} WHERE season > 0")).scalar()
+    last = datetime.now().year + YEARS_AHEAD
+    partitions = ["PARTITION p0 VALUES LESS THAN (1)"]
+    for season in range(first or datetime.now().year, last + 1):
+        partitions.append(f"PARTITION p{season} VALUES LESS THAN ({season + 1})")
+    partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return f"PARTITION BY RANGE (season) ({', '.join(partitions)})"
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        existing = {column['name'] for column in sa.inspect(bind).get_columns(table)}
+        if 'season' not in existing:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.add_column(sa.Column('season', sa.SmallInteger(), nullable=False, server_default='0'))
+        _backfill_season(bind, table)
+
+        if bind.dialect.name != 'mysql':
+            continue
+        # MySQL 要求分区键包含在每个唯一键中，主键改为 (id, season)
+        op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id, season)")
+        op.execute(f"ALTER TABLE {table} {_partition_clause(bind, table)}")
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table in TABLES:
+        if bind.dialect.name == 'mysql':
+            op.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+            op.execute(f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('season')
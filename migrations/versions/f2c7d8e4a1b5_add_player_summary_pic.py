@@ -0,0 +1,46 @@
+"""add latest_pic to player_summary
+
+Revision ID: f2c7d8e4a1b5
+Revises: e5f1a9b3c6d8
+Create Date: 2026-10-18 18:11:52.806431
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f2c7d8e4a1b5'
+down_revision = 'e5f1a9b3c6d8'
+branch_labels = None
+depends_on = None
+
+# 每批回填的汇总表主键范围
+BACKFILL_BATCH = 5000
+
+
+def upgrade():
+    bind = op.get_bind()
+    # 汇总表可能还没有建（由 db.create_all() 按模型创建，届时已包含新列）
+    if 'player_summary' not in sa.inspect(bind).get_table_names():
+        return
+    existing = {column['name'] for column in sa.inspect(bind).get_columns('player_summary')}
+    if 'latest_pic' not in existing:
+        with op.batch_alter_table('player_summary', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('latest_pic', sa.String(length=255), nullable=True))
+
+    # 头像取选手最近一场比赛的记录
+    max_id = bind.execute(sa.text("SELECT MAX(id) FROM player_summary")).scalar() or 0
+    for start in range(0, max_id + 1, BACKFILL_BATCH):
+        bind.execute(sa.text(
+            "UPDATE player_summary SET latest_pic = ("
+            "SELECT MAX(p.pic) FROM players p "
+            "WHERE p.name = player_summary.name AND p.date = player_summary.latest_date) "
+            "WHERE id >= :start AND id < :end"
+        ), {'start': start, 'end': start + BACKFILL_BATCH})
+
+
+def downgrade():
+    if 'player_summary' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    with op.batch_alter_table('player_summary', schema=None) as batch_op:
+        batch_op.drop_column('latest_pic')
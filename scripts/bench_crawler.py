@@ -0,0 +1,139 @@
+# 爬虫吞吐量压测：对比原来的逐个 requests.get 与并发爬取引擎
+#
+# 用法：
+#   1. 先录制一批真实比赛数据（只需执行一次）：
+#      python scripts/bench_crawler.py --record 61000 200 --corpus bench_corpus
+#   2. 在本地替身服务器上压测：
+#      python scripts/bench_crawler.py --corpus bench_corpus --latency 50 --workers 1 4 8 16
+
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from app.services.spider import parse_match_data, create_session, MATCH_RESULT_PATH, SkipMatch
+from app.services.crawler import crawl_matches, STATUS_OK
+from config import SPIDER_BASE_URL
+
+
+def record_corpus(corpus_dir, start_id, count):
+    """从 scoregg 抓取原始 JSON 保存到 corpus_dir，文件名为 {match_id}.json"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    session = create_session()
+    saved = 0
+    for match_id in range(start_id, start_id + count):
+        url = SPIDER_BASE_URL + MATCH_RESULT_PATH.format(match_id=match_id)
+        res = session.get(url, timeout=10)
+        if res.status_code != 200:
+            continue
+        with open(os.path.join(corpus_dir, f'{match_id}.json'), 'wb') as f:
+            f.write(res.content)
+        saved += 1
+    print(f"已录制 {saved} 场比赛到 {corpus_dir}")
+
+
+def load_corpus(corpus_dir):
+    corpus = {}
+    for filename in os.listdir(corpus_dir):
+        if filename.endswith('.json'):
+            with open(os.path.join(corpus_dir, filename), 'rb') as f:
+                corpus[int(filename[:-5])] = f.read()
+    return corpus
+
+
+def start_stand_in(corpus, latency):
+    """启动本地 HTTP 替身，按 /match/result/{id}.json 返回录制的数据，latency 模拟网络往返（毫秒）"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # 支持 keep-alive，才能体现连接复用的效果
+
+        def do_GET(self):
+            if latency:
+                time.sleep(latency / 1000)
+            name = self.path.split('?')[0].rsplit('/', 1)[-1]
+            body = corpus.get(int(name[:-5])) if name[:-5].isdigit() else None
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def bench_baseline(match_ids, base_url):
+    """原来的写法：每场比赛一次裸 requests.get，不复用连接"""
+    found = 0
+    start = time.perf_counter()
+    for match_id in match_ids:
+        res = requests.get(base_url + MATCH_RESULT_PATH.format(match_id=match_id))
+        if res.status_code != 200:
+            continue
+        try:
+            if parse_match_data(json.loads(res.text), match_id):
+                found += 1
+        except SkipMatch:
+            pass
+    return found, time.perf_counter() - start
+
+
+def bench_concurrent(match_ids, base_url, workers, rate_limit):
+    found = 0
+    start = time.perf_counter()
+    for result in crawl_matches(match_ids, workers=workers, rate_limit=rate_limit,
+                                session=create_session(workers), base_url=base_url):
+        if result.status == STATUS_OK:
+            found += 1
+    return found, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='爬虫吞吐量压测')
+    parser.add_argument('--corpus', default='bench_corpus', help='录制数据所在目录')
+    parser.add_argument('--record', nargs=2, type=int, metavar=('START_ID', 'COUNT'), help='从线上录制数据')
+    parser.add_argument('--latency', type=float, default=50, help='替身服务器每个请求的模拟延迟（毫秒）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16], help='要测试的并发线程数')
+    parser.add_argument('--rate-limit', type=float, default=0, help='每秒最多请求数，0 表示不限速')
+    args = parser.parse_args()
+
+    if args.record:
+        record_corpus(args.corpus, *args.record)
+        return
+
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        print(f"{args.corpus} 中没有录制数据，请先使用 --record")
+        return
+    match_ids = sorted(corpus)
+    server, base_url = start_stand_in(corpus, args.latency)
+
+    try:
+        found, elapsed = bench_baseline(match_ids, base_url)
+        print(f"{'逐个 requests.get':<20} {len(match_ids) / elapsed:8.1f} 场/秒  ({found} 场有效, {elapsed:.2f}s)")
+        for workers in args.workers:
+            found, elapsed = bench_concurrent(match_ids, base_url, workers, args.rate_limit)
+            label = f'并发 workers={workers}'
+            print(f"{label:<20} {len(match_ids) / elapsed:8.1f} 场/秒  ({found} 场有效, {elapsed:.2f}s)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
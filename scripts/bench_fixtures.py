@@ -0,0 +1,165 @@
+# 合成比赛 JSON：按上游 /match/result/{id}.json 的结构生成确定性的假数据，不含任何真实比赛数据
+#
+# 字段名、字符串化的数值（"12.3k"、"65.2%"、"1"）和体积很大但解析时会丢弃的部分都与上游一致，
+# 供 bench_spider.py 做解析基准，也可以写成归档目录，用 import_data.py --replay 灌一个本地测试库。
+# data 下各字段的顺序逐场随机打乱，体积大的丢弃部分有时在 result_list 之前、有时在之后，
+# 流式解析不会因为"需要的字段总在最前面"而占便宜。
+#
+# 用法：
+#   生成 500 场比赛的归档（{match_id // 1000}/{match_id}_{updated_at}.json.gz）：
+#     python scripts/bench_fixtures.py --out fixtures_archive --count 500
+#   按 bench_crawler.py --record 的格式写成 {match_id}.json：
+#     python scripts/bench_fixtures.py --out bench_corpus --count 200 --flat
+
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.archive import save_payload
+
+DEFAULT_SEED = 20240101
+FIRST_MATCH_ID = 100000
+TEAM_COUNT = 16
+HERO_COUNT = 60
+POSITIONS = ('a', 'b', 'c', 'd', 'e')
+# 上游 data 中体积最大、解析时丢弃的部分（逐帧经济/经验曲线、事件列表），每场的帧数和事件数
+FRAME_COUNT = 40
+EVENT_COUNT = 120
+# 生成规则变化时递增，基准的语料名带上版本号，旧规则下保存的基线随之失效
+FIXTURE_VERSION = 2
+
+
+def _roster(rng):
+    teams = {}
+    for i in range(TEAM_COUNT):
+        name = f"TEAM{i:02d}"
+        teams[name] = [f"{name}_{pos.upper()}{rng.randint(1, 9)}" for pos in POSITIONS]
+    return teams
+
+
+def _side(rng, prefix, team_name, players, won, heroes):
+    info = {
+        f'{prefix}_name': team_name,
+        f'{prefix}_flag': f'https://img.example.com/team/{team_name}.png',
+        f'{prefix}_result': '1' if won else '0',
+        f'{prefix}_kill': str(rng.randint(5, 30)),
+        f'{prefix}_die': str(rng.randint(5, 30)),
+        f'{prefix}_asses': str(rng.randint(10, 70)),
+        f'{prefix}_attack': str(rng.randint(40000, 120000)),
+        f'{prefix}_money': f"{rng.uniform(40, 80):.1f}k",
+        f'{prefix}_tower': rng.randint(0, 11),
+        f'{prefix}_small_dargon': rng.randint(0, 5),
+        f'{prefix}_big_dargon': rng.randint(0, 2),
+        f'{prefix}_riftHeraldKills': rng.randint(0, 2),
+        f'{prefix}_elder': rng.randint(0, 1),
+        f'{prefix}_void_grub': rng.randint(0, 6),
+    }
+    for pos, player, hero in zip(POSITIONS, players, heroes):
+        star, hero_key = f'{prefix}_star_{pos}_', f'{prefix}_hero_{pos}_'
+        kills, deaths, assists = rng.randint(0, 12), rng.randint(0, 10), rng.randint(0, 20)
+        info.update({
+            f'{star}name': player,
+            f'{star}pic': f'https://img.example.com/player/{player}.png',
+            f'{star}kda': round((kills + assists) / max(1, deaths), 1),
+            f'{star}kills': kills,
+            f'{star}deaths': deaths,
+            f'{star}assists': assists,
+            f'{star}part': f"{rng.uniform(30, 90):.1f}%",
+            f'{star}atk_o': rng.randint(5000, 40000),
+            f'{star}atk_p': rng.randint(5, 40),
+            f'{star}atk_m': rng.randint(200, 1200),
+            f'{star}def_o': rng.randint(5000, 40000),
+            f'{star}def_p': rng.randint(5, 40),
+            f'{star}def_m': rng.randint(200, 1200),
+            f'{star}hits': rng.randint(20, 400),
+            f'{star}adc_m': rng.randint(1, 10),
+            f'{star}money_o': rng.randint(6000, 18000),
+            f'{star}money_M': rng.randint(200, 600),
+            f'{star}wp_m': rng.randint(0, 3),
+            f'{star}mvp': '0',
+            f'{star}beiguo': '0',
+            f'{hero_key}name': hero,
+            f'{hero_key}lv': rng.randint(12, 18),
+        })
+    return info
+
+
+def make_payload(rng, match_id, date, teams):
+    """生成一场比赛的响应字节和 updated_at"""
+    red, blue = rng.sample(sorted(teams), 2)
+    heroes = rng.sample([f'Hero{i:02d}' for i in range(HERO_COUNT)], 10)
+    red_won = rng.random() < 0.5
+    minutes = rng.randint(20, 45)
+    result_list = {
+        'red_name': red,
+        'blue_name': blue,
+        'game_time_m': str(minutes),
+        'game_time_s': str(rng.randint(0, 59)),
+        **_side(rng, 'red', red, teams[red], red_won, heroes[:5]),
+        **_side(rng, 'blue', blue, teams[blue], not red_won, heroes[5:]),
+    }
+    winner, loser = (red, blue) if red_won else (blue, red)
+    updated_at = date.strftime('%Y%m%d%H%M%S')
+    fields = [
+        ('result_list', result_list),
+        ('dragon_list', {side: {'firstBloodKill': int(side == 'red'), 'firstTowerKill': int(side != 'red')}
+                         for side in ('red', 'blue')}),
+        ('updated_at', updated_at),
+        ('max_mvp', {'nickname': rng.choice(teams[winner])}),
+        ('max_beiguo', {'nickname': rng.choice(teams[loser])}),
+        ('frames', [
+            {'minute': minute, 'gold': [rng.randint(0, 20000) for _ in range(10)],
+             'xp': [rng.randint(0, 20000) for _ in range(10)]}
+            for minute in range(FRAME_COUNT)
+        ]),
+        ('events', [
+            {'time': rng.randint(0, minutes * 60), 'type': rng.choice(('kill', 'tower', 'dragon', 'ward')),
+             'killer': rng.randint(1, 10), 'victim': rng.randint(1, 10), 'x': rng.randint(0, 15000),
+             'y': rng.randint(0, 15000)}
+            for _ in range(EVENT_COUNT)
+        ]),
+    ]
+    rng.shuffle(fields)
+    data = dict(fields)
+    return json.dumps({'code': '200', 'message': 'success', 'data': data}).encode('utf-8'), updated_at
+
+
+def generate(count, seed=DEFAULT_SEED, first_id=FIRST_MATCH_ID, start_date=datetime(2023, 1, 1)):
+    """产出 [(match_id, updated_at, content)]，相同参数每次生成的内容完全相同"""
+    rng = random.Random(seed)
+    teams = _roster(rng)
+    date = start_date
+    payloads = []
+    for match_id in range(first_id, first_id + count):
+        date += timedelta(hours=rng.randint(1, 30))
+        content, updated_at = make_payload(rng, match_id, date, teams)
+        payloads.append((match_id, updated_at, content))
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成比赛 JSON')
+    parser.add_argument('--out', required=True, help='输出目录')
+    parser.add_argument('--count', type=int, default=200, help='比赛场数')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--first-id', type=int, default=FIRST_MATCH_ID, help='第一场比赛的 ID')
+    parser.add_argument('--flat', action='store_true', help='写成 {match_id}.json，而不是压缩归档')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for match_id, updated_at, content in generate(args.count, args.seed, args.first_id):
+        if args.flat:
+            with open(os.path.join(args.out, f'{match_id}.json'), 'wb') as f:
+                f.write(content)
+        else:
+            save_payload(match_id, updated_at, content, archive_dir=args.out)
+    print(f"已在 {args.out} 生成 {args.count} 场比赛")
+
+
+if __name__ == '__main__':
+    main()
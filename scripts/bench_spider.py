@@ -0,0 +1,251 @@
+# 比赛 JSON 解析基准，不涉及网络
+#
+# 语料可以是 scripts/bench_crawler.py --record 录制的目录（{match_id}.json），
+# 也可以直接使用 SPIDER_ARCHIVE_DIR 归档目录（{match_id // 1000}/{match_id}_{updated_at}.json.gz）；
+# 不指定 --corpus 时使用 bench_fixtures.py 生成的合成语料，仓库中的 bench_baseline.json 就是在合成语料上保存的。
+#
+# 回归检查不比较绝对吞吐量（取决于机器），而是比较相对于同一轮中标准库 json.loads 解码同一批数据的速度比；
+# 基线按 语料 + 实际使用的解析方式（含 ijson 后端、orjson 是否可用）分别保存，换了解析方式需要单独保存基线。
+#
+# 用法：
+#   回归检查（CI 中使用，合成语料，与 scripts/bench_baseline.json 比较）：
+#     python scripts/bench_spider.py --suite
+#   对比几种 JSON 解码方式：
+#     python scripts/bench_spider.py --corpus bench_corpus --rounds 5
+#   解析基准（吞吐量、p99、内存分配），并与保存的基线比较，相对吞吐量下降超过阈值时返回非零退出码：
+#     python scripts/bench_spider.py --corpus bench_corpus --suite --save-baseline
+#     python scripts/bench_spider.py --corpus bench_corpus --suite --max-regression 0.2
+#   指定解析方式（默认 config.SPIDER_PARSER），例如为另一种解析方式保存基线：
+#     python scripts/bench_spider.py --suite --parser stream --save-baseline
+
+import os
+import sys
+import json
+import time
+import functools
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import spider
+from app.services.spider import decode_match_json, parse_match_data, SkipMatch
+from config import SPIDER_PARSER
+from app.services.archive import iter_archive
+from scripts.bench_crawler import load_corpus
+from scripts.bench_fixtures import generate, FIXTURE_VERSION
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+SYNTHETIC_COUNT = 200  # 合成语料的比赛场数
+
+
+def load_payloads(corpus_dir):
+    """读取语料，返回按 match_id 排序的 [(match_id, content)]"""
+    if any(name.isdigit() for name in os.listdir(corpus_dir)):
+        return [(match_id, content) for match_id, _, content in iter_archive(archive_dir=corpus_dir)]
+    return sorted(load_corpus(corpus_dir).items())
+
+
+def decode_text(content):
+    # 原来的写法：先解码成 str，再整体 json.loads
+    return json.loads(content.decode('utf-8'))
+
+
+def available_decoders():
+    decoders = {'text+json（原写法）': decode_text}
+    decoders['bytes+json'] = lambda content: decode_match_json(content, parser='json')
+    if spider.orjson is not None:
+        decoders['orjson'] = lambda content: decode_match_json(content, parser='orjson')
+    if spider.ijson is not None:
+        decoders['ijson 流式提取'] = lambda content: decode_match_json(content, parser='stream')
+    return decoders
+
+
+def parser_name(parser=None):
+    """decode_match_json 实际使用的解析方式，依赖未安装时与配置不同"""
+    parser = parser or SPIDER_PARSER
+    if parser == 'stream' and spider.ijson is not None:
+        return f'stream/ijson-{spider.ijson.backend}'
+    if parser == 'orjson' and spider.orjson is not None:
+        return 'orjson'
+    return 'json'
+
+
+def parse_one(decoder, match_id, content):
+    try:
+        return parse_match_data(decoder(content), match_id)
+    except SkipMatch:
+        return None
+
+
+def bench_decoder(decoder, payloads, rounds):
+    # 先测耗时，再单独跑一轮测峰值内存，避免 tracemalloc 影响计时
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for match_id, content in payloads:
+            parse_one(decoder, match_id, content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = 0
+    for match_id, content in payloads:
+        tracemalloc.start()
+        parse_one(decoder, match_id, content)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak
+
+
+def compare_decoders(payloads, rounds):
+    for name, decoder in available_decoders().items():
+        elapsed, peak = bench_decoder(decoder, payloads, rounds)
+        per_match = elapsed / len(payloads) * 1000
+        print(f"{name:<20} {per_match:8.3f} ms/场  {len(payloads) / elapsed:8.1f} 场/秒  峰值内存 {peak / 1024:8.1f} KB")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_suite(payloads, rounds, parser=None):
+    """
+    分别测量解码和解析两个阶段
+
+    decode 阶段只把字节解码为 JSON，parse 阶段是 parse_match_data 本身（构建 10 个选手字典和 2 个战队字典），
+    两者分开计时，便于定位回归出现在哪一步。每场比赛同时用标准库 json.loads 解码一次作为参照（reference），
+    各阶段的 relative 是吞吐量相对参照的倍数，与机器快慢基本无关。
+    """
+    decode = functools.partial(decode_match_json, parser=parser)
+    decoded = [(match_id, decode(content)) for match_id, content in payloads]
+
+    reference_times, decode_times, parse_times = [], [], []
+    for _ in range(rounds):
+        for match_id, content in payloads:
+            start = time.perf_counter()
+            json.loads(content)
+            reference_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            decode(content)
+            decode_times.append(time.perf_counter() - start)
+        for match_id, raw_data in decoded:
+            start = time.perf_counter()
+            try:
+                parse_match_data(raw_data, match_id)
+            except SkipMatch:
+                pass
+            parse_times.append(time.perf_counter() - start)
+
+    # 内存分配：单独跑一轮，记录每场比赛解析时的分配峰值
+    alloc_peaks = []
+    for match_id, content in payloads:
+        tracemalloc.start()
+        parse_one(decode, match_id, content)
+        alloc_peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    reference = len(reference_times) / sum(reference_times)
+    total_times = [d + p for d, p in zip(decode_times, parse_times)]
+    results = {}
+    for stage, times in (('reference', reference_times), ('decode', decode_times),
+                         ('parse', parse_times), ('total', total_times)):
+        results[stage] = {
+            'matches_per_sec': len(times) / sum(times),
+            'relative': len(times) / sum(times) / reference,
+            'p50_ms': percentile(times, 50) * 1000,
+            'p99_ms': percentile(times, 99) * 1000,
+        }
+    results['total'].update({
+        'alloc_avg_kb': sum(alloc_peaks) / len(alloc_peaks) / 1024,
+        'alloc_max_kb': max(alloc_peaks) / 1024,
+    })
+    return results
+
+
+def print_suite(results):
+    for stage, stats in results.items():
+        line = (f"{stage:<10} {stats['matches_per_sec']:10.1f} 场/秒  参照的 {stats['relative']:6.3f} 倍  "
+                f"p50 {stats['p50_ms']:7.3f} ms  p99 {stats['p99_ms']:7.3f} ms")
+        if 'alloc_avg_kb' in stats:
+            line += f"  分配峰值 平均 {stats['alloc_avg_kb']:.1f} KB / 最大 {stats['alloc_max_kb']:.1f} KB"
+        print(line)
+
+
+def check_regression(results, baseline, max_regression):
+    """相对参照的吞吐量倍数低于基线 (1 - max_regression) 倍时返回失败信息"""
+    failures = []
+    for stage, stats in results.items():
+        expected = baseline.get(stage, {}).get('relative')
+        if not expected or stage == 'reference':
+            continue
+        if stats['relative'] < expected * (1 - max_regression):
+            failures.append(f"{stage} 吞吐量为参照的 {stats['relative']:.3f} 倍，"
+                            f"低于基线 {expected:.3f} 倍的 {(1 - max_regression) * 100:.0f}%")
+    return failures
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比赛 JSON 解析基准')
+    parser.add_argument('--corpus', default=None, help='录制数据或归档所在目录，默认使用合成语料')
+    parser.add_argument('--rounds', type=int, default=5, help='重复次数')
+    parser.add_argument('--suite', action='store_true', help='运行解析基准并与基线比较')
+    parser.add_argument('--parser', choices=('stream', 'orjson', 'json'), default=None,
+                        help='--suite 使用的解析方式，默认 config.SPIDER_PARSER')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='基线文件路径')
+    parser.add_argument('--save-baseline', action='store_true', help='把本次结果保存为基线')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='允许的相对吞吐量下降比例')
+    args = parser.parse_args()
+
+    if args.corpus is None:
+        corpus = f'synthetic-v{FIXTURE_VERSION}:{SYNTHETIC_COUNT}'
+        payloads = [(match_id, content) for match_id, _, content in generate(SYNTHETIC_COUNT)]
+    else:
+        corpus = os.path.abspath(args.corpus)
+        payloads = load_payloads(args.corpus) if os.path.isdir(args.corpus) else []
+    if not payloads:
+        print(f"{args.corpus} 中没有录制数据，请先使用 scripts/bench_crawler.py --record")
+        sys.exit(1)
+    total_bytes = sum(len(content) for _, content in payloads)
+    print(f"共 {len(payloads)} 场比赛，平均 {total_bytes / len(payloads) / 1024:.1f} KB/场")
+    # 基线按语料和实际使用的解析方式区分，不同环境各自保存
+    key = f'{corpus}|{parser_name(args.parser)}'
+
+    if not args.suite:
+        compare_decoders(payloads, args.rounds)
+        return
+
+    results = run_suite(payloads, args.rounds, args.parser)
+    print_suite(results)
+
+    baselines = load_baselines(args.baseline)
+    if args.save_baseline:
+        baselines[key] = results
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"基线 {key} 已保存到 {args.baseline}")
+        return
+
+    # 没有对应基线时无法判断是否回归，按失败处理，避免检查被静默跳过
+    if key not in baselines:
+        print(f"[FAIL] {args.baseline} 中没有 {key} 的基线，请先使用 --save-baseline 保存")
+        sys.exit(1)
+    failures = check_regression(results, baselines[key], args.max_regression)
+    for failure in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"相对吞吐量未低于基线 {key} 的阈值")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+# 查询计划回归检查：请求每个只读接口，抓取执行的 SQL 并运行 EXPLAIN，
+# 如果某条查询对主要数据表做了全表扫描或整个索引扫描，打印出来并以非零状态码退出（可用于 CI）
+#
+# 新增或改动热点接口时，需要把它（包括筛选、游标翻页等变体）加到 endpoints() / CURSOR_ENDPOINTS；
+# 整个索引扫描（按索引顺序读取后用 LIMIT 提前结束等）只有在 ALLOWED_SCANS 中写明原因后才放行。
+#
+# 用法（需要一个有数据的库，MySQL 或 SQLite 均可）：
+#   python scripts/check_query_plans.py
+
+import os
+import re
+import sys
+from urllib.parse import quote
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models.match import Match
+from app.models.player import Player
+from app.models.team import Team
+
+# 需要检查的表，其他表（如断点、队列等）不在接口的热路径上
+CHECKED_TABLES = {'matches', 'players', 'teams', 'player_summary', 'team_summary', 'dim_teams', 'dim_players', 'dim_heroes'}
+
+# 已知且可以接受的扫描：(接口名称, 表名) -> 原因
+ALLOWED_SCANS = {
+    ('recent-matches', 'matches'): '按 ix_matches_date 倒序读取，LIMIT 10 后结束',
+    ('top-players', 'player_summary'): '按出场次数索引倒序读取，取前几名后结束',
+    ('match-list', 'matches'): '第一页按 ix_matches_date 倒序读取、LIMIT 后结束；总数统计读整个索引，结果按 PAGINATION_COUNT_TTL 缓存',
+    ('match-list-page', 'matches'): 'OFFSET 跳页需要读过前面各页，代价与页码成正比；连续翻页走游标（match-list-cursor）',
+    ('search-suggest', 'dim_players'): '名称索引在数据版本变化时重新读取全部名称，每个进程每个版本一次，检索本身在内存中完成',
+    ('search-suggest', 'dim_teams'): '同上',
+}
+
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(.*)$')
+TABLE_SCAN = '全表扫描'
+INDEX_SCAN = '整个索引扫描'
+
+
+def sample_values():
+    """从库里取一组真实存在的比赛/选手/战队，用来拼接口参数"""
+    match = Match.query.order_by(Match.date.desc()).first()
+    player = Player.query.filter(Player.name.isnot(None)).first()
+    team = Team.query.filter(Team.team_name.isnot(None)).first()
+    if not (match and player and team):
+        return None
+    return {
+        'match_id': match.match_id,
+        'player_name': quote(player.name, safe=''),
+        'player_term': quote(player.name[:3], safe=''),
+        'position': quote(player.position or '', safe=''),
+        'team_name': quote(team.team_name, safe=''),
+        'team_term': quote(team.team_name[:3], safe=''),
+        'month': match.date.strftime('%Y-%m') if match.date else '2024-01',
+    }
+
+
+def endpoints(values):
+    """返回 [(接口名称, URL)]，接口名称用于 ALLOWED_SCANS"""
+    return [
+        ('recent-matches', '/api/recent-matches'),
+        ('dashboard', '/api/dashboard'),
+        ('stats', '/api/stats'),
+        ('top-players', '/api/top-players'),
+        ('top-teams', '/api/top-teams'),
+        ('fastest-matches', '/api/fastest-matches'),
+        ('longest-matches', '/api/longest-matches'),
+        ('top-kills', '/api/top-kills'),
+        ('search-suggest', f"/api/search/suggest?q={values['player_term']}"),
+        ('match-list', '/match/api/list'),
+        ('match-list-page', '/match/api/list?page=2'),
+        ('match-list-month', f"/match/api/list?start_date={values['month']}&end_date={values['month']}"),
+        ('match-list-team', f"/match/api/list?team_name1={values['team_term']}"),
+        ('match-detail', f"/match/api/{values['match_id']}"),
+        ('player-list', '/player/api/list'),
+        ('player-list-team', f"/player/api/list?team_name={values['team_term']}"),
+        ('player-list-name', f"/player/api/list?player_name={values['player_term']}"),
+        ('player-list-position', f"/player/api/list?position={values['position']}"),
+        ('player-detail', f"/player/api/{values['player_name']}"),
+        ('team-list', '/team/api/distinct'),
+        ('team-list-name', f"/team/api/distinct?team_name={values['team_term']}"),
+        ('team-detail', f"/team/api/{values['team_name']}"),
+    ]
+
+
+def cursor_endpoints(values):
+    """游标翻页的接口：先请求第一页拿到 next_cursor，再检查带游标的下一页"""
+    return [
+        ('match-list-cursor', '/match/api/list?count=0'),
+        ('player-list-cursor', '/player/api/list'),
+        ('team-list-cursor', '/team/api/distinct'),
+        ('player-history-cursor', f"/player/api/{values['player_name']}?per_page=5"),
+    ]
+
+
+def with_cursor(app, url):
+    """请求第一页，返回带 next_cursor 的下一页 URL，没有下一页时返回 None"""
+    body = app.test_client().get(url).get_json(silent=True) or {}
+    cursor = (body.get('pagination') or {}).get('next_cursor')
+    if not cursor:
+        return None
+    return f"{url}{'&' if '?' in url else '?'}cursor={quote(cursor, safe='')}"
+
+
+def capture_statements(app, url):
+    """请求一个接口，返回期间执行的所有 SELECT 语句和参数"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    # 只读接口走 read 连接池，这里监听所有连接池
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = app.test_client().get(url)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return response.status_code, statements
+
+
+def full_scans(statement, parameters):
+    """对一条 SELECT 运行 EXPLAIN，返回 [(表名, 扫描类型)]，包括按索引顺序读完整个索引的扫描"""
+    dialect = db.engine.dialect.name
+    with db.engine.connect() as conn:
+        if dialect == 'sqlite':
+            rows = conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+            scans = []
+            for row in rows:
+                match = SQLITE_SCAN.match(row[-1])
+                if match:
+                    # "SCAN t USING [COVERING] INDEX ..." 仍然从头读整个索引，只有 LIMIT 能让它提前结束
+                    scans.append((match.group(1), INDEX_SCAN if 'USING' in match.group(2) else TABLE_SCAN))
+            return scans
+        rows = conn.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().fetchall()
+        kinds = {'ALL': TABLE_SCAN, 'index': INDEX_SCAN}
+        return [(row['table'], kinds[row.get('type')]) for row in rows if row.get('type') in kinds]
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        values = sample_values()
+        if values is None:
+            print("数据库中没有比赛数据，无法检查查询计划")
+            sys.exit(1)
+
+        checks = endpoints(values)
+        for name, url in cursor_endpoints(values):
+            next_url = with_cursor(app, url)
+            if next_url is None:
+                print(f"{url} 只有一页，跳过 {name}")
+                continue
+            checks.append((name, next_url))
+
+        failures = []
+        for name, url in checks:
+            status, statements = capture_statements(app, url)
+            print(f"{url}  HTTP {status}，{len(statements)} 条查询")
+            for statement, parameters in statements:
+                for table, kind in full_scans(statement, parameters):
+                    if table not in CHECKED_TABLES or (name, table) in ALLOWED_SCANS:
+                        continue
+                    failures.append((name, url, table, kind, ' '.join(statement.split())))
+
+        for name, url, table, kind, statement in failures:
+            print(f"[FAIL] {name} {url} 对 {table} {kind}: {statement}")
+        if failures:
+            sys.exit(1)
+        print("所有接口查询均使用了索引，没有未登记的扫描")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,112 +1,354 @@
-import re
 import os
 import sys
+import socket
+import argparse
+import itertools
+import subprocess
 
 # 添加项目根目录到Python路径，确保可以导入config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app, db
-from app.models.match import Match
-from app.models.player import Player
-from app.models.team import Team
-from app.services.spider import get_match_data
+from app.services.crawler import crawl_matches, find_frontier, STATUS_OK, STATUS_ERROR, STATUS_NOT_MODIFIED
+from app.services.checkpoint import CheckpointStore
+from app.services.ingest import MatchWriter
+from app.services.archive import iter_archive
+from app.services.spider import decode_match_json, parse_match_data, SkipMatch
+from app.services.summary import rebuild_summaries, check_summaries
+from app.services.counters import reconcile_counters
+from app.services.refresh import refresh_candidates, mark_checked
+from app.services.metrics import start_http_server, PeriodicReporter
+from app.services.partitions import ensure_partitions
+from app.services.analytics import analytics_enabled, export_snapshot
+from app.services.dashboard import save_snapshot as save_dashboard
+from app.services.data_version import ensure_data_version
+from app.services.work_queue import (
+    enqueue_ranges, claim_range, renew_lease, complete_range, release_range, queue_summary, LeaseLost
+)
 import config
 
-# 更新config.py文件中的LAST_MATCH_ID
-def update_last_match_id(match_id):
-    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.py')
-    with open(config_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # 使用正则表达式替换LAST_MATCH_ID的值
-    updated_content = re.sub(
-        r'LAST_MATCH_ID\s*=\s*\d+',
-        f'LAST_MATCH_ID = {match_id}',
-        content
-    )
-    
-    with open(config_path, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
-    
-    # 更新运行时的配置值
-    config.LAST_MATCH_ID = match_id
-    print(f"已更新LAST_MATCH_ID为{match_id}")
-
-app = create_app()
-
-with app.app_context():
-    db.create_all()
-
-    # 从配置文件中读取上次爬取的最后一个比赛ID
-    start_id = config.LAST_MATCH_ID  # 起始 ID
-    
+
+def run_import(match_ids, checkpoint, workers, rate_limit, max_not_found=100, batch_size=50, heartbeat=None,
+               frontier=None):
+    """
+    按顺序爬取 match_ids，直到 ID 用完或连续 max_not_found 个 ID 没有数据（None 表示不限制）
+
+    heartbeat 会在每批数据提交后调用，分片回填时用于续约；
+    frontier 为探测到的ID上界，爬到上界之前不会因为连续未找到而停止
+    """
     # 连续未找到数据的计数器
     not_found_count = 0
-    # 最大连续未找到数据的次数
-    max_not_found = 100
-    # 记录成功爬取的最大ID
-    max_found_id = start_id - 1
-    
-    # 从start_id开始无限制地爬取，直到连续100个未找到数据
-    match_id = start_id
-    
-    while not_found_count < max_not_found:
-        print(f"正在爬取比赛 ID: {match_id}")
-        data = get_match_data(match_id)
-
-        if data:
-            # 重置未找到数据的计数器
-            not_found_count = 0
-            # 更新成功爬取的最大ID
-            max_found_id = match_id
-            # 更新LAST_MATCH_ID
-            update_last_match_id(match_id)
-            try:
-                # 判断该 match_id 是否已存在于数据库中
-                existing_match = Match.query.filter_by(match_id=match_id).first()
-
-                if existing_match:
-                    # 如果数据已存在，跳过此次导入
-                    print(f"比赛 ID {match_id} 已存在，跳过")
-                    match_id += 1  # 即使跳过也要递增ID
-                    continue  # 跳过当前比赛数据的导入
-
-                # 第一步：保存 Match 数据
-                match_data = data['matches'][0]
-                match_record = Match(**match_data)
-                db.session.add(match_record)
-
-                print(f"比赛数据导入成功，match_id = {match_record.match_id}")
-
-                # 第二步：保存 Team 数据
-                teams = []
-                for team_data in data['teams']:
-                    team_data['match_id'] = match_record.match_id  # 使用 match_id 而非 id
-                    team_record = Team(**team_data)
-                    teams.append(team_record)
-                # 批量添加战队数据
-                db.session.bulk_save_objects(teams)
-
-                # 第三步：保存 Player 数据
-                players = []
-                for player_data in data['players']:
-                    player_data['match_id'] = match_record.match_id  # 使用 match_id 而非 id
-                    player_record = Player(**player_data)
-                    players.append(player_record)
-                # 批量添加选手数据
-                db.session.bulk_save_objects(players)
-
-                # 统一提交
-                db.session.commit()
-                print(f"战队和选手数据导入成功！比赛 ID: {match_id}")
-                match_id += 1  # 成功导入后递增ID
+    # 已有比赛ID在这里一次性加载，之后每攒够 batch_size 场比赛提交一次
+    writer = MatchWriter(batch_size=batch_size, checkpoint=checkpoint)
+
+    # 抓取在线程池中并发进行，结果按 ID 顺序依次交给这里写库
+    try:
+        for result in crawl_matches(match_ids, workers=workers, rate_limit=rate_limit):
+            match_id = result.match_id
+            print(f"正在爬取比赛 ID: {match_id}")
+
+            if result.status == STATUS_OK:
+                # 重置未找到数据的计数器
+                not_found_count = 0
+                writer.add(match_id, result.data, result.validators)
+            else:
+                if result.status == STATUS_ERROR:
+                    print(f"[ERROR] 爬取比赛 {match_id} 时出错: {result.error}")
+                elif result.error:
+                    print(f"跳过比赛 {match_id}，{result.error}")
+                checkpoint.record(match_id, result.status, result.error)
+                # 如果连续多次未找到数据，则认为已经爬取完毕
+                not_found_count += 1
+                print(f"没有找到比赛数据：{match_id}，连续未找到: {not_found_count}")
+                if (max_not_found is not None and not_found_count >= max_not_found
+                        and (frontier is None or match_id > frontier)):
+                    break
+
+            if writer.full() or checkpoint.should_flush():
+                writer.flush()
+                if heartbeat:
+                    heartbeat()
+    finally:
+        # 正常结束或中断时都把缓存的比赛和断点落库
+        writer.flush()
+
 
+def run_replay(batch_size=50, start_id=None, end_id=None):
+    """从本地归档重建比赛数据，已存在的比赛会被删除后重新写入"""
+    writer = MatchWriter(batch_size=batch_size, replace=True)
+    replayed = 0
+    try:
+        for match_id, updated_at, content in iter_archive(start_id, end_id):
+            try:
+                data = parse_match_data(decode_match_json(content), match_id)
+            except SkipMatch:
+                continue
             except Exception as e:
-                db.session.rollback()
-                print(f"导入比赛 ID {match_id} 时发生错误，已跳过。错误信息: {e}")
-                match_id += 1  # 出错后也要递增ID
+                print(f"[ERROR] 回放比赛 {match_id} 时解析出错: {e}")
+                continue
+            if data is None:
+                continue
+            writer.add(match_id, data)
+            replayed += 1
+            if writer.full():
+                writer.flush()
+    finally:
+        writer.flush()
+    print(f"回放完成，共写入 {replayed} 场比赛")
+
+
+def run_refresh(workers, rate_limit, batch_size, days, interval_hours, limit=None):
+    """回访最近的比赛，只重写上游 updated_at 发生变化的比赛"""
+    candidates = refresh_candidates(days, interval_hours, limit)
+    print(f"待检查的比赛共 {len(candidates)} 场")
+    writer = MatchWriter(batch_size=batch_size, replace=True)
+    checked = {}  # 上游未变化的比赛：match_id -> validators
+    changed = 0
+
+    try:
+        # 有 ETag/Last-Modified 记录的比赛会发送条件请求，上游未变化时服务器直接返回 304
+        for result in crawl_matches(iter(candidates), workers=workers, rate_limit=rate_limit,
+                                    validators=candidates):
+            match_id = result.match_id
+            if result.status == STATUS_OK:
+                if result.data['matches'][0]['date'] != candidates[match_id]['updated_at']:
+                    print(f"比赛 ID {match_id} 上游数据有更新，重新写入")
+                    writer.add(match_id, result.data, result.validators)
+                    changed += 1
+                else:
+                    checked[match_id] = result.validators
+            elif result.status == STATUS_NOT_MODIFIED:
+                checked[match_id] = result.validators
+            elif result.status == STATUS_ERROR:
+                print(f"[ERROR] 检查比赛 {match_id} 时出错: {result.error}")
+
+            if writer.full():
+                writer.flush()
+            if len(checked) >= batch_size:
+                mark_checked(checked, candidates)
+                checked = {}
+    finally:
+        writer.flush()
+        mark_checked(checked, candidates)
+    print(f"刷新完成，共检查 {len(candidates)} 场，其中 {changed} 场有更新")
+
+
+def run_worker(owner, workers, rate_limit, batch_size, lease_seconds):
+    """分片回填 worker：循环领取区间并爬取，直到队列中没有可领取的区间"""
+    while True:
+        crawl_range = claim_range(owner, lease_seconds)
+        if crawl_range is None:
+            print(f"[{owner}] 没有可领取的区间，退出。队列状态: {queue_summary()}")
+            return
+
+        print(f"[{owner}] 领取区间 {crawl_range.start_id}-{crawl_range.end_id}（第 {crawl_range.attempts} 次）")
+        # 每个区间有独立的断点，worker 崩溃后接手的 worker 从断点处继续
+        checkpoint = CheckpointStore(f'range:{crawl_range.start_id}')
+        start_id = max(crawl_range.start_id, checkpoint.resume_id(crawl_range.start_id))
+        match_ids = iter(range(start_id, crawl_range.end_id + 1))
+
+        def heartbeat():
+            if not renew_lease(crawl_range, owner, lease_seconds):
+                raise LeaseLost(f"区间 {crawl_range.start_id}-{crawl_range.end_id} 的租约已失效")
+
+        try:
+            run_import(match_ids, checkpoint, workers, rate_limit, None, batch_size, heartbeat=heartbeat)
+            if not complete_range(crawl_range, owner):
+                raise LeaseLost(f"区间 {crawl_range.start_id}-{crawl_range.end_id} 的租约已失效，未能标记完成")
+            print(f"[{owner}] 区间 {crawl_range.start_id}-{crawl_range.end_id} 完成")
+        except LeaseLost as e:
+            # 区间已由其他 worker 接手（或即将被接手），本 worker 说明处理太慢或曾被挂起，停止领取
+            print(f"[{owner}] {e}，停止 worker。队列状态: {queue_summary()}")
+            return
+        except BaseException:
+            db.session.rollback()
+            release_range(crawl_range, owner)
+            raise
+
+
+def spawn_workers(processes):
+    """在本机启动多个 worker 进程，等待全部结束"""
+    argv, skip_next = [], False
+    for arg in sys.argv[1:]:
+        if skip_next:
+            skip_next = False
+        elif arg == '--processes':
+            skip_next = True
+        elif not arg.startswith('--processes='):
+            argv.append(arg)
+    children = [subprocess.Popen([sys.executable, os.path.abspath(__file__)] + argv) for _ in range(processes)]
+    return max(child.wait() for child in children)
+
+
+def export_analytics():
+    """导入结束后刷新分析快照，未配置 ANALYTICS_DIR 或缺少 duckdb/pyarrow 时跳过"""
+    if not analytics_enabled():
+        return
+    try:
+        print(f"分析快照已导出到 {export_snapshot()}")
+    except Exception as e:
+        # 快照导出失败不影响已入库的数据，接口会继续使用上一份快照
+        print(f"导出分析快照失败: {e}")
+
+
+def refresh_dashboard():
+    """重新计算首页看板快照，放在分析快照之后，快照可用时排行榜在快照上计算"""
+    try:
+        if save_dashboard():
+            print("首页看板快照已更新")
         else:
-            # 如果连续多次未找到数据，则认为已经爬取完毕
-            not_found_count += 1
-            print(f"没有找到比赛数据：{match_id}，连续未找到: {not_found_count}/{max_not_found}")
-            match_id += 1  # 未找到数据时也递增ID
+            print("首页看板数据没有变化，保留原快照")
+    except Exception as e:
+        db.session.rollback()
+        # 失败时首页继续显示上一份快照
+        print(f"更新首页看板快照失败: {e}")
+
+
+def finish_import():
+    export_analytics()
+    refresh_dashboard()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='从 scoregg 爬取比赛数据并导入数据库')
+    parser.add_argument('--start-id', type=int, default=None, help='起始比赛 ID，默认从断点继续')
+    parser.add_argument('--workers', type=int, default=config.SPIDER_WORKERS, help='并发抓取线程数')
+    parser.add_argument('--rate-limit', type=float, default=config.SPIDER_RATE_LIMIT, help='每秒最多请求数，0 表示不限速')
+    parser.add_argument('--max-not-found', type=int, default=100, help='连续多少个 ID 无数据后停止（探测到上界时只在越过上界后生效）')
+    parser.add_argument('--no-probe', action='store_true', help='不预先探测ID上界，只按连续未找到次数停止')
+    parser.add_argument('--no-negative-cache', action='store_true', help='忽略负缓存，重新抓取已知为空或非LOL的ID')
+    parser.add_argument('--checkpoint', default='default', help='断点名称，不同的导入任务可使用不同名称')
+    parser.add_argument('--checkpoint-size', type=int, default=config.CHECKPOINT_FLUSH_SIZE, help='每处理多少个 ID 保存一次断点')
+    parser.add_argument('--batch-size', type=int, default=config.IMPORT_BATCH_SIZE, help='每个事务写入的比赛场数')
+    parser.add_argument('--retry-failed', action='store_true', help='先重试之前抓取出错的比赛 ID')
+    parser.add_argument('--replay', action='store_true', help='不联网，从 SPIDER_ARCHIVE_DIR 归档重建比赛数据')
+    parser.add_argument('--end-id', type=int, default=None, help='回放时的结束比赛 ID（含）')
+    parser.add_argument('--metrics-port', type=int, default=config.METRICS_PORT, help='在该端口提供 Prometheus /metrics 接口')
+    parser.add_argument('--metrics-interval', type=float, default=config.METRICS_INTERVAL, help='每隔多少秒输出一次指标摘要，0 表示不输出')
+    parser.add_argument('--refresh', action='store_true', help='回访最近的比赛，只重写上游有更新的比赛')
+    parser.add_argument('--refresh-days', type=int, default=config.REFRESH_DAYS, help='回访最近多少天内的比赛')
+    parser.add_argument('--refresh-interval', type=float, default=config.REFRESH_INTERVAL_HOURS, help='同一场比赛至少间隔多少小时才再次检查')
+    parser.add_argument('--rebuild-summary', action='store_true', help='从明细表全量重建选手/战队汇总表')
+    parser.add_argument('--check-summary', action='store_true', help='检查汇总表与明细表是否一致')
+    parser.add_argument('--reconcile-counters', action='store_true', help='与明细表核对并修正全局计数（首次使用时初始化）')
+    parser.add_argument('--export-snapshot', action='store_true', help='只导出 Parquet 分析快照（需设置 ANALYTICS_DIR）')
+    parser.add_argument('--enqueue', nargs=2, type=int, metavar=('START_ID', 'END_ID'), help='把ID区间切片加入回填队列')
+    parser.add_argument('--range-size', type=int, default=1000, help='回填队列中每个区间包含的ID数')
+    parser.add_argument('--worker', action='store_true', help='以回填 worker 身份领取队列中的区间')
+    parser.add_argument('--worker-id', default=None, help='worker 名称，默认 主机名:进程号')
+    parser.add_argument('--lease', type=int, default=600, help='区间租约时长（秒），超时未续约会被其他 worker 接手')
+    parser.add_argument('--processes', type=int, default=1, help='worker 模式下在本机启动的进程数')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.worker and args.processes > 1:
+        sys.exit(spawn_workers(args.processes))
+
+    app = create_app()
+
+    if args.metrics_port:
+        start_http_server(args.metrics_port)
+        print(f"指标接口: http://0.0.0.0:{args.metrics_port}/metrics")
+    reporter = None
+    if args.metrics_interval:
+        reporter = PeriodicReporter(args.metrics_interval, os.path.join(config.LOG_DIR, 'crawler_metrics.jsonl')).start()
+
+    try:
+        run_command(app, args)
+    finally:
+        if reporter:
+            reporter.stop()
+
+
+def run_command(app, args):
+    with app.app_context():
+        db.create_all()
+
+        # 提前建好新赛季的分区，避免跨年后写入落到兜底分区
+        created = ensure_partitions(config.PARTITION_YEARS_AHEAD)
+        db.session.commit()
+        ensure_data_version()
+        for table, partition in created:
+            print(f"已为 {table} 创建分区 {partition}")
+
+        if args.export_snapshot:
+            print(f"分析快照已导出到 {export_snapshot()}")
+            refresh_dashboard()
+            return
+
+        if args.replay:
+            run_replay(args.batch_size, args.start_id, args.end_id)
+            finish_import()
+            return
+
+        if args.refresh:
+            run_refresh(args.workers, args.rate_limit, args.batch_size, args.refresh_days, args.refresh_interval)
+            finish_import()
+            return
+
+        if args.rebuild_summary:
+            rebuild_summaries()
+            print("汇总表重建完成")
+            refresh_dashboard()
+            return
+
+        if args.reconcile_counters:
+            changes = reconcile_counters()
+            for name, (old, new) in changes.items():
+                print(f"全局计数 {name}: {'未初始化' if old is None else old} -> {new}")
+            print(f"全局计数核对完成，修正 {len(changes)} 项")
+            if changes:
+                refresh_dashboard()
+            return
+
+        if args.check_summary:
+            problems = check_summaries()
+            for problem in problems:
+                print(problem)
+            print(f"汇总表检查完成，发现 {len(problems)} 处不一致")
+            sys.exit(1 if problems else 0)
+
+        if args.enqueue:
+            created = enqueue_ranges(args.enqueue[0], args.enqueue[1], args.range_size)
+            print(f"新增 {created} 个回填区间，队列状态: {queue_summary()}")
+            return
+
+        if args.worker:
+            owner = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+            run_worker(owner, args.workers, args.rate_limit, args.batch_size, args.lease)
+            finish_import()
+            return
+
+        # 从断点表中读取上次的位置，首次运行时使用配置中的起始ID
+        checkpoint = CheckpointStore(args.checkpoint, flush_size=args.checkpoint_size)
+        start_id = args.start_id if args.start_id is not None else checkpoint.resume_id(config.LAST_MATCH_ID)
+        print(f"从比赛 ID {start_id} 开始爬取")
+
+        # 先用 HEAD 请求探测当前ID上界，上界之前的长空洞不会提前停止；探测只看每个点附近的少量ID，
+        # 上界之后可能还有比赛，越过上界后仍按连续 max_not_found 个ID没有数据才停止
+        end_id = None if args.no_probe else find_frontier(
+            start_id, window=config.FRONTIER_PROBE_WINDOW, rate_limit=args.rate_limit
+        )
+        if end_id is not None:
+            print(f"探测到比赛 ID 上界: {end_id}")
+        match_ids = itertools.count(start_id)
+
+        if not args.no_negative_cache:
+            negative_ids = checkpoint.negative_ids(
+                start_id, config.NEGATIVE_CACHE_EMPTY_DAYS, config.NEGATIVE_CACHE_SKIPPED_DAYS
+            )
+            if negative_ids:
+                print(f"负缓存命中 {len(negative_ids)} 个ID，本次跳过")
+                match_ids = (match_id for match_id in match_ids if match_id not in negative_ids)
+
+        if args.retry_failed:
+            match_ids = itertools.chain(checkpoint.failed_ids(), match_ids)
+        run_import(match_ids, checkpoint, args.workers, args.rate_limit, args.max_not_found, args.batch_size,
+                   frontier=end_id)
+        finish_import()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# 测试使用临时 SQLite 文件库，需在导入 config / app 之前设置 DATABASE_URL
+
+import os
+import tempfile
+
+import pytest
+
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db')
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
@@ -0,0 +1,48 @@
+import importlib
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+import config
+from app import db
+from app.models.match import Match
+from app.services import analytics
+
+pytest.importorskip('pyarrow')
+
+
+def test_export_reads_through_export_bind(app):
+    db.session.add(Match(match_id=1, date=datetime(2024, 5, 1), red_team_name='A', blue_team_name='B',
+                         win_team_name='A'))
+    db.session.commit()
+
+    executed = {'export': [], 'read': []}
+    listeners = []
+    for key, statements in executed.items():
+        def record(conn, cursor, statement, parameters, context, executemany, statements=statements):
+            statements.append(statement)
+        event.listen(db.engines[key], 'before_cursor_execute', record)
+        listeners.append((db.engines[key], record))
+    try:
+        schema = analytics._schema(Match, with_season=True)
+        batches = list(analytics._batches(Match, schema, with_season=True))
+    finally:
+        for engine, record in listeners:
+            event.remove(engine, 'before_cursor_execute', record)
+
+    assert analytics.export_engine() is db.engines['export']
+    assert sum(batch.num_rows for batch in batches) == 1
+    assert any('FROM matches' in statement for statement in executed['export'])
+    assert executed['read'] == []
+
+
+def test_export_bind_has_no_statement_timeout(monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', 'mysql+pymysql://user:pass@db:3306/lol')
+    try:
+        binds = importlib.reload(config).Config.SQLALCHEMY_BINDS
+        assert 'max_execution_time' in binds['read']['connect_args']['init_command']
+        assert 'connect_args' not in binds['export']
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
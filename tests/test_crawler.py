@@ -0,0 +1,38 @@
+import json
+
+import requests
+import urllib3
+
+from app.services import crawler
+from app.services.metrics import RESULTS_TOTAL
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_error_reason_taxonomy():
+    assert crawler.error_reason(requests.ReadTimeout()) == crawler.REASON_TIMEOUT
+    assert crawler.error_reason(requests.ConnectTimeout()) == crawler.REASON_TIMEOUT
+    assert crawler.error_reason(urllib3.exceptions.ReadTimeoutError(None, None, 'read')) == crawler.REASON_TIMEOUT
+    assert crawler.error_reason(requests.ConnectionError()) == crawler.REASON_CONNECTION
+    assert crawler.error_reason(urllib3.exceptions.ProtocolError()) == crawler.REASON_CONNECTION
+    assert crawler.error_reason(_http_error(502)) == crawler.REASON_HTTP_5XX
+    assert crawler.error_reason(_http_error(403)) == crawler.REASON_HTTP_4XX
+    assert crawler.error_reason(json.JSONDecodeError('bad', '', 0)) == crawler.REASON_PARSE
+    assert crawler.error_reason(KeyError('result_list')) == crawler.REASON_PARSE
+
+
+def test_crawl_one_counts_errors_by_reason(monkeypatch):
+    def fail(*args, **kwargs):
+        raise requests.ReadTimeout()
+    monkeypatch.setattr(crawler, 'fetch_match_response', fail)
+    key = (('reason', crawler.REASON_TIMEOUT), ('status', crawler.STATUS_ERROR))
+    before = RESULTS_TOTAL.values().get(key, 0)
+
+    result = crawler.crawl_one(1)
+
+    assert (result.status, result.reason) == (crawler.STATUS_ERROR, crawler.REASON_TIMEOUT)
+    assert RESULTS_TOTAL.values()[key] == before + 1
@@ -0,0 +1,31 @@
+import pytest
+
+from app.services import dashboard, data_version
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    data_version.ensure_data_version()
+    monkeypatch.setattr(data_version, '_checked_at', None)
+    monkeypatch.setattr(data_version, '_current', None)
+    return app.test_client()
+
+
+def test_success_response_is_tagged_and_revalidated(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'global_stats', lambda: {'matches': 1})
+    response = client.get('/api/stats')
+    assert response.json['status'] == 'success'
+    etag = response.headers['ETag']
+
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_error_response_is_not_tagged(client, monkeypatch):
+    def fail():
+        raise RuntimeError('db down')
+    monkeypatch.setattr(dashboard, 'global_stats', fail)
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    assert response.json['status'] == 'error'
+    assert 'ETag' not in response.headers
+    assert 'Last-Modified' not in response.headers
@@ -0,0 +1,24 @@
+from app import db
+from app.models.dimension import DimPlayer
+from app.models.summary import PlayerSummary
+from app.services.name_index import NameIndex
+
+
+def test_refresh_picks_up_lower_ids_committed_late_and_new_weights(app):
+    index = NameIndex(DimPlayer, PlayerSummary, PlayerSummary.name)
+    db.session.add_all([DimPlayer(id=5, name='Faker'), PlayerSummary(name='Faker', appearances=10)])
+    db.session.commit()
+    index.refresh(force=True)
+
+    # 并行导入时较小的ID可能在较大的ID之后才提交
+    db.session.add_all([DimPlayer(id=3, name='Fakest'), PlayerSummary(name='Fakest', appearances=20)])
+    db.session.commit()
+    index.refresh(force=True)
+
+    assert index.search('fake') == {5: 'Faker', 3: 'Fakest'}
+    assert index.suggest('fake') == ['Fakest', 'Faker']
+
+    PlayerSummary.query.filter_by(name='Faker').update({'appearances': 30})
+    db.session.commit()
+    index.refresh(force=True)
+    assert index.suggest('fake') == ['Faker', 'Fakest']
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models.match import Match
+from app.services.pagination import keyset_paginate
+
+ORDER = [(Match.date, 'date', True), (Match.id, 'id', True)]
+
+
+def _walk(per_page):
+    ids, cursor = [], None
+    while True:
+        page = keyset_paginate(Match.query, ORDER, per_page=per_page, cursor=cursor, with_count=False)
+        ids += [match.id for match in page.items]
+        if not page.has_next:
+            return ids
+        cursor = page.next_cursor
+
+
+def test_cursor_pages_cover_every_row_in_order_including_null_dates(app):
+    start = datetime(2024, 1, 1)
+    for i in range(23):
+        # 有重复日期，也有日期未知的比赛
+        date = None if i % 7 == 0 else start + timedelta(days=i // 3)
+        db.session.add(Match(match_id=i, date=date, red_team_name='A', blue_team_name='B', win_team_name='A'))
+    db.session.commit()
+
+    expected = [match.id for match in Match.query.order_by(Match.date.desc(), Match.id.desc())]
+    for per_page in (1, 4, 5, 30):
+        assert _walk(per_page) == expected